@@ -0,0 +1,410 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import matplotlib
+import numpy as np
+matplotlib.use("Agg")
+
+from data_visualization import data_preview
+from experiments import citation_graph_local_run
+from weight_reaccessment_of_edges import adjust_edge_weight
+
+"""
+Benchmark suite for the recommender pipeline.
+
+Every stage (graph loading, node2vec walk generation, Word2Vec fitting, similarity search,
+edge reweighting and degree statistics) is timed separately on synthetic citation graphs
+of configurable size. Results are written as JSON and can be compared against a stored
+baseline to flag regressions. With --compare-backends, node2vec and NetMF embeddings are
+also trained on a topically structured graph with 10% of the citations held out and
+compared on held-out recall@10.
+
+Run from the repository root:
+    python -m benchmarks.pipeline_benchmark --sizes 1000 5000 --save-baseline
+    python -m benchmarks.pipeline_benchmark --sizes 1000 5000 --baseline benchmarks/results/baseline.json
+"""
+
+DEFAULT_RESULTS_DIR = "benchmarks/results"
+
+
+def generate_synthetic_dataset(work_dir, num_papers, citations_per_paper=5, seed=42, num_topics=50, topic_bias=0.0):
+    """
+    Write a synthetic AAN-like dataset with a preferential-attachment citation network.
+
+    Parameters:
+    - work_dir (str or Path): Directory the files are written to.
+    - num_papers (int): Number of papers in the network.
+    - citations_per_paper (int): Number of references of every paper (default: 5).
+    - seed (int): Random seed (default: 42).
+    - num_topics (int): Number of topics; paper i belongs to topic i % num_topics (default: 50).
+    - topic_bias (float): Probability that a reference is drawn, again by preferential attachment,
+      from the citing paper's own topic (default: 0, no topical structure).
+
+    Returns:
+    - files (dict): Paths of the generated files, keyed by their role.
+    """
+    rng = random.Random(seed)
+    work_dir = Path(work_dir)
+    work_dir.mkdir(parents=True, exist_ok=True)
+
+    paper_ids = [f"P{i:07d}" for i in range(num_papers)]
+    # Papers are published in id order, so references always point to older papers
+    years = [1965 + (50 * i) // num_papers for i in range(num_papers)]
+
+    edges = []
+    # Every cited endpoint is appended once per citation, so sampling from it is
+    # proportional to in-degree (plus one for the paper itself).
+    attachment_pool = []
+    topic_pools = [[] for _ in range(num_topics)]
+    for i, citing in enumerate(paper_ids):
+        topic_pool = topic_pools[i % num_topics]
+        if i > 0:
+            cited = set()
+            for _ in range(min(citations_per_paper, i)):
+                pool = topic_pool if topic_bias and topic_pool and rng.random() < topic_bias else attachment_pool
+                cited.add(pool[rng.randrange(len(pool))])
+            for j in sorted(cited):
+                edges.append((citing, paper_ids[j]))
+                attachment_pool.append(j)
+                topic_pools[j % num_topics].append(j)
+        attachment_pool.append(i)
+        topic_pool.append(i)
+
+    files = {
+        "citation_network": work_dir / "paper_citation_network.txt",
+        "paper_ids": work_dir / "paper_ids.txt",
+        "paper_author": work_dir / "paper_author_affiliations.txt",
+        "communities": work_dir / "community_results.txt",
+        "incites": work_dir / "paper_incites.txt",
+        "outcites": work_dir / "paper_outcites.txt",
+    }
+    with open(files["citation_network"], "w", encoding="utf-8") as f:
+        for citing, cited in edges:
+            f.write(f"{citing} ==> {cited}\n")
+    with open(files["paper_ids"], "w", encoding="utf-8") as f:
+        for paper_id, year in zip(paper_ids, years):
+            f.write(f"{paper_id}\tSynthetic paper {paper_id}\t{year}\n")
+
+    num_authors = max(1, num_papers // 2)
+    with open(files["paper_author"], "w") as f:
+        f.write("paper id\tauthor id\taffiliation id\n")
+        for paper_id in paper_ids:
+            for author_id in rng.sample(range(num_authors), min(2, num_authors)):
+                f.write(f"{paper_id}\t{author_id}\t0\n")
+    with open(files["communities"], "w") as f:
+        f.write("author, community\n")
+        for author_id in range(num_authors):
+            f.write(f"{author_id}, {author_id % 50}\n")
+
+    in_degree = {paper_id: 0 for paper_id in paper_ids}
+    out_degree = {paper_id: 0 for paper_id in paper_ids}
+    for citing, cited in edges:
+        out_degree[citing] += 1
+        in_degree[cited] += 1
+    for role, degrees in (("incites", in_degree), ("outcites", out_degree)):
+        with open(files[role], "w") as f:
+            for paper_id, degree in degrees.items():
+                f.write(f"{paper_id}\t{degree}\n")
+
+    files["num_edges"] = len(edges)
+    return files
+
+
+def stage_load_graph(ctx):
+    ctx["graph"] = citation_graph_local_run.load_citation_graph(ctx["files"]["citation_network"])
+    return ctx["graph"].number_of_edges(), "edges/s"
+
+
+def stage_walks(ctx):
+    G = ctx["graph"]
+    ctx["node2vec"] = citation_graph_local_run.generate_walks(
+        G,
+        embedding_dim=ctx["embedding_dim"],
+        walk_length=ctx["walk_length"],
+        num_walks=ctx["num_walks"],
+        p=0.1,
+        q=2,
+        workers=ctx["workers"]
+    )
+    return len(ctx["node2vec"].walks), "walks/s"
+
+
+def stage_fit(ctx):
+    ctx["model"] = citation_graph_local_run.fit_embedding_model(ctx["node2vec"])
+    return len(ctx["node2vec"].walks), "walks/s"
+
+
+def stage_similarity(ctx):
+    node_list, embeddings, node_to_idx = citation_graph_local_run.extract_embeddings(ctx["model"])
+    rng = random.Random(0)
+    queries = rng.sample(list(node_list), min(ctx["num_queries"], len(node_list)))
+    output_file = Path(ctx["work_dir"]) / "recommendations.txt"
+    citation_graph_local_run.write_recommendations(output_file, queries, node_list, embeddings, node_to_idx)
+    return len(queries), "queries/s"
+
+
+def stage_reweight(ctx):
+    files = ctx["files"]
+    adjust_edge_weight.load_weighting_data(files["paper_ids"], files["paper_author"], files["communities"])
+    output_file = Path(ctx["work_dir"]) / "weighted_paper_citation_network.txt"
+    # Same threshold rule as the main script of adjust_edge_weight
+    median_count = np.median(list(adjust_edge_weight.year_distribution.values()))
+    threshold = 0.43 * 1 / (1 + np.log(median_count + 1))
+    adjust_edge_weight.generate_new_network(files["citation_network"], output_file, threshold, plot=False)
+    return files["num_edges"], "edges/s"
+
+
+def stage_degree_statistics(ctx):
+    df = data_preview.load_citation_data(ctx["files"]["incites"])
+    unique_degrees, probabilities, degrees = data_preview.compute_degree_distribution(df)
+    data_preview.compute_ccdf(degrees)
+    return len(degrees), "papers/s"
+
+
+# Stages run in this order; a stage consumes what its prerequisites leave in the context.
+STAGES = {
+    "load_graph": stage_load_graph,
+    "node2vec_walks": stage_walks,
+    "word2vec_fit": stage_fit,
+    "similarity_search": stage_similarity,
+    "reweight_edges": stage_reweight,
+    "degree_statistics": stage_degree_statistics,
+}
+
+PREREQUISITES = {
+    "node2vec_walks": ["load_graph"],
+    "word2vec_fit": ["load_graph", "node2vec_walks"],
+    "similarity_search": ["load_graph", "node2vec_walks", "word2vec_fit"],
+}
+
+
+def measure_stage(stage, ctx, repeat):
+    """
+    Time a stage and record its peak traced memory.
+
+    The stage runs `repeat` times without tracing and the fastest run is kept; it then runs
+    once more under tracemalloc so that tracing overhead does not distort the timings.
+    """
+    wall_times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        units, unit_name = stage(ctx)
+        wall_times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    stage(ctx)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    wall_time = min(wall_times)
+    return {
+        "wall_time_s": wall_time,
+        "throughput": units / wall_time if wall_time > 0 else float("inf"),
+        "throughput_unit": unit_name,
+        "units": units,
+        "peak_memory_mb": peak / 2 ** 20,
+    }
+
+
+def run_benchmarks(sizes, stages=None, repeat=3, num_walks=10, walk_length=10, embedding_dim=32,
+                   num_queries=200, workers=1, seed=42):
+    """
+    Run every selected stage on a synthetic graph of each requested size.
+
+    Returns:
+    - report (dict): Environment metadata and one result record per (stage, size).
+    """
+    stages = stages or list(STAGES)
+    required = {name for stage in stages for name in PREREQUISITES.get(stage, [])}
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            work_dir = Path(tmp) / f"n{size}"
+            ctx = {
+                "work_dir": work_dir,
+                "files": generate_synthetic_dataset(work_dir, size, seed=seed),
+                "num_walks": num_walks,
+                "walk_length": walk_length,
+                "embedding_dim": embedding_dim,
+                "num_queries": num_queries,
+                "workers": workers,
+            }
+            for name, stage in STAGES.items():
+                if name not in stages:
+                    # Unselected prerequisites still run once, untimed, to produce their outputs
+                    if name in required:
+                        stage(ctx)
+                    continue
+                print(f"Benchmarking {name} on {size} papers...")
+                record = measure_stage(stage, ctx, repeat)
+                record.update({"stage": name, "size": size})
+                results.append(record)
+                print(f"  {record['wall_time_s']:.3f}s, {record['throughput']:.1f} {record['throughput_unit']}, "
+                      f"peak {record['peak_memory_mb']:.1f} MB")
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": repeat,
+            "num_walks": num_walks,
+            "walk_length": walk_length,
+            "embedding_dim": embedding_dim,
+            "workers": workers,
+        },
+        "results": results,
+    }
+
+
+def heldout_recall(node_list, embeddings, train_graph, heldout_edges, k=10, num_queries=500, seed=42):
+    """
+    Recall@k of held-out citations: the share of removed (citing, cited) edges whose cited paper
+    appears in the citing paper's top-k, with the citations kept for training excluded.
+    """
+    from experiments.similarity_search import normalize_embeddings, top_k_similar, build_citation_mask
+
+    node_to_idx = {node: idx for idx, node in enumerate(node_list)}
+    targets = {}
+    for citing, cited in heldout_edges:
+        if citing in node_to_idx and cited in node_to_idx:
+            targets.setdefault(citing, set()).add(node_to_idx[cited])
+    queries = sorted(targets)
+    queries = random.Random(seed).sample(queries, min(num_queries, len(queries)))
+    indices, _ = top_k_similar(normalize_embeddings(embeddings), [node_to_idx[q] for q in queries], k,
+                               exclude_mask=build_citation_mask(train_graph, node_to_idx))
+    hits = sum(len(targets[q] & set(row)) for q, row in zip(queries, indices.tolist()))
+    return hits / sum(len(targets[q]) for q in queries)
+
+
+def compare_embedding_backends(size, backends=("node2vec", "netmf"), holdout=0.1, k=10, num_walks=10,
+                               walk_length=10, embedding_dim=32, num_queries=200, workers=1, seed=42,
+                               topic_bias=0.8):
+    """
+    Train every embedding backend on a synthetic graph with held-out citations and compare
+    training time and held-out recall@k. The graph has topical structure (topic_bias), so
+    that held-out citations are predictable from the rest of the graph.
+
+    Returns:
+    - results (list): One record per backend.
+    """
+    from experiments.tracing import NULL_TRACER
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        files = generate_synthetic_dataset(tmp, size, seed=seed, num_topics=max(1, size // 100),
+                                           topic_bias=topic_bias)
+        G = citation_graph_local_run.load_citation_graph(files["citation_network"])
+        edges = list(G.edges())
+        rng = random.Random(seed)
+        heldout = rng.sample(edges, int(len(edges) * holdout))
+        G.remove_edges_from(heldout)
+        for backend in backends:
+            print(f"Training {backend} embeddings on {size} papers...")
+            random.seed(seed)
+            np.random.seed(seed)
+            start = time.perf_counter()
+            node_list, embeddings, _ = citation_graph_local_run.embed_graph(
+                G, embedding_dim, walk_length, num_walks, 1, 1, workers, seed, NULL_TRACER, backend, weighted=False)
+            wall_time = time.perf_counter() - start
+            recall = heldout_recall(node_list, embeddings, G, heldout, k, num_queries, seed)
+            results.append({"backend": backend, "size": size, "train_time_s": wall_time, f"recall@{k}": recall})
+            print(f"  {wall_time:.2f}s, held-out recall@{k} {recall:.3f}")
+    return results
+
+
+def compare_with_baseline(report, baseline, tolerance=0.2):
+    """
+    Compare a report with a baseline report.
+
+    Parameters:
+    - report (dict): Current benchmark report.
+    - baseline (dict): Previously stored benchmark report.
+    - tolerance (float): Allowed relative slowdown or memory growth before flagging (default: 0.2).
+
+    Returns:
+    - regressions (list): Human-readable description of every regression found.
+    """
+    baseline_results = {(r["stage"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for record in report["results"]:
+        reference = baseline_results.get((record["stage"], record["size"]))
+        if reference is None:
+            continue
+        for metric in ("wall_time_s", "peak_memory_mb"):
+            old, new = reference[metric], record[metric]
+            if old > 0 and new > old * (1 + tolerance):
+                regressions.append(
+                    f"{record['stage']} (n={record['size']}): {metric} {old:.3f} -> {new:.3f} "
+                    f"(+{(new / old - 1) * 100:.0f}%)"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the citation recommender pipeline stages.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000], help="Synthetic graph sizes (papers).")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), help="Stages to benchmark (default: all).")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions per stage.")
+    parser.add_argument("--num-walks", type=int, default=10)
+    parser.add_argument("--walk-length", type=int, default=10)
+    parser.add_argument("--embedding-dim", type=int, default=32)
+    parser.add_argument("--num-queries", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", default=f"{DEFAULT_RESULTS_DIR}/latest.json", help="Where to write the JSON report.")
+    parser.add_argument("--baseline", help="Baseline report to compare against.")
+    parser.add_argument("--save-baseline", action="store_true", help="Also store this report as the baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression.")
+    parser.add_argument("--compare-backends", action="store_true",
+                        help="Also compare node2vec and NetMF embeddings on held-out citations.")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(
+        args.sizes,
+        stages=args.stages,
+        repeat=args.repeat,
+        num_walks=args.num_walks,
+        walk_length=args.walk_length,
+        embedding_dim=args.embedding_dim,
+        num_queries=args.num_queries,
+        workers=args.workers,
+    )
+    if args.compare_backends:
+        report["backend_comparison"] = [
+            record for size in args.sizes
+            for record in compare_embedding_backends(size, num_walks=args.num_walks, walk_length=args.walk_length,
+                                                     embedding_dim=args.embedding_dim,
+                                                     num_queries=args.num_queries, workers=args.workers)
+        ]
+
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Benchmark report written to {output}")
+    if args.save_baseline:
+        baseline_path = output.parent / "baseline.json"
+        baseline_path.write_text(json.dumps(report, indent=2))
+        print(f"Baseline stored in {baseline_path}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare_with_baseline(report, baseline, args.tolerance)
+        if regressions:
+            print("Regressions detected:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions against the baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,163 @@
+import argparse
+
+import numpy as np
+import scipy.sparse as sp
+
+"""
+Local construction of the author collaboration network.
+
+The COLLABORATED graph that neo4j_toolkits reads from Neo4j can be derived directly from
+paper_author_affiliations.txt: with A the paper x author incidence matrix, the weighted
+co-authorship network is the bipartite projection A^T A, whose (i, j) entry counts the papers
+authors i and j wrote together. The diagonal (papers per author) is dropped.
+
+The result is kept as CSR arrays, which feed community detection and author embeddings
+without a database round-trip.
+
+Run from the repository root:
+    python -m data_preparation.coauthor_graph weight_reaccessment_of_edges/paper_author_affiliations.txt \
+        data/coauthor_graph.npz --communities weight_reaccessment_of_edges/community_results.txt
+"""
+
+
+def read_incidence(paper_author_file):
+    """
+    Build the binary paper x author incidence matrix from the paper-author file.
+
+    Returns:
+    - incidence (scipy.sparse.csr_matrix): papers x authors, 1 where the author wrote the paper.
+    - paper_ids (list): Paper ID of every row.
+    - author_ids (list): Author ID of every column.
+    """
+    paper_to_idx, author_to_idx = {}, {}
+    rows, cols = [], []
+    with open(paper_author_file, "r") as file:
+        for index, line in enumerate(file):
+            if index == 0 or not line.strip():
+                continue
+            paper_id, author_id, _ = line.strip().split("\t")
+            rows.append(paper_to_idx.setdefault(paper_id, len(paper_to_idx)))
+            cols.append(author_to_idx.setdefault(author_id, len(author_to_idx)))
+    incidence = sp.csr_matrix((np.ones(len(rows), dtype=np.float32), (rows, cols)),
+                              shape=(len(paper_to_idx), len(author_to_idx)))
+    # An author listed twice on a paper (several affiliations) still counts once
+    incidence.data[:] = 1
+    return incidence, list(paper_to_idx), list(author_to_idx)
+
+
+def incidence_from_store(metadata_dir):
+    """
+    Build the incidence matrix from the paper -> author CSR of a metadata store.
+    """
+    from data_preparation.metadata_store import PaperMetadata
+    store = PaperMetadata.load(metadata_dir)
+    incidence = sp.csr_matrix((np.ones(len(store.author_indices), dtype=np.float32),
+                               np.array(store.author_indices), np.array(store.author_indptr)),
+                              shape=(len(store.paper_ids), len(store.author_ids)))
+    incidence.sum_duplicates()
+    incidence.data[:] = 1
+    return incidence, [p.decode() for p in store.paper_ids], [a.decode() for a in store.author_ids]
+
+
+def project_coauthors(incidence):
+    """
+    Weighted co-authorship matrix A^T A without its diagonal, as CSR.
+    """
+    coauthors = (incidence.T @ incidence).tocsr()
+    coauthors.setdiag(0)
+    coauthors.eliminate_zeros()
+    coauthors.sort_indices()
+    return coauthors
+
+
+def build_coauthor_graph(paper_author_file=None, metadata_dir=None):
+    """
+    Build the co-authorship network from the paper-author file or from a metadata store.
+
+    Returns:
+    - coauthors (scipy.sparse.csr_matrix): Symmetric authors x authors matrix of shared papers.
+    - author_ids (list): Author ID of every row.
+    """
+    if metadata_dir is not None:
+        incidence, _, author_ids = incidence_from_store(metadata_dir)
+    elif paper_author_file is not None:
+        incidence, _, author_ids = read_incidence(paper_author_file)
+    else:
+        raise ValueError("paper_author_file or metadata_dir is required")
+    return project_coauthors(incidence), author_ids
+
+
+def save_coauthor_graph(output_file, coauthors, author_ids):
+    """
+    Store the CSR arrays and author IDs in a single .npz file.
+    """
+    np.savez(output_file, indptr=coauthors.indptr, indices=coauthors.indices, data=coauthors.data,
+             author_ids=np.array(author_ids, dtype=bytes))
+
+
+def load_coauthor_graph(input_file):
+    """
+    Load a co-authorship network stored by save_coauthor_graph.
+    """
+    with np.load(input_file) as f:
+        author_ids = [a.decode() for a in f["author_ids"]]
+        coauthors = sp.csr_matrix((f["data"], f["indices"], f["indptr"]), shape=(len(author_ids), len(author_ids)))
+    return coauthors, author_ids
+
+
+def to_graph_data(coauthors, author_ids):
+    """
+    Convert to the (nodes_data, edges_data) lists returned by query_neo4j.fetch_graph_data,
+    so query_neo4j.create_networkx_graph can consume the local network unchanged.
+    Every undirected collaboration is listed once.
+    """
+    nodes_data = [(idx, {"name": author_id}) for idx, author_id in enumerate(author_ids)]
+    upper = sp.triu(coauthors, k=1).tocoo()
+    edges_data = list(zip(upper.row.tolist(), upper.col.tolist()))
+    return nodes_data, edges_data
+
+
+def to_networkx(coauthors, author_ids):
+    """
+    Weighted undirected networkx graph with author IDs as nodes.
+    """
+    import networkx as nx
+    graph = nx.Graph()
+    graph.add_nodes_from(author_ids)
+    upper = sp.triu(coauthors, k=1).tocoo()
+    graph.add_weighted_edges_from((author_ids[i], author_ids[j], float(w))
+                                  for i, j, w in zip(upper.row, upper.col, upper.data))
+    return graph
+
+
+def detect_communities(coauthors, author_ids, output_file, seed=42):
+    """
+    Louvain communities of the co-authorship network, written as "author, community" lines
+    after a header line, the format read by adjust_edge_weight.generate_community_dic.
+    """
+    import networkx as nx
+    graph = to_networkx(coauthors, author_ids)
+    communities = nx.community.louvain_communities(graph, weight="weight", seed=seed)
+    with open(output_file, "w") as f:
+        f.write("author, community\n")
+        for community_id, members in enumerate(communities):
+            for author in sorted(members):
+                f.write(f"{author}, {community_id}\n")
+    print(f"Number of communities: {len(communities)}")
+    print(f"Community results saved to {output_file}")
+    return communities
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the co-authorship network from paper_author_affiliations.txt.")
+    parser.add_argument("paper_author_file")
+    parser.add_argument("output_file", help="Where to store the CSR arrays (.npz).")
+    parser.add_argument("--communities", help="Also run Louvain and write author communities to this file.")
+    args = parser.parse_args()
+
+    coauthors, author_ids = build_coauthor_graph(args.paper_author_file)
+    save_coauthor_graph(args.output_file, coauthors, author_ids)
+    print(f"Co-authorship network with {len(author_ids)} authors and {coauthors.nnz // 2} collaborations "
+          f"saved to {args.output_file}")
+    if args.communities:
+        detect_communities(coauthors, author_ids, args.communities)
@@ -0,0 +1,297 @@
+import json
+import os
+from collections.abc import Mapping
+
+import numpy as np
+
+"""
+Memory-mapped columnar store of paper metadata.
+
+The paper and author tables of the AAN release are converted once into flat NumPy arrays:
+
+    paper_ids.npy          S   (P)      paper IDs, sorted (the interned ID table)
+    years.npy              int16 (P)    publication year, UNKNOWN_YEAR if missing
+    author_indptr.npy      int64 (P+1)  paper -> author CSR offsets
+    author_indices.npy     int32        author rows of every paper
+    author_ids.npy         S   (A)      author IDs, sorted
+    author_community.npy   int32 (A)    community of every author, NO_COMMUNITY if unknown
+
+Loading maps the files instead of parsing text, so it takes milliseconds. IDs are resolved
+by binary search on the sorted tables. The Mapping views returned by year_mapping,
+paper_author_mapping and community_mapping behave like the dictionaries built by
+adjust_edge_weight, so existing code can use the store without rebuilding those dicts. Every
+view lookup is a binary search, so code that looks up millions of keys (edge weighting)
+should build plain dicts in bulk with year_dict, paper_author_dict and community_dict.
+
+Build it from the repository root:
+    python -m data_preparation.metadata_store weight_reaccessment_of_edges/paper_ids.txt \
+        weight_reaccessment_of_edges/paper_author_affiliations.txt \
+        weight_reaccessment_of_edges/community_results.txt data/metadata
+"""
+
+UNKNOWN_YEAR = -1
+NO_COMMUNITY = -1
+
+
+def _sorted_table(values):
+    table = np.array(sorted(set(values)), dtype=bytes)
+    return table if len(table) else np.array([], dtype="S1")
+
+
+def _lookup(table, keys):
+    """
+    Row of every key in a sorted byte-string table, -1 for unknown keys.
+    """
+    keys = np.asarray(keys, dtype=bytes)
+    if len(table) == 0:
+        return np.full(keys.shape, -1, dtype=np.int64)
+    rows = np.searchsorted(table, keys)
+    rows = np.minimum(rows, len(table) - 1)
+    return np.where(table[rows] == keys, rows, -1)
+
+
+def build_metadata_store(paper_ids_file, paper_author_file, community_file, output_dir):
+    """
+    Parse the AAN metadata files and write the memory-mapped store.
+
+    Parameters:
+    - paper_ids_file (str): Tab-separated "paper id, title, year" file.
+    - paper_author_file (str): Tab-separated "paper id, author id, affiliation id" file with a header.
+    - community_file (str): "author id, community id" file with a header.
+    - output_dir (str): Directory the store is written to.
+
+    Returns:
+    - store (PaperMetadata): The loaded store.
+    """
+    paper_years = {}
+    with open(paper_ids_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            parts = line.replace('    ', '\t').strip().split('\t')
+            if parts and parts[0]:
+                year = parts[2] if len(parts) >= 3 else ""
+                paper_years[parts[0]] = int(year) if year.isdigit() else UNKNOWN_YEAR
+
+    paper_authors = []
+    with open(paper_author_file, 'r') as f:
+        for index, line in enumerate(f):
+            if index == 0 or not line.strip():
+                continue
+            paper_id, author_id, _ = line.strip().split("\t")
+            paper_authors.append((paper_id, author_id))
+
+    communities = {}
+    with open(community_file, 'r') as f:
+        for index, line in enumerate(f):
+            if index == 0 or not line.strip():
+                continue
+            author_id, community_id = line.strip().split(", ")
+            communities[author_id] = int(community_id)
+
+    papers = _sorted_table(list(paper_years) + [paper for paper, _ in paper_authors])
+    authors = _sorted_table([author for _, author in paper_authors] + list(communities))
+
+    years = np.full(len(papers), UNKNOWN_YEAR, dtype=np.int16)
+    years[_lookup(papers, list(paper_years))] = list(paper_years.values())
+
+    if paper_authors:
+        paper_rows = _lookup(papers, [paper for paper, _ in paper_authors])
+        author_rows = _lookup(authors, [author for _, author in paper_authors])
+    else:
+        paper_rows = author_rows = np.array([], dtype=np.int64)
+    # Stable sort keeps the file order of the authors of each paper
+    order = np.argsort(paper_rows, kind="stable")
+    author_indptr = np.zeros(len(papers) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(paper_rows, minlength=len(papers)), out=author_indptr[1:])
+    author_indices = author_rows[order].astype(np.int32)
+
+    author_community = np.full(len(authors), NO_COMMUNITY, dtype=np.int32)
+    if communities:
+        author_community[_lookup(authors, list(communities))] = list(communities.values())
+
+    os.makedirs(output_dir, exist_ok=True)
+    for name, array in (("paper_ids", papers), ("years", years), ("author_indptr", author_indptr),
+                        ("author_indices", author_indices), ("author_ids", authors),
+                        ("author_community", author_community)):
+        np.save(os.path.join(output_dir, f"{name}.npy"), array)
+    with open(os.path.join(output_dir, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump({"papers": len(papers), "authors": len(authors), "authorships": len(author_indices)}, f)
+    return PaperMetadata.load(output_dir)
+
+
+class PaperMetadata:
+    """
+    Read-only view of a metadata store written by build_metadata_store.
+    """
+
+    def __init__(self, paper_ids, years, author_indptr, author_indices, author_ids, author_community):
+        self.paper_ids = paper_ids
+        self.years = years
+        self.author_indptr = author_indptr
+        self.author_indices = author_indices
+        self.author_ids = author_ids
+        self.author_community = author_community
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        def load(name):
+            return np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode)
+        return cls(load("paper_ids"), load("years"), load("author_indptr"), load("author_indices"),
+                   load("author_ids"), load("author_community"))
+
+    def __len__(self):
+        return len(self.paper_ids)
+
+    # Papers
+
+    def paper_rows(self, paper_ids):
+        """
+        Row of every paper ID, -1 for unknown papers.
+        """
+        return _lookup(self.paper_ids, paper_ids)
+
+    def paper_row(self, paper_id):
+        return int(self.paper_rows([paper_id])[0])
+
+    def years_of(self, paper_ids):
+        """
+        int16 publication year of every paper ID, UNKNOWN_YEAR for unknown papers or years.
+        """
+        rows = self.paper_rows(paper_ids)
+        years = np.asarray(self.years)[np.maximum(rows, 0)] if len(self.years) else np.zeros(len(rows), np.int16)
+        return np.where(rows >= 0, years, UNKNOWN_YEAR).astype(np.int16)
+
+    def year(self, paper_id):
+        year = int(self.years_of([paper_id])[0])
+        return None if year == UNKNOWN_YEAR else year
+
+    def year_counts(self):
+        """
+        Number of papers published in every known year.
+        """
+        years = np.asarray(self.years)
+        values, counts = np.unique(years[years != UNKNOWN_YEAR], return_counts=True)
+        return dict(zip(values.tolist(), counts.tolist()))
+
+    # Authors and communities
+
+    def author_rows_of(self, paper_row):
+        return self.author_indices[self.author_indptr[paper_row]:self.author_indptr[paper_row + 1]]
+
+    def authors(self, paper_id):
+        """
+        Author IDs of a paper, in file order; empty for unknown papers.
+        """
+        row = self.paper_row(paper_id)
+        if row < 0:
+            return []
+        return [self.author_ids[a].decode() for a in self.author_rows_of(row)]
+
+    def community(self, author_id):
+        row = int(_lookup(self.author_ids, [author_id])[0])
+        if row < 0 or self.author_community[row] == NO_COMMUNITY:
+            return None
+        return int(self.author_community[row])
+
+    def paper_communities(self, paper_row):
+        """
+        Set of known communities of the authors of a paper row.
+        """
+        communities = self.author_community[self.author_rows_of(paper_row)]
+        return set(communities[communities != NO_COMMUNITY].tolist())
+
+    # Plain dicts, built in bulk from the arrays
+
+    def year_dict(self):
+        """
+        paper ID -> year string, like adjust_edge_weight.generate_year_dictionary.
+        """
+        years = np.asarray(self.years)
+        known = np.flatnonzero(years != UNKNOWN_YEAR)
+        return dict(zip(np.char.decode(np.asarray(self.paper_ids)[known]).tolist(), years[known].astype(str).tolist()))
+
+    def paper_author_dict(self):
+        """
+        paper ID -> list of author IDs, like adjust_edge_weight.generate_paper_author_dic.
+        """
+        author_ids = np.char.decode(np.asarray(self.author_ids)).tolist()
+        indptr = np.asarray(self.author_indptr).tolist()
+        indices = np.asarray(self.author_indices).tolist()
+        return {paper: [author_ids[a] for a in indices[indptr[row]:indptr[row + 1]]]
+                for row, paper in enumerate(np.char.decode(np.asarray(self.paper_ids)).tolist())
+                if indptr[row + 1] > indptr[row]}
+
+    def community_dict(self):
+        """
+        author ID -> community ID string, like adjust_edge_weight.generate_community_dic.
+        """
+        communities = np.asarray(self.author_community)
+        known = np.flatnonzero(communities != NO_COMMUNITY)
+        return dict(zip(np.char.decode(np.asarray(self.author_ids)[known]).tolist(),
+                        communities[known].astype(str).tolist()))
+
+    # dict-compatible views, for one-off lookups
+
+    def year_mapping(self):
+        """
+        paper ID -> year string, like adjust_edge_weight.generate_year_dictionary.
+        """
+        return _StoreMapping(self.paper_ids, lambda row: str(int(self.years[row])),
+                             lambda row: self.years[row] != UNKNOWN_YEAR)
+
+    def paper_author_mapping(self):
+        """
+        paper ID -> list of author IDs, like adjust_edge_weight.generate_paper_author_dic.
+        """
+        return _StoreMapping(self.paper_ids,
+                             lambda row: [self.author_ids[a].decode() for a in self.author_rows_of(row)],
+                             lambda row: self.author_indptr[row + 1] > self.author_indptr[row])
+
+    def community_mapping(self):
+        """
+        author ID -> community ID string, like adjust_edge_weight.generate_community_dic.
+        """
+        return _StoreMapping(self.author_ids, lambda row: str(int(self.author_community[row])),
+                             lambda row: self.author_community[row] != NO_COMMUNITY)
+
+
+class _StoreMapping(Mapping):
+    """
+    Read-only mapping from the IDs of a sorted table to values computed from their row.
+    """
+
+    def __init__(self, table, value, present):
+        self._table = table
+        self._value = value
+        self._present = present
+
+    def _row(self, key):
+        if not isinstance(key, str):
+            return -1
+        row = int(_lookup(self._table, [key])[0])
+        return row if row >= 0 and self._present(row) else -1
+
+    def __getitem__(self, key):
+        row = self._row(key)
+        if row < 0:
+            raise KeyError(key)
+        return self._value(row)
+
+    def __contains__(self, key):
+        return self._row(key) >= 0
+
+    def __iter__(self):
+        for row in range(len(self._table)):
+            if self._present(row):
+                yield self._table[row].decode()
+
+    def __len__(self):
+        return sum(1 for row in range(len(self._table)) if self._present(row))
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) != 5:
+        print("Usage: python -m data_preparation.metadata_store <paper_ids> <paper_author> <communities> <output_dir>")
+        sys.exit(1)
+    store = build_metadata_store(*sys.argv[1:])
+    print(f"Metadata store with {len(store)} papers written to {sys.argv[4]}")
@@ -1,26 +1,26 @@
 import os
 import random
-import networkx as nx
+import tempfile
 import numpy as np
-from node2vec import Node2Vec
-from sklearn.metrics.pairwise import cosine_similarity
+from experiments.tracing import NULL_TRACER
+from experiments.csr_graph import save_networkx_csr
+from experiments.out_of_core import iter_walk_shards, NO_NODE
+from experiments.reranking import rerank, in_degree_array
+from experiments.recommendation_store import RecommendationStore, is_recommendation_store, write_results
+from experiments.similarity_search import (
+    normalize_embeddings,
+    top_k_similar,
+    build_citation_mask,
+    build_year_array,
+)
+
+
+def load_citation_graph(input_file):
+    """
+    Load an unweighted citation network ("citing ==> cited" per line) into a directed graph.
+    """
+    import networkx as nx
 
-def run_citation_recommender(
-    input_file="data/2014/networks/paper_citation_network.txt",
-    output_file="experiments/results/baseline_top10_with_similarity.txt",
-    num_samples=1000,
-    embedding_dim=64,
-    walk_length=10,
-    num_walks=100,
-    p=0.1,
-    q=2,
-    workers=4,
-    seed=42
-):
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
-    print("Step 1: Loading the graph...")
     G = nx.DiGraph()
     with open(input_file, 'r', encoding='utf-8') as f:
         for line in f:
@@ -29,18 +29,65 @@ def run_citation_recommender(
                 src = src.strip()
                 dst = dst.strip()
                 G.add_edge(src, dst)
+    return G
 
-    print(f"Total nodes in the graph: {len(G.nodes())}")
-    print(f"Total edges in the graph: {len(G.edges())}")
 
-    print("Step 2: Sampling nodes...")
+def load_weighted_citation_graph(input_file):
+    """
+    Load a weighted citation network ("citing ==> cited weight" per line) into a directed graph.
+    """
+    import networkx as nx
+
+    G = nx.DiGraph()
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if "==>" in line:
+                parts = line.split()
+                if len(parts) < 4:
+                    continue
+                src = parts[0].strip()
+                dst = parts[2].strip()
+                weight = float(parts[3])
+                G.add_edge(src, dst, weight=weight)
+    return G
+
+
+def load_sampled_nodes(baseline_file):
+    """
+    Read the query nodes of a previous recommendation file or store, in file order.
+    """
+    if is_recommendation_store(baseline_file):
+        store = RecommendationStore.load(baseline_file)
+        return [store.node_ids[row] for row in store.queries]
+    sampled_nodes = []
+    with open(baseline_file, 'r', encoding='utf-8') as sf:
+        for line in sf:
+            line = line.strip()
+            if "==>" in line:
+                node, _ = line.split("==>")
+                node = node.strip()
+                sampled_nodes.append(node)
+    return sampled_nodes
+
+
+def sample_nodes(G, num_samples, seed=42):
+    """
+    Sample query nodes uniformly from the graph, reproducibly for a given seed.
+    """
     all_nodes = list(G.nodes())
     random.seed(seed)
-    sampled_nodes = random.sample(all_nodes, min(num_samples, len(all_nodes)))
-    print("Sampled nodes count:", len(sampled_nodes))
+    return random.sample(all_nodes, min(num_samples, len(all_nodes)))
 
-    print("Step 3: Generating node2vec embeddings...")
-    node2vec = Node2Vec(
+
+def generate_walks(G, embedding_dim=64, walk_length=10, num_walks=100, p=0.1, q=2, workers=4):
+    """
+    Precompute the node2vec transition probabilities and random walks of a graph.
+    The walks are available as ``.walks`` on the returned Node2Vec object.
+    """
+    from node2vec import Node2Vec
+
+    return Node2Vec(
         G,
         dimensions=embedding_dim,
         walk_length=walk_length,
@@ -50,39 +97,231 @@ def run_citation_recommender(
         workers=workers
     )
 
-    print("Fitting the model...")
-    model = node2vec.fit(window=10, min_count=1, batch_words=4)
-    print("Model training completed.")
 
-    print("Extracting embeddings...")
+def generate_sharded_walks(G, walk_length=10, num_walks=100, p=0.1, q=2, workers=4, seed=42,
+                           weighted=False, shard_nodes=2048):
+    """
+    Generate node2vec walks in start-node shards, each with its own RNG stream derived from
+    the seed. The walks only depend on the seed and shard_nodes, not on the number of workers.
+    Returns the walks as lists of node IDs.
+    """
+    with tempfile.TemporaryDirectory() as csr_dir:
+        graph = save_networkx_csr(G, csr_dir, weighted=weighted)
+        walks = []
+        for shard in iter_walk_shards(graph, num_walks, walk_length, p, q, shard_nodes, seed, processes=workers):
+            walks.extend([graph.node_ids[node] for node in walk if node != NO_NODE] for walk in shard)
+    return walks
+
+
+def fit_embedding_model(node2vec):
+    """
+    Fit the skip-gram model on the precomputed node2vec walks.
+    """
+    return node2vec.fit(window=10, min_count=1, batch_words=4)
+
+
+def fit_walks(walks, embedding_dim=64, seed=42, workers=1):
+    """
+    Fit the skip-gram model on a list of walks with the settings of fit_embedding_model.
+    With a single worker and a fixed PYTHONHASHSEED, the result is reproducible.
+    """
+    from gensim.models import Word2Vec
+    return Word2Vec(walks, vector_size=embedding_dim, window=10, min_count=1, batch_words=4, sg=1,
+                    workers=workers, seed=seed)
+
+
+def extract_embeddings(model):
+    """
+    Extract the node list, embedding matrix and node -> row index mapping of a fitted model.
+    """
     node_list = model.wv.index_to_key
     embeddings = np.array([model.wv[node] for node in node_list])
     node_to_idx = {node: idx for idx, node in enumerate(node_list)}
+    return node_list, embeddings, node_to_idx
+
+
+def save_embeddings(directory, node_list, embeddings, model=None):
+    """
+    Store an embedding matrix as embeddings.npy and its row order as node_ids.txt.
+    If the fitted model is given it is saved as word2vec.model, so training can be resumed.
+    """
+    os.makedirs(directory, exist_ok=True)
+    if model is not None:
+        model.save(os.path.join(directory, "word2vec.model"))
+    np.save(os.path.join(directory, "embeddings.npy"), embeddings)
+    with open(os.path.join(directory, "node_ids.txt"), 'w', encoding='utf-8') as f:
+        for node in node_list:
+            f.write(f"{node}\n")
+
+
+def load_embeddings(directory):
+    """
+    Load embeddings stored by save_embeddings.
+    Returns the node list, embedding matrix and node -> row index mapping.
+    """
+    embeddings = np.load(os.path.join(directory, "embeddings.npy"))
+    with open(os.path.join(directory, "node_ids.txt"), 'r', encoding='utf-8') as f:
+        node_list = [line.rstrip("\n") for line in f]
+    node_to_idx = {node: idx for idx, node in enumerate(node_list)}
+    return node_list, embeddings, node_to_idx
+
+
+def write_recommendations(output_file, sampled_nodes, node_list, embeddings, node_to_idx, top_k=10,
+                          exclude_mask=None, years=None, in_degree=None, rerank_candidates=None,
+                          popularity_penalty=0.0, diversity=0.0, output_format="text"):
+    """
+    Write the top-k most similar nodes of every sampled node to the output file.
+    Format: Node ==> Rec1:sim1, Rec2:sim2, ...
+    With output_format "binary", output_file is a recommendation store directory
+    (see recommendation_store.py) holding int32 IDs and float32 similarities instead.
+
+    exclude_mask and years filter candidates inside the similarity search,
+    see similarity_search.top_k_similar. With rerank_candidates set, the top
+    rerank_candidates nodes are retrieved and re-ranked by reranking.rerank
+    using in_degree, popularity_penalty and diversity.
+    """
+    # Node might not have embedding if isolated or removed
+    query_nodes = [node for node in sampled_nodes if node in node_to_idx]
+    normalized = normalize_embeddings(embeddings, dtype=np.float64)
+    query_rows = [node_to_idx[node] for node in query_nodes]
+    if rerank_candidates:
+        candidates, candidate_similarities = top_k_similar(normalized, query_rows, max(rerank_candidates, top_k),
+                                                           exclude_mask=exclude_mask, years=years)
+        indices, similarities = rerank(candidates, candidate_similarities, in_degree, top_k,
+                                       popularity_penalty, diversity, normalized)
+    else:
+        indices, similarities = top_k_similar(normalized, query_rows, top_k, exclude_mask=exclude_mask, years=years)
+
+    write_results(output_file, node_list, query_rows, indices, similarities, output_format)
+
+
+def build_candidate_filters(G, node_list, node_to_idx, exclude_cited=False, exclude_future=False,
+                            paper_ids_file=None, metadata_dir=None):
+    """
+    Build the exclude_mask and years arguments of write_recommendations.
+    exclude_future needs the publication years, either from a metadata store (metadata_dir)
+    or from paper_ids_file, the tab-separated "id, title, year" publication file.
+    """
+    exclude_mask = build_citation_mask(G, node_to_idx) if exclude_cited else None
+    years = None
+    if exclude_future:
+        if metadata_dir is not None:
+            from data_preparation.metadata_store import PaperMetadata
+            years = PaperMetadata.load(metadata_dir).years_of(node_list)
+        elif paper_ids_file is not None:
+            from weight_reaccessment_of_edges.adjust_edge_weight import generate_year_dictionary
+            years = build_year_array(node_list, generate_year_dictionary(paper_ids_file))
+        else:
+            raise ValueError("exclude_future requires metadata_dir or paper_ids_file")
+    return exclude_mask, years
+
+
+def train_embeddings(G, embedding_dim, walk_length, num_walks, p, q, workers, seed, tracer, walk_backend, weighted):
+    """
+    Generate walks with the chosen backend and fit the skip-gram model.
+
+    walk_backend "node2vec" uses the node2vec package; "sharded" uses generate_sharded_walks,
+    whose walks are identical for any number of workers, and trains with a single thread.
+    """
+    if walk_backend not in ("node2vec", "sharded"):
+        raise ValueError(f"Unknown walk backend {walk_backend!r}; expected 'node2vec' or 'sharded'")
+
+    with tracer.span("walk_precompute") as span:
+        if walk_backend == "sharded":
+            walks = generate_sharded_walks(G, walk_length, num_walks, p, q, workers, seed, weighted)
+        else:
+            node2vec = generate_walks(G, embedding_dim, walk_length, num_walks, p, q, workers)
+            walks = node2vec.walks
+        span.count("walks_generated", len(walks))
+
+    print("Fitting the model...")
+    with tracer.span("fit"):
+        if walk_backend == "sharded":
+            model = fit_walks(walks, embedding_dim, seed)
+        else:
+            model = fit_embedding_model(node2vec)
+    print("Model training completed.")
+    return model
+
+
+def embed_graph(G, embedding_dim, walk_length, num_walks, p, q, workers, seed, tracer, walk_backend, weighted):
+    """
+    Embed every node of G and return (node_list, embeddings, node_to_idx).
+
+    walk_backend "netmf" factorizes the walk co-occurrence matrix (see netmf.py) instead of
+    sampling walks; it ignores walk_length, num_walks, p and q. Other backends go through
+    train_embeddings and extract_embeddings.
+    """
+    if walk_backend == "netmf":
+        from experiments.netmf import netmf_from_networkx
+        with tracer.span("fit") as span:
+            node_list, embeddings, node_to_idx = netmf_from_networkx(G, embedding_dim, weighted=weighted, seed=seed)
+            span.count("embeddings", len(node_list))
+        return node_list, embeddings, node_to_idx
+
+    model = train_embeddings(G, embedding_dim, walk_length, num_walks, p, q, workers, seed, tracer,
+                             walk_backend, weighted)
+    print("Extracting embeddings...")
+    with tracer.span("extract") as span:
+        node_list, embeddings, node_to_idx = extract_embeddings(model)
+        span.count("embeddings", len(node_list))
+    return node_list, embeddings, node_to_idx
+
+
+def run_citation_recommender(
+    input_file="data/2014/networks/paper_citation_network.txt",
+    output_file="experiments/results/baseline_top10_with_similarity.txt",
+    num_samples=1000,
+    embedding_dim=64,
+    walk_length=10,
+    num_walks=100,
+    p=0.1,
+    q=2,
+    workers=4,
+    seed=42,
+    tracer=NULL_TRACER,
+    walk_backend="sharded",
+    exclude_cited=False,
+    exclude_future=False,
+    paper_ids_file=None,
+    metadata_dir=None,
+    rerank_candidates=None,
+    popularity_penalty=0.0,
+    diversity=0.0,
+    output_format="text"
+):
+    # Ensure output directory exists
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+    
+    print("Step 1: Loading the graph...")
+    with tracer.span("load") as span:
+        G = load_citation_graph(input_file)
+        span.count("edges_parsed", G.number_of_edges())
+        span.count("nodes", G.number_of_nodes())
+
+    print(f"Total nodes in the graph: {len(G.nodes())}")
+    print(f"Total edges in the graph: {len(G.edges())}")
+
+    print("Step 2: Sampling nodes...")
+    with tracer.span("sample") as span:
+        sampled_nodes = sample_nodes(G, num_samples, seed)
+        span.count("sampled_nodes", len(sampled_nodes))
+    print("Sampled nodes count:", len(sampled_nodes))
+
+    print("Step 3: Generating node2vec embeddings...")
+    node_list, embeddings, node_to_idx = embed_graph(G, embedding_dim, walk_length, num_walks, p, q, workers, seed,
+                                                     tracer, walk_backend, weighted=False)
 
     print("Step 4: Generating recommendations...")
-    with open(output_file, 'w', encoding='utf-8') as out:
-        for i, node in enumerate(sampled_nodes):
-            if i % 100 == 0 and i > 0:
-                print(f"Processed {i} out of {len(sampled_nodes)} sampled nodes...")
-            
-            if node not in node_to_idx:
-                continue
-                
-            node_vec = embeddings[node_to_idx[node]].reshape(1, -1)
-            # Compute similarity to all other nodes
-            sim = cosine_similarity(node_vec, embeddings).flatten()
-            
-            # Exclude the node itself
-            sim_indices = np.argsort(-sim)
-            sim_indices = [idx for idx in sim_indices if node_list[idx] != node]
-            
-            top_10_indices = sim_indices[:10]
-            # Pair recommendations with their similarities
-            top_10_recommendations = [(node_list[idx], sim[idx]) for idx in top_10_indices]
-            
-            # Format: Node ==> Rec1:sim1, Rec2:sim2, ...
-            rec_str = ", ".join([f"{rec_node}:{similarity:.4f}" for rec_node, similarity in top_10_recommendations])
-            out.write(f"{node} ==> {rec_str}\n")
+    with tracer.span("recommend") as span:
+        exclude_mask, years = build_candidate_filters(G, node_list, node_to_idx, exclude_cited, exclude_future,
+                                                      paper_ids_file, metadata_dir)
+        in_degree = in_degree_array(G, node_list) if rerank_candidates else None
+        write_recommendations(output_file, sampled_nodes, node_list, embeddings, node_to_idx,
+                              exclude_mask=exclude_mask, years=years, in_degree=in_degree,
+                              rerank_candidates=rerank_candidates, popularity_penalty=popularity_penalty,
+                              diversity=diversity, output_format=output_format)
+        span.count("queries", len(sampled_nodes))
 
     print(f"Recommendations stored in {output_file}")
 
@@ -97,37 +336,34 @@ def run_citation_recommender_with_weights(
     p=0.1,
     q=2,
     workers=4,
-    seed=42
+    seed=42,
+    tracer=NULL_TRACER,
+    walk_backend="sharded",
+    exclude_cited=False,
+    exclude_future=False,
+    paper_ids_file=None,
+    metadata_dir=None,
+    rerank_candidates=None,
+    popularity_penalty=0.0,
+    diversity=0.0,
+    output_format="text"
 ):
     # Ensure output directory exists
     os.makedirs(os.path.dirname(output_file), exist_ok=True)
     
     # Step 1: Load previously sampled nodes from the baseline file
     print("Loading previously sampled nodes from baseline file...")
-    sampled_nodes = []
-    with open(baseline_file, 'r', encoding='utf-8') as sf:
-        for line in sf:
-            line = line.strip()
-            if "==>" in line:
-                node, _ = line.split("==>")
-                node = node.strip()
-                sampled_nodes.append(node)
+    with tracer.span("sample") as span:
+        sampled_nodes = load_sampled_nodes(baseline_file)
+        span.count("sampled_nodes", len(sampled_nodes))
     print(f"Loaded {len(sampled_nodes)} previously sampled nodes.")
 
     # Step 2: Load the weighted graph
     print("Loading the weighted graph...")
-    G = nx.DiGraph()
-    with open(input_file, 'r', encoding='utf-8') as f:
-        for line in f:
-            line = line.strip()
-            if "==>" in line:
-                parts = line.split()
-                if len(parts) < 4:
-                    continue
-                src = parts[0].strip()
-                dst = parts[2].strip()
-                weight = float(parts[3])
-                G.add_edge(src, dst, weight=weight)
+    with tracer.span("load") as span:
+        G = load_weighted_citation_graph(input_file)
+        span.count("edges_parsed", G.number_of_edges())
+        span.count("nodes", G.number_of_nodes())
 
     print(f"Total nodes in the graph: {len(G.nodes())}")
     print(f"Total edges in the graph: {len(G.edges())}")
@@ -140,55 +376,24 @@ def run_citation_recommender_with_weights(
     random.seed(seed)
     np.random.seed(seed)
     print("Generating node2vec embeddings")
-    node2vec = Node2Vec(
-        G,
-        dimensions=embedding_dim,
-        walk_length=walk_length,
-        num_walks=num_walks,
-        p=p,
-        q=q,
-        workers=workers
-    )
-
-    print("Fitting the model...")
-    model = node2vec.fit(window=10, min_count=1, batch_words=4)
-    print("Model training completed.")
-
-    print("Extracting embeddings...")
-    node_list = model.wv.index_to_key
-    embeddings = np.array([model.wv[node] for node in node_list])
-    node_to_idx = {node: idx for idx, node in enumerate(node_list)}
+    node_list, embeddings, node_to_idx = embed_graph(G, embedding_dim, walk_length, num_walks, p, q, workers, seed,
+                                                     tracer, walk_backend, weighted=True)
 
     # Step 4: Generating top 10 recommendations with similarities
     print("Generating top 10 recommendations with similarities...")
-    with open(output_file, 'w', encoding='utf-8') as out:
-        for i, node in enumerate(sampled_nodes):
-            if i % 100 == 0 and i > 0:
-                print(f"Processed {i} out of {len(sampled_nodes)} sampled nodes...")
-
-            if node not in node_to_idx:
-                # Node might not have embedding if isolated or removed
-                continue
-
-            node_vec = embeddings[node_to_idx[node]].reshape(1, -1)
-            sim = cosine_similarity(node_vec, embeddings).flatten()
-
-            # Exclude the node itself
-            sim_indices = np.argsort(-sim)
-            sim_indices = [idx for idx in sim_indices if node_list[idx] != node]
-
-            # Take top 10 recommendations
-            top_10_indices = sim_indices[:10]
-            top_10_recommendations = [(node_list[idx], sim[idx]) for idx in top_10_indices]
-
-            # Format: Node ==> Rec1:sim1, Rec2:sim2, ...
-            rec_str = ", ".join([f"{rec_node}:{similarity:.4f}" for rec_node, similarity in top_10_recommendations])
-            out.write(f"{node} ==> {rec_str}\n")
+    with tracer.span("recommend") as span:
+        exclude_mask, years = build_candidate_filters(G, node_list, node_to_idx, exclude_cited, exclude_future,
+                                                      paper_ids_file, metadata_dir)
+        in_degree = in_degree_array(G, node_list) if rerank_candidates else None
+        write_recommendations(output_file, sampled_nodes, node_list, embeddings, node_to_idx,
+                              exclude_mask=exclude_mask, years=years, in_degree=in_degree,
+                              rerank_candidates=rerank_candidates, popularity_penalty=popularity_penalty,
+                              diversity=diversity, output_format=output_format)
+        span.count("queries", len(sampled_nodes))
 
     print(f"Recommendations stored in {output_file}")
 
 
-
 if __name__ == '__main__':
     run_citation_recommender(num_samples=100, num_walks=20, p=0.25, q=0.25, output_file="experiments/results/baseline_top10_p=0.25_q=0.25.txt")
     run_citation_recommender(num_samples=100, num_walks=20, p=0.5, q=0.25, output_file="experiments/results/baseline_top10_p=0.5_q=0.25.txt")
@@ -0,0 +1,194 @@
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import scipy.sparse as sp
+
+from experiments.csr_graph import build_csr_files, select_query_rows
+from experiments.recommendation_store import write_results
+
+"""
+Co-citation and bibliographic-coupling recommender.
+
+With C the citing x cited matrix (edge weights, or 1 per citation), two papers are
+- co-cited when later papers cite both: (C^T C)_ij counts the papers citing i and j,
+- bibliographically coupled when they share references: (C C^T)_ij counts common references.
+Both scores are S = L L^T for L = C^T (co-citation), L = C (coupling) or L = [C, C^T] (both).
+Raw counts can be normalized by the self-similarities n_i = S_ii:
+- cosine: S_ij / sqrt(n_i n_j),
+- jaccard: S_ij / (n_i + n_j - S_ij), exact for unweighted graphs.
+
+Query rows are processed in blocks of L[Q] @ L^T. The block size follows the number of
+entries the product can produce, so a hub paper with thousands of citations is computed in a
+small block of its own, and only the top k entries of every row are kept before the next
+block. No training step is involved; the output has the format of run_citation_recommender.
+
+Run from the repository root:
+    python -m experiments.cocitation_recommender data/2014/networks/paper_citation_network.txt \
+        experiments/results/cocitation_top10.txt --measure both --normalization cosine
+"""
+
+MEASURES = ("cocitation", "coupling", "both")
+NORMALIZATIONS = ("none", "cosine", "jaccard")
+
+
+def citation_matrix(graph, weighted=False):
+    """
+    The N x N citing x cited matrix of a CSRGraph, with edge weights if weighted.
+    """
+    n = graph.num_nodes
+    use_weights = weighted and graph.weights is not None
+    data = np.asarray(graph.weights, dtype=np.float32) if use_weights else np.ones(graph.num_edges, dtype=np.float32)
+    return sp.csr_matrix((data, np.asarray(graph.indices), np.asarray(graph.indptr)), shape=(n, n))
+
+
+def similarity_factor(C, measure="both"):
+    """
+    The matrix L with S = L L^T for the chosen measure.
+    """
+    if measure == "cocitation":
+        return C.T.tocsr()
+    if measure == "coupling":
+        return C.tocsr()
+    if measure == "both":
+        return sp.hstack([C, C.T]).tocsr()
+    raise ValueError(f"Unknown measure {measure!r}; expected one of {', '.join(MEASURES)}")
+
+
+def _row_top_k(block, k):
+    """
+    Top-k columns and values of every row of a CSR block, best first; -1 / 0 where a row has
+    fewer than k entries.
+    """
+    num_rows = block.shape[0]
+    indices = np.full((num_rows, k), -1, dtype=np.int64)
+    scores = np.zeros((num_rows, k), dtype=np.float32)
+    rows = np.repeat(np.arange(num_rows), np.diff(block.indptr))
+    # Sort every row's entries by descending score, ties by column
+    order = np.lexsort((block.indices, -block.data, rows))
+    rows, cols, values = rows[order], block.indices[order], block.data[order]
+    rank = np.arange(len(rows)) - np.repeat(block.indptr[:-1], np.diff(block.indptr))
+    keep = rank < k
+    indices[rows[keep], rank[keep]] = cols[keep]
+    scores[rows[keep], rank[keep]] = values[keep]
+    return indices, scores
+
+
+def cocitation_top_k(L, query_rows, k=10, normalization="cosine", max_block_entries=10_000_000,
+                     exclude_mask=None):
+    """
+    Top-k rows of S = L L^T for every query row, excluding the query itself.
+
+    Parameters:
+    - L (sp.csr_matrix): Factor from similarity_factor.
+    - query_rows (array-like): Query rows.
+    - k (int): Recommendations per query (default: 10).
+    - normalization (str): "none", "cosine" or "jaccard" (default: "cosine").
+    - max_block_entries (int): Bound on the product entries computed per block (default: 10,000,000).
+    - exclude_mask (sp.csr_matrix): N x N matrix whose nonzero (i, j) entries exclude j from the
+      results of query i, e.g. the citation matrix (default: None).
+
+    Returns:
+    - indices (np.ndarray): (n, k) recommended rows, -1 where fewer than k papers share a citation.
+    - scores (np.ndarray): (n, k) float32 scores.
+    """
+    if normalization not in NORMALIZATIONS:
+        raise ValueError(f"Unknown normalization {normalization!r}; expected one of {', '.join(NORMALIZATIONS)}")
+    query_rows = np.asarray(query_rows, dtype=np.int64)
+    LT = L.T.tocsr()
+    self_similarity = np.asarray(L.multiply(L).sum(axis=1)).ravel()
+
+    # Entries produced by row i of L @ L^T: the column counts of L over row i's columns
+    column_counts = np.diff(LT.indptr)
+    cumulative = np.concatenate([[0], np.cumsum(column_counts[L.indices])])
+    work = cumulative[L.indptr[query_rows + 1]] - cumulative[L.indptr[query_rows]]
+    # work_before[i]: estimated entries of the queries before i, computed once for all blocks
+    work_before = np.concatenate([[0], np.cumsum(work)])
+
+    indices = np.full((len(query_rows), k), -1, dtype=np.int64)
+    scores = np.zeros((len(query_rows), k), dtype=np.float32)
+    start = 0
+    while start < len(query_rows):
+        # Grow the block until its estimated product size reaches max_block_entries
+        # (always at least one query)
+        end = int(np.searchsorted(work_before, work_before[start] + max_block_entries))
+        stop = max(start + 1, end - 1)
+        block_rows = query_rows[start:stop]
+        block = (L[block_rows] @ LT).tocsr()
+        block.sum_duplicates()
+
+        rows = np.repeat(np.arange(len(block_rows)), np.diff(block.indptr))
+        cols = block.indices
+        if normalization == "cosine":
+            block.data = block.data / np.sqrt(self_similarity[block_rows][rows] * self_similarity[cols])
+        elif normalization == "jaccard":
+            block.data = block.data / (self_similarity[block_rows][rows] + self_similarity[cols] - block.data)
+        drop = cols == block_rows[rows]
+        if exclude_mask is not None:
+            drop |= np.asarray(exclude_mask[block_rows[rows], cols]).ravel() != 0
+        block.data[drop] = 0
+        block.eliminate_zeros()
+
+        indices[start:stop], scores[start:stop] = _row_top_k(block, k)
+        start = stop
+        print(f"Processed {start} out of {len(query_rows)} query papers...")
+    return indices, scores
+
+
+def run_cocitation_recommender(
+    input_file="data/2014/networks/paper_citation_network.txt",
+    output_file="experiments/results/cocitation_top10_with_similarity.txt",
+    measure="both",
+    normalization="cosine",
+    weighted=False,
+    baseline_file=None,
+    num_samples=1000,
+    top_k=10,
+    exclude_cited=False,
+    max_block_entries=10_000_000,
+    seed=42,
+    output_format="text"
+):
+    """
+    Write co-citation / bibliographic-coupling recommendations in the format of
+    run_citation_recommender. With weighted=True the input is a reweighted network
+    ("citing ==> cited weight") and its weights enter the products.
+    """
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    with tempfile.TemporaryDirectory() as csr_dir:
+        print("Step 1: Building the CSR graph...")
+        graph = build_csr_files(input_file, csr_dir, weighted=weighted)
+        print(f"Total nodes in the graph: {graph.num_nodes}")
+        print(f"Total edges in the graph: {graph.num_edges}")
+
+        print("Step 2: Selecting query papers...")
+        query_rows = select_query_rows(graph, num_samples, seed, baseline_file)
+        print("Sampled nodes count:", len(query_rows))
+
+        print(f"Step 3: Computing {measure} similarities...")
+        C = citation_matrix(graph, weighted)
+        indices, scores = cocitation_top_k(similarity_factor(C, measure), query_rows, top_k, normalization,
+                                           max_block_entries, exclude_mask=C if exclude_cited else None)
+        write_results(output_file, graph.node_ids, query_rows, indices, scores, output_format)
+    print(f"Recommendations stored in {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recommend papers by co-citation and bibliographic coupling.")
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument("--measure", choices=MEASURES, default="both")
+    parser.add_argument("--normalization", choices=NORMALIZATIONS, default="cosine")
+    parser.add_argument("--weighted", action="store_true")
+    parser.add_argument("--baseline-file", help="Recommendation file whose query papers are reused.")
+    parser.add_argument("--num-samples", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--exclude-cited", action="store_true")
+    parser.add_argument("--max-block-entries", type=int, default=10_000_000)
+    parser.add_argument("--output-format", choices=["text", "binary"], default="text")
+    args = parser.parse_args()
+
+    run_cocitation_recommender(args.input_file, args.output_file, args.measure, args.normalization, args.weighted,
+                               args.baseline_file, args.num_samples, args.top_k, args.exclude_cited,
+                               args.max_block_entries, output_format=args.output_format)
@@ -0,0 +1,193 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from experiments.csr_graph import parse_edge_line
+
+"""
+Cold-start embeddings for new papers from the embeddings of the papers they cite.
+
+A newly ingested paper has no node2vec vector until the next retrain. Its references do, so
+its vector is estimated as the weighted mean of the vectors of the papers it cites:
+
+    z_new = sum_j w_j e_j / sum_j w_j.
+
+The weights default to 1; with weight_fn=adjust_edge_weight.reference_weight they follow the
+time decay and community boost of the reweighted network. New papers citing other new papers
+are solved by propagation rounds: every round recomputes all new vectors from the previous
+round's, until they stop changing, so a chain of new papers ends up with the same vectors as
+if it were processed in citation order. Each round is one sparse-matrix product over the
+batch, so a batch takes milliseconds and the extended embedding set can be searched right
+away with write_recommendations / top_k_similar.
+
+Run from the repository root:
+    python -m experiments.cold_start experiments/embeddings/baseline new_citations.txt \
+        experiments/results/new_paper_recommendations.txt --output-dir experiments/embeddings/cold_start
+"""
+
+
+def read_new_citations(input_file, weighted=False):
+    """
+    Read "citing ==> cited" lines (with a weight column if weighted) into (citing, cited, weight) tuples.
+    """
+    citations = []
+    with open(input_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            edge = parse_edge_line(line, weighted)
+            if edge is not None:
+                citations.append(edge)
+    return citations
+
+
+def reference_matrix(citations, node_to_idx, weight_fn=None):
+    """
+    Weighted reference matrix of the papers without an embedding.
+
+    Parameters:
+    - citations (list): (citing, cited, weight) tuples, e.g. from read_new_citations.
+    - node_to_idx (dict): Embedding row of every known paper.
+    - weight_fn (callable): weight_fn(citing, cited) replacing the citation weights (default: None).
+
+    Returns:
+    - new_nodes (list): Citing papers without an embedding, in order of first appearance.
+    - references (sp.csr_matrix): (len(new_nodes), N + len(new_nodes)) reference weights. Columns
+      N + i stand for new_nodes[i]; citations of papers that are neither known nor new are dropped.
+    """
+    num_known = len(node_to_idx)
+    new_index = {}
+    for citing, _, _ in citations:
+        if citing not in node_to_idx and citing not in new_index:
+            new_index[citing] = len(new_index)
+
+    rows, cols, weights = [], [], []
+    for citing, cited, weight in citations:
+        if citing not in new_index:
+            continue
+        col = node_to_idx.get(cited)
+        if col is None:
+            col = new_index.get(cited)
+            if col is None:
+                continue
+            col += num_known
+        rows.append(new_index[citing])
+        cols.append(col)
+        weights.append(weight_fn(citing, cited) if weight_fn is not None else weight)
+    shape = (len(new_index), num_known + len(new_index))
+    references = sp.csr_matrix((np.asarray(weights, dtype=np.float64), (rows, cols)), shape=shape)
+    return list(new_index), references
+
+
+def cold_start_embeddings(embeddings, node_to_idx, citations, weight_fn=None, rounds=None, tol=1e-6):
+    """
+    Estimate embeddings of the new papers in citations from the papers they cite.
+
+    Parameters:
+    - embeddings (np.ndarray): Embedding matrix of the known papers (N x d).
+    - node_to_idx (dict): Embedding row of every known paper.
+    - citations (list): (citing, cited, weight) tuples of the new papers.
+    - weight_fn (callable): weight_fn(citing, cited), e.g. adjust_edge_weight.reference_weight (default: None).
+    - rounds (int): Maximum number of propagation rounds (default: None, until convergence).
+      Round r reaches new papers r citation steps away from a known paper, so rounds bounds both
+      reach and accuracy: deeper papers are skipped, and papers whose new references are still
+      changing keep an estimate from before the last round.
+    - tol (float): Largest change of any vector below which propagation stops (default: 1e-6).
+
+    Returns:
+    - new_nodes (list): IDs of the new papers that received an embedding.
+    - new_embeddings (np.ndarray): Their float32 embeddings (len(new_nodes) x d).
+    - skipped (list): New papers none of whose references could be reached.
+    """
+    candidates, references = reference_matrix(citations, node_to_idx, weight_fn)
+    num_known = embeddings.shape[0]
+    combined = np.zeros((num_known + len(candidates), embeddings.shape[1]), dtype=np.float64)
+    combined[:num_known] = embeddings
+    has_vector = np.zeros(len(combined), dtype=np.float64)
+    has_vector[:num_known] = 1
+
+    # Every round either reaches a new paper or moves the vectors of a chain one step closer to
+    # its fixed point; an acyclic batch is exact after at most len(candidates) + 1 rounds
+    max_rounds = rounds if rounds is not None else len(candidates) + 1
+    for _ in range(max_rounds):
+        weight_sum = references @ has_vector
+        reached = weight_sum > 0
+        updated = (references[reached] @ combined) / weight_sum[reached, None]
+        change = np.abs(updated - combined[num_known:][reached]).max() if reached.any() else 0.0
+        grew = reached.sum() > has_vector[num_known:].sum()
+        combined[num_known:][reached] = updated
+        has_vector[num_known:] = reached
+        if not grew and change <= tol:
+            break
+
+    reached = has_vector[num_known:] > 0
+    new_nodes = [node for node, ok in zip(candidates, reached) if ok]
+    skipped = [node for node, ok in zip(candidates, reached) if not ok]
+    return new_nodes, combined[num_known:][reached].astype(np.float32), skipped
+
+
+def extend_embeddings(node_list, embeddings, new_nodes, new_embeddings):
+    """
+    Append new papers to an embedding set; returns (node_list, embeddings, node_to_idx).
+    """
+    node_list = list(node_list) + list(new_nodes)
+    embeddings = np.vstack([embeddings, new_embeddings.astype(embeddings.dtype)])
+    return node_list, embeddings, {node: idx for idx, node in enumerate(node_list)}
+
+
+def citation_mask(citations, node_to_idx):
+    """
+    Sparse N x N matrix with a 1 at (citing, cited) for every citation between embedded papers,
+    the exclude_mask of write_recommendations.
+    """
+    pairs = [(node_to_idx[citing], node_to_idx[cited]) for citing, cited, _ in citations
+             if citing in node_to_idx and cited in node_to_idx]
+    rows, cols = zip(*pairs) if pairs else ((), ())
+    n = len(node_to_idx)
+    return sp.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, n))
+
+
+if __name__ == "__main__":
+    from experiments.citation_graph_local_run import load_embeddings, save_embeddings, write_recommendations
+
+    parser = argparse.ArgumentParser(description="Embed new papers from their references and recommend for them.")
+    parser.add_argument("embeddings_dir", help="Embedding directory written by save_embeddings.")
+    parser.add_argument("citations_file", help="Citations of the new papers, 'citing ==> cited' per line.")
+    parser.add_argument("output_file", help="Recommendation file of the new papers.")
+    parser.add_argument("--weighted", action="store_true", help="The citation file has a weight column.")
+    parser.add_argument("--metadata-dir", help="Weight references by reference_weight using this metadata store.")
+    parser.add_argument("--paper-ids", help="Weight references by reference_weight using the text metadata files "
+                                            "(with --paper-author and --community-file).")
+    parser.add_argument("--paper-author")
+    parser.add_argument("--community-file")
+    parser.add_argument("--rounds", type=int, help="Maximum propagation rounds (default: until convergence).")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--output-dir", help="Store the extended embedding set here.")
+    args = parser.parse_args()
+
+    weight_fn = None
+    if args.metadata_dir or args.paper_ids:
+        from weight_reaccessment_of_edges import adjust_edge_weight
+        if args.metadata_dir:
+            adjust_edge_weight.load_weighting_data_from_store(args.metadata_dir)
+        else:
+            adjust_edge_weight.load_weighting_data(args.paper_ids, args.paper_author, args.community_file)
+        weight_fn = adjust_edge_weight.reference_weight
+
+    node_list, embeddings, node_to_idx = load_embeddings(args.embeddings_dir)
+    citations = read_new_citations(args.citations_file, args.weighted)
+    start = time.perf_counter()
+    new_nodes, new_embeddings, skipped = cold_start_embeddings(embeddings, node_to_idx, citations, weight_fn,
+                                                               args.rounds)
+    node_list, embeddings, node_to_idx = extend_embeddings(node_list, embeddings, new_nodes, new_embeddings)
+    print(f"Embedded {len(new_nodes)} new papers in {time.perf_counter() - start:.3f}s; "
+          f"{len(skipped)} without embedded references were skipped.")
+
+    os.makedirs(os.path.dirname(args.output_file) or ".", exist_ok=True)
+    write_recommendations(args.output_file, new_nodes, node_list, embeddings, node_to_idx, args.top_k,
+                          exclude_mask=citation_mask(citations, node_to_idx))
+    print(f"Recommendations stored in {args.output_file} ({time.perf_counter() - start:.3f}s)")
+    if args.output_dir:
+        save_embeddings(args.output_dir, node_list, embeddings)
+        print(f"Extended embeddings stored in {args.output_dir}")
@@ -0,0 +1,242 @@
+import json
+import os
+import random
+
+import numpy as np
+
+"""
+Memory-mapped CSR storage of citation networks.
+
+build_csr_files converts a "citing ==> cited [weight]" edge list into compressed sparse row
+arrays on disk without ever holding the edge list in memory:
+
+    indptr.npy      int64  (N + 1)   row offsets, row = citing paper
+    indices.npy     int32  (E)       cited paper of every edge, sorted within each row
+    weights.npy     float32 (E)      edge weights (weighted networks only)
+    cumweights.npy  float64 (E)      running sum of weights over all edges (weighted networks only)
+    node_ids.txt                     paper ID of every row, in order of first appearance
+    meta.json                        node/edge counts
+
+Rows are numbered in order of first appearance in the edge file, which is also the node
+order of the networkx graphs built by citation_graph_local_run. load_csr opens the arrays
+with np.load(mmap_mode="r"), so only the pages that are touched are read into memory.
+The node ID table is the exception: build_csr_files interns IDs in a dict and list, and
+load_csr reads node_ids.txt into a list, so RAM grows by O(N) Python strings (roughly
+100-150 bytes per node).
+"""
+
+EDGE_DTYPE = np.dtype([("src", np.int32), ("dst", np.int32), ("weight", np.float32)])
+
+
+class CSRGraph:
+    """
+    A directed graph in CSR form. The arrays may be memory-mapped.
+    """
+
+    def __init__(self, indptr, indices, node_ids, weights=None, cumweights=None, directory=None):
+        self.directory = directory
+        self.indptr = indptr
+        self.indices = indices
+        self.node_ids = node_ids
+        self.weights = weights
+        self.cumweights = cumweights
+
+    @property
+    def num_nodes(self):
+        return len(self.indptr) - 1
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    def neighbors(self, row):
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+
+def parse_edge_line(line, weighted):
+    """
+    Split a network line into (citing, cited, weight); returns None for lines without an edge.
+    """
+    if "==>" not in line:
+        return None
+    if weighted:
+        parts = line.split()
+        if len(parts) < 4:
+            return None
+        return parts[0], parts[2], float(parts[3])
+    src, dst = line.split("==>")
+    return src.strip(), dst.strip(), 1.0
+
+
+def build_csr_files(input_file, output_dir, weighted=False, chunk_edges=1_000_000, sort_block_edges=10_000_000):
+    """
+    Convert an edge-list file into memory-mapped CSR files.
+
+    Parameters:
+    - input_file (str): Citation network file.
+    - output_dir (str): Directory the CSR files are written to.
+    - weighted (bool): Whether lines carry a weight column (default: False).
+    - chunk_edges (int): Edges buffered in memory while streaming (default: 1,000,000).
+    - sort_block_edges (int): Edges sorted at once when ordering the rows (default: 10,000,000).
+
+    Returns:
+    - graph (CSRGraph): The memory-mapped graph.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    edge_file = os.path.join(output_dir, "edges.tmp")
+    node_to_idx = {}
+    node_ids = []
+    buffer = np.empty(chunk_edges, dtype=EDGE_DTYPE)
+    filled = 0
+    num_edges = 0
+
+    def intern(node):
+        idx = node_to_idx.get(node)
+        if idx is None:
+            idx = node_to_idx[node] = len(node_ids)
+            node_ids.append(node)
+        return idx
+
+    # Pass 1: intern node IDs, count out-degrees and spill the edges as binary records
+    with open(input_file, 'r', encoding='utf-8') as f, open(edge_file, 'wb') as spill:
+        for line in f:
+            edge = parse_edge_line(line.strip(), weighted)
+            if edge is None:
+                continue
+            src, dst = intern(edge[0]), intern(edge[1])
+            buffer[filled] = (src, dst, edge[2])
+            filled += 1
+            if filled == chunk_edges:
+                buffer.tofile(spill)
+                num_edges += filled
+                filled = 0
+        buffer[:filled].tofile(spill)
+        num_edges += filled
+
+    num_nodes = len(node_ids)
+    # Pass 2: scatter the edges into their rows
+    edges = np.memmap(edge_file, dtype=EDGE_DTYPE, mode='r', shape=(num_edges,))
+    out_degree = np.zeros(num_nodes, dtype=np.int64)
+    for start in range(0, num_edges, chunk_edges):
+        out_degree += np.bincount(edges["src"][start:start + chunk_edges], minlength=num_nodes)
+    indptr = np.lib.format.open_memmap(os.path.join(output_dir, "indptr.npy"), mode='w+',
+                                       dtype=np.int64, shape=(num_nodes + 1,))
+    indptr[0] = 0
+    np.cumsum(out_degree, out=indptr[1:])
+    indices = np.lib.format.open_memmap(os.path.join(output_dir, "indices.npy"), mode='w+',
+                                        dtype=np.int32, shape=(num_edges,))
+    weights = None
+    if weighted:
+        weights = np.lib.format.open_memmap(os.path.join(output_dir, "weights.npy"), mode='w+',
+                                            dtype=np.float32, shape=(num_edges,))
+
+    cursor = np.array(indptr[:-1])
+    for start in range(0, num_edges, chunk_edges):
+        chunk = np.array(edges[start:start + chunk_edges])
+        order = np.argsort(chunk["src"], kind="stable")
+        src = chunk["src"][order]
+        # Position of every edge within its source row inside this chunk
+        first = np.searchsorted(src, src, side="left")
+        positions = cursor[src] + (np.arange(len(src)) - first)
+        indices[positions] = chunk["dst"][order]
+        if weighted:
+            weights[positions] = chunk["weight"][order]
+        np.add.at(cursor, src, 1)
+    del edges
+    os.remove(edge_file)
+
+    # Pass 3: sort every row by target, one block of whole rows at a time
+    row = 0
+    while row < num_nodes:
+        end_row = int(np.searchsorted(indptr, indptr[row] + sort_block_edges, side="right")) - 1
+        end_row = min(max(end_row, row + 1), num_nodes)
+        lo, hi = int(indptr[row]), int(indptr[end_row])
+        if hi > lo:
+            rows = np.repeat(np.arange(row, end_row, dtype=np.int64), out_degree[row:end_row])
+            order = np.lexsort((indices[lo:hi], rows))
+            indices[lo:hi] = np.array(indices[lo:hi])[order]
+            if weighted:
+                weights[lo:hi] = np.array(weights[lo:hi])[order]
+        row = end_row
+
+    if weighted:
+        cumweights = np.lib.format.open_memmap(os.path.join(output_dir, "cumweights.npy"), mode='w+',
+                                               dtype=np.float64, shape=(num_edges,))
+        running = 0.0
+        for start in range(0, num_edges, chunk_edges):
+            block = np.cumsum(weights[start:start + chunk_edges], dtype=np.float64) + running
+            cumweights[start:start + len(block)] = block
+            if len(block):
+                running = block[-1]
+        cumweights.flush()
+        weights.flush()
+    indptr.flush()
+    indices.flush()
+
+    with open(os.path.join(output_dir, "node_ids.txt"), 'w', encoding='utf-8') as f:
+        for node in node_ids:
+            f.write(f"{node}\n")
+    with open(os.path.join(output_dir, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump({"num_nodes": num_nodes, "num_edges": num_edges, "weighted": weighted}, f)
+
+    return load_csr(output_dir)
+
+
+def load_csr(directory, mmap_mode="r"):
+    """
+    Open CSR files written by build_csr_files.
+    """
+    def load(name):
+        path = os.path.join(directory, name)
+        return np.load(path, mmap_mode=mmap_mode) if os.path.exists(path) else None
+
+    with open(os.path.join(directory, "node_ids.txt"), 'r', encoding='utf-8') as f:
+        node_ids = [line.rstrip("\n") for line in f]
+    return CSRGraph(load("indptr.npy"), load("indices.npy"), node_ids, load("weights.npy"), load("cumweights.npy"),
+                    directory=directory)
+
+
+def save_networkx_csr(G, output_dir, weighted=False):
+    """
+    Write an in-memory networkx DiGraph as CSR files, keeping its node order as row order.
+    Edges without a "weight" attribute get weight 1.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    node_ids = list(G.nodes())
+    node_to_idx = {node: idx for idx, node in enumerate(node_ids)}
+    indptr = np.zeros(len(node_ids) + 1, dtype=np.int64)
+    indices, weights = [], []
+    for row, node in enumerate(node_ids):
+        targets = sorted((node_to_idx[dst], data.get("weight", 1.0)) for dst, data in G[node].items())
+        indices.extend(t for t, _ in targets)
+        weights.extend(w for _, w in targets)
+        indptr[row + 1] = len(indices)
+
+    np.save(os.path.join(output_dir, "indptr.npy"), indptr)
+    np.save(os.path.join(output_dir, "indices.npy"), np.array(indices, dtype=np.int32))
+    if weighted:
+        weights = np.array(weights, dtype=np.float32)
+        np.save(os.path.join(output_dir, "weights.npy"), weights)
+        np.save(os.path.join(output_dir, "cumweights.npy"), np.cumsum(weights, dtype=np.float64))
+    with open(os.path.join(output_dir, "node_ids.txt"), 'w', encoding='utf-8') as f:
+        for node in node_ids:
+            f.write(f"{node}\n")
+    with open(os.path.join(output_dir, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump({"num_nodes": len(node_ids), "num_edges": len(indices), "weighted": weighted}, f)
+    return load_csr(output_dir)
+
+
+def select_query_rows(graph, num_samples=1000, seed=42, baseline_file=None):
+    """
+    Rows of the query papers: the papers of a previous recommendation file if baseline_file is
+    given (unknown papers are skipped), otherwise num_samples rows sampled with the seed.
+    """
+    if baseline_file is not None:
+        from experiments.citation_graph_local_run import load_sampled_nodes
+        node_to_idx = {node: idx for idx, node in enumerate(graph.node_ids)}
+        return [node_to_idx[node] for node in load_sampled_nodes(baseline_file) if node in node_to_idx]
+    random.seed(seed)
+    return random.sample(range(graph.num_nodes), min(num_samples, graph.num_nodes))
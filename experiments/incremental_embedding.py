@@ -0,0 +1,213 @@
+import argparse
+import json
+import os
+import random
+import re
+
+import numpy as np
+
+from experiments.citation_graph_local_run import (
+    load_citation_graph,
+    load_weighted_citation_graph,
+    generate_walks,
+    fit_embedding_model,
+    extract_embeddings,
+    save_embeddings,
+    load_embeddings,
+)
+from experiments.similarity_search import normalize_embeddings, top_k_similar
+
+"""
+Incremental node2vec updates for newly added papers.
+
+Instead of retraining on the whole graph, the previous Word2Vec model is loaded, walks are
+generated only on the subgraph spanned by the new papers and their k-hop neighborhood, and
+training continues on those walks after a vocabulary update. Every update is written as a new
+versioned embedding set (v0001, v0002, ...) under a common root directory.
+
+Because continued training slowly moves the existing vectors, the drift of the updated
+embeddings can be measured against a full retrain to decide when a rebuild is due.
+
+Run from the repository root:
+    python -m experiments.incremental_embedding experiments/embeddings/baseline \
+        data/2014/networks/paper_citation_network.txt --output-root experiments/embeddings/versions
+"""
+
+VERSION_PATTERN = re.compile(r"^v(\d{4})$")
+
+
+def k_hop_neighborhood(G, seeds, k):
+    """
+    Return the seeds and every node within k hops of them, ignoring edge direction.
+    """
+    region = set(seeds)
+    frontier = set(seeds)
+    for _ in range(k):
+        next_frontier = set()
+        for node in frontier:
+            next_frontier.update(G.successors(node))
+            next_frontier.update(G.predecessors(node))
+        frontier = next_frontier - region
+        region |= frontier
+        if not frontier:
+            break
+    return region
+
+
+def next_version_dir(output_root):
+    """
+    Return the directory of the next embedding version below output_root.
+    """
+    versions = [int(m.group(1)) for m in (VERSION_PATTERN.match(d) for d in os.listdir(output_root)) if m] \
+        if os.path.isdir(output_root) else []
+    return os.path.join(output_root, f"v{max(versions, default=0) + 1:04d}")
+
+
+def procrustes_align(source, target):
+    """
+    Rotate source onto target with the orthogonal matrix minimizing ||source R - target||.
+    """
+    u, _, vt = np.linalg.svd(source.T @ target)
+    return source @ (u @ vt)
+
+
+def embedding_drift(node_list_a, embeddings_a, node_list_b, embeddings_b, sample_size=1000, k=10, seed=42):
+    """
+    Measure how far two embedding sets of the same graph have drifted apart.
+
+    The aligned cosine compares vectors after an orthogonal Procrustes rotation, since two
+    independently trained models differ by an arbitrary rotation. The neighbor overlap is the
+    mean fraction of shared top-k neighbors and is rotation invariant.
+
+    Returns:
+    - drift (dict): shared node count, mean aligned cosine and mean top-k neighbor overlap.
+    """
+    idx_b = {node: i for i, node in enumerate(node_list_b)}
+    shared = [(i, idx_b[node]) for i, node in enumerate(node_list_a) if node in idx_b]
+    if not shared:
+        return {"shared_nodes": 0, "aligned_cosine": None, "neighbor_overlap": None}
+    rows_a, rows_b = (np.array(rows) for rows in zip(*shared))
+
+    a = normalize_embeddings(embeddings_a[rows_a])
+    b = normalize_embeddings(embeddings_b[rows_b])
+    aligned = normalize_embeddings(procrustes_align(a, b))
+    aligned_cosine = float(np.mean(np.sum(aligned * b, axis=1)))
+
+    rng = np.random.default_rng(seed)
+    sample = rng.choice(len(rows_a), size=min(sample_size, len(rows_a)), replace=False)
+    neighbors_a, _ = top_k_similar(a, sample, k)
+    neighbors_b, _ = top_k_similar(b, sample, k)
+    # top_k_similar clamps k to the shared nodes and pads missing neighbors with -1
+    k = neighbors_a.shape[1]
+    overlap = np.mean([len(set(x[x >= 0]) & set(y[y >= 0])) / k for x, y in zip(neighbors_a, neighbors_b)]) \
+        if k else 0.0
+
+    return {"shared_nodes": len(shared), "aligned_cosine": aligned_cosine, "neighbor_overlap": float(overlap)}
+
+
+def incremental_update(
+    previous_dir,
+    G,
+    output_root,
+    hops=1,
+    walk_length=10,
+    num_walks=100,
+    p=0.1,
+    q=2,
+    workers=4,
+    seed=42
+):
+    """
+    Update a saved embedding model with the nodes of G that it has not seen yet.
+
+    Parameters:
+    - previous_dir (str): Embedding directory saved with a word2vec.model.
+    - G (nx.DiGraph): The current citation graph, including the new papers.
+    - output_root (str): Directory holding the versioned embedding sets.
+    - hops (int): Size of the neighborhood around the new nodes that is re-walked (default: 1).
+      Two hops through a highly cited hub can already reach most of the graph.
+
+    Returns:
+    - version_dir (str): Directory of the new embedding version, or previous_dir if G has no
+      new nodes, in which case nothing is written.
+    - info (dict): Summary of the update, also stored as update.json.
+    """
+    from gensim.models import Word2Vec
+
+    model = Word2Vec.load(os.path.join(previous_dir, "word2vec.model"))
+    new_nodes = [node for node in G.nodes() if node not in model.wv.key_to_index]
+    print(f"Found {len(new_nodes)} new nodes.")
+    params = {"walk_length": walk_length, "num_walks": num_walks, "p": p, "q": q, "seed": seed}
+    if not new_nodes:
+        print(f"Embeddings in {previous_dir} are up to date.")
+        return previous_dir, {"parent": os.path.abspath(previous_dir), "new_nodes": 0, "rewalked_nodes": 0,
+                              "walks": 0, "hops": hops, "params": params}
+
+    region = k_hop_neighborhood(G, new_nodes, hops)
+    subgraph = G.subgraph(region).copy()
+    print(f"Re-walking a {hops}-hop neighborhood of {subgraph.number_of_nodes()} nodes "
+          f"out of {G.number_of_nodes()}.")
+
+    random.seed(seed)
+    np.random.seed(seed)
+    node2vec = generate_walks(subgraph, model.vector_size, walk_length, num_walks, p, q, workers)
+    walks = node2vec.walks
+    model.build_vocab(walks, update=True)
+    model.train(walks, total_examples=len(walks), epochs=model.epochs)
+
+    node_list, embeddings, _ = extract_embeddings(model)
+    version_dir = next_version_dir(output_root)
+    save_embeddings(version_dir, node_list, embeddings, model)
+    info = {
+        "parent": os.path.abspath(previous_dir),
+        "new_nodes": len(new_nodes),
+        "rewalked_nodes": subgraph.number_of_nodes(),
+        "walks": len(walks),
+        "hops": hops,
+        "params": params,
+    }
+    with open(os.path.join(version_dir, "update.json"), 'w', encoding='utf-8') as f:
+        json.dump(info, f, indent=2)
+    print(f"Embedding version stored in {version_dir}")
+    return version_dir, info
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incrementally update node2vec embeddings with new papers.")
+    parser.add_argument("previous_dir", help="Embedding directory containing word2vec.model.")
+    parser.add_argument("input_file", help="Current citation network, including the new papers.")
+    parser.add_argument("--output-root", default="experiments/embeddings/versions")
+    parser.add_argument("--weighted", action="store_true", help="The network has a weight column.")
+    parser.add_argument("--hops", type=int, default=1)
+    parser.add_argument("--walk-length", type=int, default=10)
+    parser.add_argument("--num-walks", type=int, default=100)
+    parser.add_argument("--p", type=float, default=0.1)
+    parser.add_argument("--q", type=float, default=2)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=42, help="Random seed of the update and of the full retrain.")
+    parser.add_argument("--compare-full", action="store_true",
+                        help="Also run a full retrain and report the drift of the incremental embeddings.")
+    args = parser.parse_args()
+
+    G = load_weighted_citation_graph(args.input_file) if args.weighted else load_citation_graph(args.input_file)
+    version_dir, info = incremental_update(args.previous_dir, G, args.output_root, args.hops, args.walk_length,
+                                           args.num_walks, args.p, args.q, args.workers, args.seed)
+
+    if args.compare_full:
+        print("Running a full retrain for comparison...")
+        previous = load_embeddings(args.previous_dir)
+        updated = load_embeddings(version_dir)
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+        node2vec = generate_walks(G, updated[1].shape[1], args.walk_length, args.num_walks, args.p, args.q,
+                                  args.workers)
+        full_nodes, full_embeddings, _ = extract_embeddings(fit_embedding_model(node2vec))
+        report = {
+            "incremental_vs_full": embedding_drift(updated[0], updated[1], full_nodes, full_embeddings),
+            "previous_vs_full": embedding_drift(previous[0], previous[1], full_nodes, full_embeddings),
+            "previous_vs_incremental": embedding_drift(previous[0], previous[1], updated[0], updated[1]),
+        }
+        with open(os.path.join(version_dir, "drift.json"), 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        for name, drift in report.items():
+            print(f"{name}: {drift}")
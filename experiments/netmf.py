@@ -0,0 +1,144 @@
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from experiments.csr_graph import build_csr_files, save_networkx_csr
+
+"""
+NetMF embedding backend: factorize the random-walk co-occurrence matrix instead of sampling walks.
+
+Skip-gram with negative sampling on random walks implicitly factorizes (Qiu et al., 2018)
+
+    M = vol(G) / (b T) * (P + P^2 + ... + P^T) D^-1,
+
+where P = D^-1 A is the random-walk transition matrix, T the context window, b the number of
+negative samples and vol(G) the total edge weight. The embeddings are the top singular vectors
+of the positive part of log(M) (the shifted PPMI matrix), scaled by the square roots of the
+singular values.
+
+The powers of P are computed row block by row block with sparse products, and entries with
+a walk probability below min_probability are dropped after every step, so memory is bounded
+by block_rows rows at a time. The result has the same node_list / embeddings form as
+extract_embeddings, so the rest of the recommender is unchanged. It corresponds to
+node2vec with p = q = 1; the return and in-out parameters are not modeled.
+
+Run from the repository root:
+    python -m experiments.netmf data/2014/networks/paper_citation_network.txt experiments/embeddings/netmf
+"""
+
+
+def transition_matrix(graph, directed=False):
+    """
+    Adjacency and degree vector of a CSRGraph, symmetrized unless directed.
+
+    Returns:
+    - adjacency (sp.csr_matrix): Weighted adjacency matrix (N x N).
+    - degree (np.ndarray): Row sums of the adjacency matrix.
+    """
+    n = graph.num_nodes
+    weights = np.ones(graph.num_edges) if graph.weights is None else np.asarray(graph.weights, dtype=np.float64)
+    adjacency = sp.csr_matrix((weights, np.asarray(graph.indices), np.asarray(graph.indptr)), shape=(n, n))
+    if not directed:
+        adjacency = (adjacency + adjacency.T).tocsr()
+    degree = np.asarray(adjacency.sum(axis=1)).ravel()
+    return adjacency, degree
+
+
+def _prune(matrix, min_probability):
+    matrix.data[matrix.data < min_probability] = 0
+    matrix.eliminate_zeros()
+    return matrix
+
+
+def ppmi_matrix(graph, window=10, negative=1, directed=False, min_probability=1e-2, block_rows=4096):
+    """
+    Sparse shifted PPMI matrix max(log M, 0) of the NetMF objective.
+
+    Parameters:
+    - graph (CSRGraph): Citation graph, weighted or unweighted.
+    - window (int): Context window T of the skip-gram model (default: 10).
+    - negative (int): Number of negative samples b (default: 1).
+    - directed (bool): Walk along citations only instead of both directions (default: False).
+    - min_probability (float): Walk probabilities below this are dropped (default: 0.01).
+    - block_rows (int): Rows of the matrix powers computed at once (default: 4096).
+    """
+    adjacency, degree = transition_matrix(graph, directed)
+    inverse_degree = np.divide(1.0, degree, out=np.zeros_like(degree), where=degree > 0)
+    P = sp.diags(inverse_degree) @ adjacency
+    P = P.tocsr()
+    scale = degree.sum() / (negative * window)
+
+    blocks = []
+    for start in range(0, P.shape[0], block_rows):
+        power = P[start:start + block_rows]
+        total = power.copy()
+        for _ in range(window - 1):
+            power = _prune(power @ P, min_probability)
+            total = total + power
+        M = (total @ sp.diags(inverse_degree * scale)).tocsr()
+        M.data = np.log(np.maximum(M.data, 1e-300))
+        M.data[M.data < 0] = 0
+        M.eliminate_zeros()
+        blocks.append(M)
+    return sp.vstack(blocks).tocsr()
+
+
+def netmf_embeddings(graph, embedding_dim=64, window=10, negative=1, directed=False, min_probability=1e-2,
+                     block_rows=4096, seed=42):
+    """
+    Embed every node of a CSRGraph with NetMF.
+
+    Returns:
+    - node_list (list): Node ID of every embedding row.
+    - embeddings (np.ndarray): float32 embedding matrix (N x embedding_dim).
+    - node_to_idx (dict): Maps node ID to its row in embeddings.
+    """
+    from sklearn.utils.extmath import randomized_svd
+
+    ppmi = ppmi_matrix(graph, window, negative, directed, min_probability, block_rows)
+    print(f"PPMI matrix: {ppmi.shape[0]} nodes, {ppmi.nnz} non-zeros")
+    k = min(embedding_dim, min(ppmi.shape) - 1)
+    U, S, _ = randomized_svd(ppmi, n_components=k, n_iter=5, random_state=seed)
+    embeddings = np.zeros((ppmi.shape[0], embedding_dim), dtype=np.float32)
+    embeddings[:, :k] = U * np.sqrt(S)
+    node_list = list(graph.node_ids)
+    node_to_idx = {node: idx for idx, node in enumerate(node_list)}
+    return node_list, embeddings, node_to_idx
+
+
+def netmf_from_networkx(G, embedding_dim=64, weighted=False, **kwargs):
+    """
+    NetMF embeddings of an in-memory networkx graph; kwargs are passed to netmf_embeddings.
+    """
+    with tempfile.TemporaryDirectory() as csr_dir:
+        graph = save_networkx_csr(G, csr_dir, weighted=weighted)
+        return netmf_embeddings(graph, embedding_dim, **kwargs)
+
+
+if __name__ == "__main__":
+    from experiments.citation_graph_local_run import save_embeddings
+
+    parser = argparse.ArgumentParser(description="Train NetMF embeddings of a citation network.")
+    parser.add_argument("input_file")
+    parser.add_argument("output_dir", help="Embedding directory, readable with load_embeddings.")
+    parser.add_argument("--weighted", action="store_true")
+    parser.add_argument("--embedding-dim", type=int, default=64)
+    parser.add_argument("--window", type=int, default=10)
+    parser.add_argument("--negative", type=int, default=1)
+    parser.add_argument("--min-probability", type=float, default=1e-2)
+    parser.add_argument("--directed", action="store_true")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory() as csr_dir:
+        graph = build_csr_files(args.input_file, csr_dir, weighted=args.weighted)
+        node_list, embeddings, _ = netmf_embeddings(graph, args.embedding_dim, args.window, args.negative,
+                                                    args.directed, args.min_probability)
+    os.makedirs(args.output_dir, exist_ok=True)
+    save_embeddings(args.output_dir, node_list, embeddings)
+    print(f"NetMF embeddings of {len(node_list)} nodes stored in {args.output_dir} "
+          f"({time.perf_counter() - start:.1f}s)")
@@ -0,0 +1,315 @@
+import argparse
+import os
+import random
+
+import numpy as np
+
+from experiments.csr_graph import build_csr_files, load_csr
+from experiments.similarity_search import top_k_similar_streamed, format_recommendation
+
+"""
+Out-of-core node2vec for citation graphs larger than RAM.
+
+The adjacency is kept in memory-mapped CSR files (see csr_graph.py). Walks are generated in
+shards of consecutive start nodes: all walkers of a shard advance together, reading neighbor
+lists straight from the map, so the working set is bounded by the shard size rather than by
+the graph. The second-order p/q bias of node2vec is applied by rejection sampling, which
+needs no per-edge transition tables: a neighbor x of the current node is proposed in
+proportion to the edge weight and accepted with probability bias(x) / max bias, where
+bias(x) is 1/p when x is the previous node, 1 when the previous node also links to x and
+1/q otherwise. This draws from the same distribution as the node2vec package.
+
+Each shard draws from its own random generator derived from the seed and the shard index,
+so shards can be spread over any number of processes and still produce the same walks.
+
+Walks are streamed to a text corpus that Word2Vec reads from disk (corpus_file), and the
+trained vectors are written directly into a memory-mapped embeddings.npy, in the layout
+read by citation_graph_local_run.load_embeddings.
+Recommendations are searched in blocks of the memory-mapped normalized matrix with a
+running top-k (similarity_search.top_k_similar_streamed).
+
+Everything proportional to the number of edges or to N x d stays on disk. The node ID table
+does not: build_csr_files and load_csr hold every node ID in a Python list (and, while
+building, a dict), roughly 100-150 bytes per node, so about 1-1.5 GB of RAM at 10M nodes.
+
+Run from the repository root:
+    python -m experiments.out_of_core data/2014/networks/paper_citation_network.txt experiments/out_of_core_work
+"""
+
+NO_NODE = -1
+
+
+def has_edge(graph, sources, targets):
+    """
+    Vectorized membership test of the edges sources[i] -> targets[i].
+    Binary search inside each source row, which is sorted by target.
+    """
+    lo = np.asarray(graph.indptr[sources], dtype=np.int64)
+    hi = np.asarray(graph.indptr[sources + 1], dtype=np.int64)
+    while True:
+        active = lo < hi
+        if not active.any():
+            break
+        mid = (lo + hi) // 2
+        go_right = active & (graph.indices[np.where(active, mid, 0)] < targets)
+        lo = np.where(go_right, mid + 1, lo)
+        hi = np.where(active & ~go_right, mid, hi)
+    found = lo < graph.indptr[sources + 1]
+    found[found] = graph.indices[lo[found]] == targets[found]
+    return found
+
+
+def sample_neighbors(graph, nodes, rng):
+    """
+    Draw one out-neighbor of every node, proportionally to the edge weight.
+    Every node must have at least one out-edge.
+    """
+    start = np.asarray(graph.indptr[nodes], dtype=np.int64)
+    end = np.asarray(graph.indptr[nodes + 1], dtype=np.int64)
+    if graph.cumweights is None:
+        positions = start + (rng.random(len(nodes)) * (end - start)).astype(np.int64)
+    else:
+        before = np.where(start > 0, graph.cumweights[np.maximum(start - 1, 0)], 0.0)
+        targets = before + rng.random(len(nodes)) * (graph.cumweights[end - 1] - before)
+        positions = np.searchsorted(graph.cumweights, targets, side="right")
+        # Guard against floating point landing just outside the row
+        positions = np.clip(positions, start, end - 1)
+    return np.asarray(graph.indices[positions], dtype=np.int64)
+
+
+def generate_walk_shard(graph, start_nodes, num_walks, walk_length, p, q, rng):
+    """
+    Generate num_walks node2vec walks from every start node.
+
+    Returns:
+    - walks (np.ndarray): (len(start_nodes) * num_walks, walk_length) row indices; walks that
+      reach a node without out-edges stop early and are padded with NO_NODE.
+    """
+    walkers = np.tile(np.asarray(start_nodes, dtype=np.int64), num_walks)
+    walks = np.full((len(walkers), walk_length), NO_NODE, dtype=np.int64)
+    walks[:, 0] = walkers
+    alive = np.arange(len(walkers))
+    max_bias = max(1 / p, 1.0, 1 / q)
+
+    for step in range(1, walk_length):
+        current = walks[alive, step - 1]
+        alive = alive[graph.indptr[current + 1] > graph.indptr[current]]
+        if len(alive) == 0:
+            break
+        current = walks[alive, step - 1]
+        if step == 1:
+            walks[alive, step] = sample_neighbors(graph, current, rng)
+            continue
+
+        previous = walks[alive, step - 2]
+        pending = np.arange(len(alive))
+        while len(pending):
+            proposal = sample_neighbors(graph, current[pending], rng)
+            bias = np.full(len(pending), 1 / q)
+            bias[has_edge(graph, previous[pending], proposal)] = 1.0
+            bias[proposal == previous[pending]] = 1 / p
+            accepted = rng.random(len(pending)) * max_bias < bias
+            walks[alive[pending[accepted]], step] = proposal[accepted]
+            pending = pending[~accepted]
+    return walks
+
+
+def write_walks(walks, out):
+    """
+    Append walks to a Word2Vec corpus file, one walk of row indices per line.
+    """
+    for walk in walks:
+        out.write(" ".join(str(node) for node in walk[walk != NO_NODE]))
+        out.write("\n")
+
+
+def shard_rng(seed, shard_index):
+    """
+    Random generator of one shard, derived from the run seed and the shard index only.
+    """
+    return np.random.default_rng(np.random.SeedSequence([seed, shard_index]))
+
+
+# Graph opened once per worker process, keyed by CSR directory
+_worker_graphs = {}
+
+
+def _walk_shard_task(args):
+    directory, shard_index, start, stop, num_walks, walk_length, p, q, seed = args
+    graph = _worker_graphs.get(directory)
+    if graph is None:
+        graph = _worker_graphs[directory] = load_csr(directory)
+    return generate_walk_shard(graph, np.arange(start, stop), num_walks, walk_length, p, q,
+                               shard_rng(seed, shard_index))
+
+
+def iter_walk_shards(graph, num_walks=100, walk_length=10, p=0.1, q=2, shard_nodes=10_000, seed=42, processes=1):
+    """
+    Yield the walk arrays of consecutive node-range shards, in shard order.
+
+    Every shard draws from its own generator derived from (seed, shard index), so the walks
+    depend only on the seed and shard_nodes: any number of processes produces the same,
+    bit-identical walks. With processes > 1 the graph must have been loaded from CSR files,
+    which every worker memory-maps.
+    """
+    tasks = [(graph.directory, index, start, min(start + shard_nodes, graph.num_nodes),
+              num_walks, walk_length, p, q, seed)
+             for index, start in enumerate(range(0, graph.num_nodes, shard_nodes))]
+    if processes <= 1:
+        for task in tasks:
+            _, index, start, stop = task[:4]
+            yield generate_walk_shard(graph, np.arange(start, stop), num_walks, walk_length, p, q,
+                                      shard_rng(seed, index))
+        return
+    if graph.directory is None:
+        raise ValueError("Parallel walk generation needs a graph loaded from CSR files")
+    from multiprocessing import Pool
+    with Pool(processes) as pool:
+        # imap keeps shard order regardless of which worker finishes first
+        yield from pool.imap(_walk_shard_task, tasks)
+
+
+def generate_walk_corpus(graph, corpus_file, num_walks=100, walk_length=10, p=0.1, q=2,
+                         shard_nodes=10_000, seed=42, processes=1):
+    """
+    Write the node2vec walks of every node to corpus_file, one node-range shard at a time.
+
+    Returns:
+    - num_walks_written (int): Number of walks in the corpus.
+    """
+    written = 0
+    with open(corpus_file, 'w', encoding='utf-8') as out:
+        for walks in iter_walk_shards(graph, num_walks, walk_length, p, q, shard_nodes, seed, processes):
+            write_walks(walks, out)
+            written += len(walks)
+            print(f"Generated {written} walks...")
+    return written
+
+
+def fit_corpus(corpus_file, embedding_dim=64, workers=1, seed=42):
+    """
+    Train skip-gram on a walk corpus streamed from disk, with the settings of Node2Vec.fit.
+    Like fit_walks, the model is reproducible only with a single worker (and a fixed
+    PYTHONHASHSEED); more workers train faster but vary from run to run.
+    """
+    from gensim.models import Word2Vec
+    return Word2Vec(corpus_file=corpus_file, vector_size=embedding_dim, window=10, min_count=1,
+                    sg=1, workers=workers, seed=seed)
+
+
+def extract_embeddings_to_disk(model, graph, output_dir, chunk_rows=100_000):
+    """
+    Write the trained vectors into a memory-mapped embeddings.npy ordered by graph row, and
+    the matching node_ids.txt. Nodes that never appeared in a walk keep a zero vector.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    embeddings = np.lib.format.open_memmap(os.path.join(output_dir, "embeddings.npy"), mode='w+',
+                                           dtype=np.float32, shape=(graph.num_nodes, model.wv.vector_size))
+    keys = model.wv.index_to_key
+    for start in range(0, len(keys), chunk_rows):
+        rows = np.array([int(key) for key in keys[start:start + chunk_rows]], dtype=np.int64)
+        embeddings[rows] = model.wv.vectors[start:start + len(rows)]
+    embeddings.flush()
+    with open(os.path.join(output_dir, "node_ids.txt"), 'w', encoding='utf-8') as f:
+        for node in graph.node_ids:
+            f.write(f"{node}\n")
+    return embeddings
+
+
+def normalize_to_disk(embeddings, output_file, chunk_rows=100_000):
+    """
+    Write the row-normalized copy of a (memory-mapped) embedding matrix, chunk by chunk.
+    """
+    normalized = np.lib.format.open_memmap(output_file, mode='w+', dtype=np.float32, shape=embeddings.shape)
+    for start in range(0, embeddings.shape[0], chunk_rows):
+        block = np.asarray(embeddings[start:start + chunk_rows], dtype=np.float32)
+        norms = np.linalg.norm(block, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        normalized[start:start + len(block)] = block / norms
+    normalized.flush()
+    return normalized
+
+
+def run_out_of_core_recommender(
+    input_file="data/2014/networks/paper_citation_network.txt",
+    work_dir="experiments/out_of_core_work",
+    output_file="experiments/results/out_of_core_top10_with_similarity.txt",
+    weighted=False,
+    num_samples=1000,
+    embedding_dim=64,
+    walk_length=10,
+    num_walks=100,
+    p=0.1,
+    q=2,
+    workers=4,
+    seed=42,
+    shard_nodes=10_000,
+    processes=1
+):
+    """
+    Out-of-core counterpart of run_citation_recommender / run_citation_recommender_with_weights.
+    All intermediate files (CSR arrays, walk corpus, embeddings) are kept in work_dir.
+    The walks depend only on the seed; the embeddings are reproducible end to end only with
+    workers=1, since multi-threaded Word2Vec training is not deterministic (see fit_corpus).
+    """
+    os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+    print("Step 1: Building the memory-mapped CSR graph...")
+    graph = build_csr_files(input_file, os.path.join(work_dir, "csr"), weighted=weighted)
+    print(f"Total nodes in the graph: {graph.num_nodes}")
+    print(f"Total edges in the graph: {graph.num_edges}")
+
+    print("Step 2: Sampling nodes...")
+    # Rows follow the node order of load_citation_graph, so this matches run_citation_recommender
+    random.seed(seed)
+    sampled_rows = random.sample(range(graph.num_nodes), min(num_samples, graph.num_nodes))
+    print("Sampled nodes count:", len(sampled_rows))
+
+    print("Step 3: Generating node2vec walks...")
+    corpus_file = os.path.join(work_dir, "walks.txt")
+    num_walks_written = generate_walk_corpus(graph, corpus_file, num_walks, walk_length, p, q, shard_nodes, seed,
+                                             processes)
+    print(f"Wrote {num_walks_written} walks to {corpus_file}")
+
+    print("Fitting the model...")
+    model = fit_corpus(corpus_file, embedding_dim, workers, seed)
+    print("Model training completed.")
+
+    print("Extracting embeddings...")
+    embeddings_dir = os.path.join(work_dir, "embeddings")
+    embeddings = extract_embeddings_to_disk(model, graph, embeddings_dir)
+    del model
+    normalized = normalize_to_disk(embeddings, os.path.join(embeddings_dir, "normalized.npy"))
+
+    print("Step 4: Generating recommendations...")
+    indices, similarities = top_k_similar_streamed(normalized, sampled_rows, k=10)
+    with open(output_file, 'w', encoding='utf-8') as out:
+        for row, rec_rows, sims in zip(sampled_rows, indices, similarities):
+            filled = rec_rows >= 0
+            out.write(format_recommendation(graph.node_ids[row], [graph.node_ids[i] for i in rec_rows[filled]],
+                                            sims[filled]))
+
+    print(f"Recommendations stored in {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the node2vec recommender out of core.")
+    parser.add_argument("input_file")
+    parser.add_argument("work_dir")
+    parser.add_argument("--output-file", default="experiments/results/out_of_core_top10_with_similarity.txt")
+    parser.add_argument("--weighted", action="store_true")
+    parser.add_argument("--num-samples", type=int, default=1000)
+    parser.add_argument("--embedding-dim", type=int, default=64)
+    parser.add_argument("--walk-length", type=int, default=10)
+    parser.add_argument("--num-walks", type=int, default=100)
+    parser.add_argument("--p", type=float, default=0.1)
+    parser.add_argument("--q", type=float, default=2)
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Word2Vec training threads; use 1 for reproducible embeddings.")
+    parser.add_argument("--shard-nodes", type=int, default=10_000)
+    parser.add_argument("--processes", type=int, default=1, help="Walk generation processes.")
+    args = parser.parse_args()
+
+    run_out_of_core_recommender(args.input_file, args.work_dir, args.output_file, args.weighted, args.num_samples,
+                                args.embedding_dim, args.walk_length, args.num_walks, args.p, args.q,
+                                args.workers, shard_nodes=args.shard_nodes, processes=args.processes)
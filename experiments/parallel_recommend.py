@@ -0,0 +1,198 @@
+import argparse
+import os
+import sys
+from multiprocessing import Pool, shared_memory
+
+import numpy as np
+
+from experiments.similarity_search import normalize_embeddings, top_k_similar, format_recommendation
+from experiments.recommendation_store import RecommendationWriter
+
+"""
+Multi-process top-k recommendation generation over a shared embedding matrix.
+
+The normalized embedding matrix and the node ID table are placed once in
+multiprocessing.shared_memory (or a memory-mapped .npy file). Worker processes attach to
+them without copying, each computes top-k lists for a shard of query rows, and the shards
+are streamed back in order to a single writer, so the matrix is never duplicated per worker.
+
+Run from the repository root:
+    python -m experiments.parallel_recommend experiments/embeddings/baseline \
+        experiments/results/baseline_all_top10.txt --processes 8
+"""
+
+# Worker-side views of the shared arrays, set by _attach_worker
+_worker_state = {}
+
+
+class SharedArray:
+    """
+    A NumPy array living in a named shared memory block.
+    Create it in the parent with SharedArray.create(array) and attach in workers
+    with SharedArray.attach(spec), where spec = shared.spec.
+    """
+
+    def __init__(self, shm, shape, dtype, owner):
+        self.shm = shm
+        self.array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        self.owner = owner
+
+    @classmethod
+    def create(cls, array):
+        array = np.ascontiguousarray(array)
+        shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        shared = cls(shm, array.shape, array.dtype, owner=True)
+        shared.array[...] = array
+        return shared
+
+    @classmethod
+    def attach(cls, spec):
+        name, shape, dtype = spec
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, shape, np.dtype(dtype), owner=False)
+
+    @property
+    def spec(self):
+        return self.shm.name, self.array.shape, self.array.dtype.str
+
+    def close(self):
+        self.array = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def _limit_blas_threads():
+    # One BLAS thread per worker process avoids oversubscribing the cores
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+
+def _attach_worker(source, matrix_spec, ids_spec):
+    _limit_blas_threads()
+    if source == "shm":
+        _worker_state["handles"] = [SharedArray.attach(matrix_spec), SharedArray.attach(ids_spec)]
+        _worker_state["matrix"], _worker_state["ids"] = (h.array for h in _worker_state["handles"])
+    else:
+        _worker_state["matrix"] = np.load(matrix_spec, mmap_mode="r")
+        _worker_state["ids"] = np.load(ids_spec, mmap_mode="r")
+
+
+def _recommend_shard(args):
+    query_rows, top_k, binary = args
+    matrix, ids = _worker_state["matrix"], _worker_state["ids"]
+    indices, similarities = top_k_similar(matrix, query_rows, top_k)
+    if binary:
+        return query_rows, indices, similarities
+    lines = []
+    for row, rec_rows, sims in zip(query_rows, indices, similarities):
+        filled = rec_rows >= 0
+        rec_nodes = [ids[i].decode() for i in rec_rows[filled]]
+        lines.append(format_recommendation(ids[row].decode(), rec_nodes, sims[filled]))
+    return "".join(lines)
+
+
+def recommend_all_parallel(
+    node_list,
+    embeddings,
+    output_file,
+    query_nodes=None,
+    top_k=10,
+    processes=None,
+    shard_size=2048,
+    source="shm",
+    mmap_dir=None,
+    output_format="text"
+):
+    """
+    Write top-k recommendations for many query nodes using a pool of worker processes.
+
+    Parameters:
+    - node_list (list): Node ID of every embedding row.
+    - embeddings (np.ndarray): Embedding matrix (N x d).
+    - output_file (str): Recommendation file, in the same format as run_citation_recommender.
+    - query_nodes (list): Nodes to recommend for (default: every node). Unknown nodes are skipped.
+    - top_k (int): Recommendations per node (default: 10).
+    - processes (int): Worker processes (default: os.cpu_count()).
+    - shard_size (int): Query nodes per task (default: 2048).
+    - source (str): "shm" for shared memory, "mmap" for memory-mapped .npy files in mmap_dir.
+    - mmap_dir (str): Directory for the memory-mapped files when source is "mmap".
+    - output_format (str): "text", or "binary" to append each shard to a recommendation store
+      directory at output_file (see recommendation_store.py).
+
+    Returns:
+    - written (int): Number of query nodes written.
+    """
+    node_to_idx = {node: idx for idx, node in enumerate(node_list)}
+    if query_nodes is None:
+        query_rows = np.arange(len(node_list))
+    else:
+        query_rows = np.array([node_to_idx[n] for n in query_nodes if n in node_to_idx], dtype=np.int64)
+
+    normalized = normalize_embeddings(embeddings)
+    ids = np.array([str(node).encode() for node in node_list])
+
+    handles = []
+    if source == "shm":
+        handles = [SharedArray.create(normalized), SharedArray.create(ids)]
+        matrix_spec, ids_spec = handles[0].spec, handles[1].spec
+    elif source == "mmap":
+        if mmap_dir is None:
+            raise ValueError("mmap_dir is required when source is 'mmap'")
+        os.makedirs(mmap_dir, exist_ok=True)
+        matrix_spec = os.path.join(mmap_dir, "normalized_embeddings.npy")
+        ids_spec = os.path.join(mmap_dir, "node_ids.npy")
+        np.save(matrix_spec, normalized)
+        np.save(ids_spec, ids)
+    else:
+        raise ValueError(f"Unknown source {source!r}; expected 'shm' or 'mmap'")
+    if output_format not in ("text", "binary"):
+        raise ValueError(f"Unknown output format {output_format!r}; expected 'text' or 'binary'")
+    # The parent keeps no private copy while workers run
+    del normalized
+
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    binary = output_format == "binary"
+    shards = [(query_rows[i:i + shard_size], top_k, binary) for i in range(0, len(query_rows), shard_size)]
+    try:
+        with Pool(processes, initializer=_attach_worker, initargs=(source, matrix_spec, ids_spec)) as pool, \
+                (RecommendationWriter(output_file, node_list, min(top_k, len(node_list) - 1)) if binary
+                 else open(output_file, 'w', encoding='utf-8')) as out:
+            for i, result in enumerate(pool.imap(_recommend_shard, shards)):
+                if binary:
+                    out.write(*result)
+                else:
+                    out.write(result)
+                print(f"Processed {min((i + 1) * shard_size, len(query_rows))} out of {len(query_rows)} nodes...")
+    finally:
+        for handle in handles:
+            handle.close()
+    return len(query_rows)
+
+
+if __name__ == "__main__":
+    from experiments.citation_graph_local_run import load_embeddings
+
+    parser = argparse.ArgumentParser(description="Generate top-k recommendations for every node in parallel.")
+    parser.add_argument("embeddings_dir", help="Directory written by save_embeddings.")
+    parser.add_argument("output_file")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--shard-size", type=int, default=2048)
+    parser.add_argument("--source", choices=["shm", "mmap"], default="shm")
+    parser.add_argument("--mmap-dir", default=None)
+    parser.add_argument("--output-format", choices=["text", "binary"], default="text")
+    args = parser.parse_args()
+
+    node_list, embeddings, _ = load_embeddings(args.embeddings_dir)
+    written = recommend_all_parallel(node_list, embeddings, args.output_file, top_k=args.top_k,
+                                     processes=args.processes, shard_size=args.shard_size,
+                                     source=args.source, mmap_dir=args.mmap_dir,
+                                     output_format=args.output_format)
+    print(f"Recommendations for {written} nodes stored in {args.output_file}")
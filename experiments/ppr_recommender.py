@@ -0,0 +1,183 @@
+import argparse
+import os
+import tempfile
+
+import numpy as np
+import scipy.sparse as sp
+
+from experiments.csr_graph import build_csr_files, select_query_rows
+from experiments.netmf import transition_matrix
+from experiments.recommendation_store import write_results
+from experiments.similarity_search import top_k_rows
+
+"""
+Personalized PageRank (PPR) recommender over the (reweighted) citation graph.
+
+For a seed paper s, PPR is the stationary distribution of a walk that follows an edge with
+probability 1 - alpha, chosen in proportion to the edge weights, and jumps back to s with
+probability alpha:
+
+    x = alpha * e_s + (1 - alpha) * P^T x,
+
+where P is the row-normalized weighted adjacency matrix. Walkers stuck on a node without
+edges also return to s. The papers with the highest PPR scores are the recommendations.
+
+Many seeds are solved together: their columns form a dense N x block_size matrix and every
+iteration is one sparse-matrix x dense-block product. Columns whose L1 change falls below tol
+are finalized and dropped from the block, so fast-converging seeds stop costing work. No
+training step is involved, so the weighted network of adjust_edge_weight.generate_new_network
+can be used directly.
+
+Run from the repository root:
+    python -m experiments.ppr_recommender experiments/weighted_paper_citation_network.txt \
+        experiments/results/ppr_top10.txt --weighted
+"""
+
+
+def ppr_operator(graph, directed=False):
+    """
+    Transposed transition matrix P^T (float32 CSR) and the mask of nodes without edges.
+    With directed=False the walk follows citations in both directions.
+    """
+    adjacency, degree = transition_matrix(graph, directed)
+    inverse_degree = np.divide(1.0, degree, out=np.zeros_like(degree), where=degree > 0)
+    transposed = (sp.diags(inverse_degree) @ adjacency).T.tocsr().astype(np.float32)
+    return transposed, degree == 0
+
+
+def personalized_pagerank(transposed, dangling, seed_rows, alpha=0.15, tol=1e-4, max_iter=100):
+    """
+    PPR vectors of a block of seeds by power iteration.
+
+    Parameters:
+    - transposed (sp.csr_matrix): P^T from ppr_operator.
+    - dangling (np.ndarray): Boolean mask of nodes without edges.
+    - seed_rows (array-like): Seed row of every column.
+    - alpha (float): Restart probability (default: 0.15).
+    - tol (float): L1 change per column below which the column has converged (default: 1e-4).
+    - max_iter (int): Maximum number of iterations (default: 100).
+
+    Returns:
+    - scores (np.ndarray): (N, len(seed_rows)) float32 PPR matrix; every column sums to 1.
+    - iterations (int): Iterations until the last column converged.
+    """
+    seed_rows = np.asarray(seed_rows)
+    n, b = transposed.shape[0], len(seed_rows)
+    dangling_rows = np.flatnonzero(dangling)
+    scores = np.zeros((n, b), dtype=np.float32)
+    # x holds the columns that are still iterating, compacted as columns converge
+    active = np.arange(b)
+    x = scores.copy()
+    x[seed_rows, active] = 1
+    iterations = 0
+    while len(active) and iterations < max_iter:
+        updated = transposed @ x
+        updated *= 1 - alpha
+        restart = alpha + (1 - alpha) * x[dangling_rows].sum(axis=0) if len(dangling_rows) else alpha
+        updated[seed_rows[active], np.arange(len(active))] += restart
+        converged = np.abs(updated - x).sum(axis=0) < tol
+        x = updated
+        iterations += 1
+        if converged.any():
+            scores[:, active[converged]] = x[:, converged]
+            active, x = active[~converged], np.ascontiguousarray(x[:, ~converged])
+    scores[:, active] = x
+    return scores, iterations
+
+
+def ppr_top_k(graph, seed_rows, k=10, alpha=0.15, tol=1e-4, max_iter=100, block_size=256, directed=False,
+              popularity_exponent=0.0):
+    """
+    Top-k PPR recommendations of every seed row, excluding the seed itself.
+
+    popularity_exponent > 0 divides the scores by degree ** popularity_exponent before
+    ranking, which demotes hub papers that every walk passes through.
+
+    Returns:
+    - indices (np.ndarray): (n, k) recommended rows, -1 where fewer than k nodes are reachable.
+    - scores (np.ndarray): (n, k) float32 (degree-adjusted) PPR scores.
+    """
+    transposed, dangling = ppr_operator(graph, directed)
+    degree_penalty = None
+    if popularity_exponent:
+        degree = np.maximum(np.diff(transposed.indptr), 1).astype(np.float32)
+        degree_penalty = degree ** -popularity_exponent
+
+    seed_rows = np.asarray(seed_rows)
+    k = min(k, graph.num_nodes - 1)
+    indices = np.full((len(seed_rows), k), -1, dtype=np.int64)
+    scores = np.zeros((len(seed_rows), k), dtype=np.float32)
+    for start in range(0, len(seed_rows), block_size):
+        block = seed_rows[start:start + block_size]
+        ppr, iterations = personalized_pagerank(transposed, dangling, block, alpha, tol, max_iter)
+        ppr = ppr.T
+        if degree_penalty is not None:
+            ppr *= degree_penalty
+        ppr[np.arange(len(block)), block] = -np.inf
+        block_indices, block_scores = top_k_rows(ppr, k)
+        unreached = ~(block_scores > 0)
+        block_indices[unreached] = -1
+        block_scores[unreached] = 0
+        indices[start:start + len(block)] = block_indices
+        scores[start:start + len(block)] = block_scores
+        print(f"Processed {start + len(block)} out of {len(seed_rows)} seeds ({iterations} iterations)...")
+    return indices, scores
+
+
+def run_ppr_recommender(
+    input_file="experiments/weighted_paper_citation_network.txt",
+    output_file="experiments/results/ppr_top10_with_score.txt",
+    weighted=True,
+    baseline_file=None,
+    num_samples=1000,
+    top_k=10,
+    alpha=0.15,
+    tol=1e-4,
+    max_iter=100,
+    block_size=256,
+    directed=False,
+    popularity_exponent=0.0,
+    seed=42,
+    output_format="text"
+):
+    """
+    Write PPR recommendations in the format of run_citation_recommender, with PPR scores in
+    place of cosine similarities. With baseline_file, the query papers of that recommendation
+    file are used, so the result can be compared with the embedding recommender.
+    """
+    os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+    with tempfile.TemporaryDirectory() as csr_dir:
+        print("Step 1: Building the CSR graph...")
+        graph = build_csr_files(input_file, csr_dir, weighted=weighted)
+        print(f"Total nodes in the graph: {graph.num_nodes}")
+        print(f"Total edges in the graph: {graph.num_edges}")
+
+        print("Step 2: Selecting query papers...")
+        query_rows = select_query_rows(graph, num_samples, seed, baseline_file)
+        print("Sampled nodes count:", len(query_rows))
+
+        print("Step 3: Running personalized PageRank...")
+        indices, scores = ppr_top_k(graph, query_rows, top_k, alpha, tol, max_iter, block_size, directed,
+                                    popularity_exponent)
+        write_results(output_file, graph.node_ids, query_rows, indices, scores, output_format)
+    print(f"Recommendations stored in {output_file}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recommend papers by personalized PageRank.")
+    parser.add_argument("input_file")
+    parser.add_argument("output_file")
+    parser.add_argument("--weighted", action="store_true")
+    parser.add_argument("--baseline-file", help="Recommendation file whose query papers are reused.")
+    parser.add_argument("--num-samples", type=int, default=1000)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--alpha", type=float, default=0.15)
+    parser.add_argument("--block-size", type=int, default=256)
+    parser.add_argument("--directed", action="store_true", help="Follow citations only, not citing papers.")
+    parser.add_argument("--popularity-exponent", type=float, default=0.0)
+    parser.add_argument("--output-format", choices=["text", "binary"], default="text")
+    args = parser.parse_args()
+
+    run_ppr_recommender(args.input_file, args.output_file, args.weighted, args.baseline_file, args.num_samples,
+                        args.top_k, args.alpha, block_size=args.block_size, directed=args.directed,
+                        popularity_exponent=args.popularity_exponent, output_format=args.output_format)
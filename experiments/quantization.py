@@ -0,0 +1,250 @@
+import argparse
+import time
+
+import numpy as np
+import scipy.sparse as sp
+
+from experiments.similarity_search import merge_top_k, normalize_embeddings, top_k_similar
+
+"""
+Quantized embedding storage with matching top-k search kernels.
+
+Embeddings are L2-normalized and then stored as
+- float16: 2 bytes per dimension,
+- int8 scalar quantization: 1 byte per dimension, with a per-dimension offset and scale,
+- product quantization (PQ): the vector is split into m sub-vectors, each replaced by the
+  1-byte ID of its nearest of 256 k-means centroids, i.e. m bytes per vector.
+
+Queries stay in full precision (asymmetric search). Scores against the database are computed
+block by block and a running top-k is merged across blocks, so search never materializes a
+float32 copy of the database. float16 and int8 blocks are converted to float32 for the BLAS
+product: NumPy has no fast integer matmul (int32 products are ~30x slower than float32), and
+the conversion of a block costs far less than the product. PQ codes are never decoded: every
+query gets a lookup table of its inner products with all centroids, and a database score is
+the sum of m table entries, computed for a whole block as one sparse one-hot x table product.
+
+The gain is memory: 2x (float16), 4x (int8) or, for 64 dimensions, 32x (PQ, 8 bytes) below
+float32, plus the codebooks; twice that below a float64 matrix. Query
+throughput stays close to float32 search, since selecting the top k of every score row costs
+as much as computing the scores; evaluate_quantization reports both.
+
+Run from the repository root to compare memory and recall@k against full precision:
+    python -m experiments.quantization experiments/embeddings/baseline
+"""
+
+
+class QuantizedIndex:
+    """
+    Base class of the quantized indexes. Subclasses implement _score_block.
+    """
+
+    def __len__(self):
+        return self.size
+
+    def _score_block(self, queries, start, stop):
+        raise NotImplementedError
+
+    def search(self, queries, k=10, query_rows=None, block_size=1024, db_block=65536):
+        """
+        Top-k inner-product search.
+
+        Parameters:
+        - queries (np.ndarray): (n, d) normalized query vectors.
+        - k (int): Number of neighbors per query (default: 10).
+        - query_rows (array-like): Database row of every query, excluded from its own results.
+        - block_size (int): Queries scored at once (default: 1024).
+        - db_block (int): Database rows decoded at once (default: 65536).
+
+        Returns:
+        - indices (np.ndarray): (n, k) database rows, best first.
+        - scores (np.ndarray): (n, k) approximate cosine similarities.
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        k = min(k, self.size - (1 if query_rows is not None else 0))
+        indices = np.empty((len(queries), k), dtype=np.int64)
+        scores = np.empty((len(queries), k), dtype=np.float32)
+        for q_start in range(0, len(queries), block_size):
+            block = queries[q_start:q_start + block_size]
+            best_indices = np.empty((len(block), 0), dtype=np.int64)
+            best_scores = np.empty((len(block), 0), dtype=np.float32)
+            for start in range(0, self.size, db_block):
+                stop = min(start + db_block, self.size)
+                block_scores = self._score_block(block, start, stop)
+                if query_rows is not None:
+                    rows = np.asarray(query_rows[q_start:q_start + len(block)])
+                    inside = (rows >= start) & (rows < stop)
+                    block_scores[np.flatnonzero(inside), rows[inside] - start] = -np.inf
+                best_indices, best_scores = merge_top_k(best_indices, best_scores, block_scores, start, k)
+            indices[q_start:q_start + len(block)] = best_indices
+            scores[q_start:q_start + len(block)] = best_scores
+        return indices, scores
+
+
+class Float16Index(QuantizedIndex):
+
+    def __init__(self, normalized):
+        self.codes = np.asarray(normalized, dtype=np.float16)
+        self.size = len(self.codes)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes
+
+    def _score_block(self, queries, start, stop):
+        return queries @ self.codes[start:stop].astype(np.float32).T
+
+
+class Int8Index(QuantizedIndex):
+    """
+    Per-dimension scalar quantization: x ~ offset + scale * (code + 128), code in int8.
+    """
+
+    def __init__(self, normalized):
+        normalized = np.asarray(normalized, dtype=np.float32)
+        low, high = normalized.min(axis=0), normalized.max(axis=0)
+        self.offset = low
+        self.scale = np.where(high > low, (high - low) / 255, 1).astype(np.float32)
+        codes = np.rint((normalized - self.offset) / self.scale) - 128
+        self.codes = np.clip(codes, -128, 127).astype(np.int8)
+        self.size = len(self.codes)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.offset.nbytes + self.scale.nbytes
+
+    def _score_block(self, queries, start, stop):
+        # q . x = q . offset + (q * scale) . (code + 128)
+        constant = queries @ (self.offset + 128 * self.scale)
+        return (queries * self.scale) @ self.codes[start:stop].astype(np.float32).T + constant[:, None]
+
+
+class PQIndex(QuantizedIndex):
+    """
+    Product quantization with asymmetric distance computation.
+
+    Parameters:
+    - normalized (np.ndarray): (N, d) normalized embeddings; d must be divisible by num_subspaces.
+    - num_subspaces (int): Number of sub-vectors m, i.e. bytes per vector (default: 8).
+    - num_centroids (int): Centroids per subspace, at most 256 (default: 256).
+    - train_size (int): Vectors sampled to train the codebooks (default: 50,000).
+    """
+
+    def __init__(self, normalized, num_subspaces=8, num_centroids=256, train_size=50_000, seed=42):
+        from sklearn.cluster import KMeans
+
+        normalized = np.asarray(normalized, dtype=np.float32)
+        n, d = normalized.shape
+        if d % num_subspaces:
+            raise ValueError(f"Embedding dimension {d} is not divisible by {num_subspaces} subspaces")
+        num_centroids = min(num_centroids, 256, n)
+        self.num_subspaces = num_subspaces
+        self.sub_dim = d // num_subspaces
+        self.size = n
+
+        rng = np.random.default_rng(seed)
+        train = normalized[rng.choice(n, size=min(train_size, n), replace=False)]
+        self.codebooks = np.empty((num_subspaces, num_centroids, self.sub_dim), dtype=np.float32)
+        self.codes = np.empty((n, num_subspaces), dtype=np.uint8)
+        for j in range(num_subspaces):
+            columns = slice(j * self.sub_dim, (j + 1) * self.sub_dim)
+            kmeans = KMeans(n_clusters=num_centroids, n_init=1, random_state=seed).fit(train[:, columns])
+            self.codebooks[j] = kmeans.cluster_centers_
+            self.codes[:, j] = kmeans.predict(normalized[:, columns])
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.codebooks.nbytes
+
+    def _score_block(self, queries, start, stop):
+        # Lookup tables: inner product of every query sub-vector with every centroid
+        sub_queries = queries.reshape(len(queries), self.num_subspaces, self.sub_dim)
+        tables = np.einsum("qjd,jcd->qjc", sub_queries, self.codebooks).reshape(len(queries), -1)
+        # Summing m table entries per row is a product with the one-hot matrix of the codes
+        num_centroids = self.codebooks.shape[1]
+        columns = (self.codes[start:stop] + np.arange(self.num_subspaces) * num_centroids).ravel()
+        one_hot = sp.csr_matrix((np.ones(len(columns), dtype=np.float32), columns,
+                                 np.arange(0, len(columns) + 1, self.num_subspaces)),
+                                shape=(stop - start, tables.shape[1]))
+        return np.ascontiguousarray((one_hot @ tables.T).T)
+
+
+QUANTIZERS = {"float16": Float16Index, "int8": Int8Index, "pq": PQIndex}
+
+
+def quantize_embeddings(embeddings, method="int8", **kwargs):
+    """
+    Normalize an embedding matrix (e.g. the output of run_citation_recommender) and quantize it.
+
+    Parameters:
+    - embeddings (np.ndarray): (N, d) embedding matrix.
+    - method (str): "float16", "int8" or "pq".
+    - kwargs: Passed to the index, e.g. num_subspaces for "pq".
+    """
+    if method not in QUANTIZERS:
+        raise ValueError(f"Unknown quantization {method!r}; expected one of {', '.join(QUANTIZERS)}")
+    return QUANTIZERS[method](normalize_embeddings(embeddings), **kwargs)
+
+
+def recall_at_k(exact_indices, approx_indices):
+    """
+    Mean fraction of the exact top-k neighbors that the approximate search also returned.
+    """
+    k = exact_indices.shape[1]
+    return float(np.mean([len(set(e) & set(a)) / k for e, a in zip(exact_indices, approx_indices)]))
+
+
+def evaluate_quantization(embeddings, methods=("float16", "int8", "pq"), k=10, num_queries=1000, seed=42,
+                          **kwargs):
+    """
+    Compare quantized indexes with full-precision search.
+
+    Returns:
+    - report (list): One dict per method with its memory, compression ratio against the
+      embedding matrix at its own dtype, recall@k and query throughput. The first entry is
+      exact search over the normalized float32 matrix.
+    """
+    normalized = normalize_embeddings(embeddings)
+    rng = np.random.default_rng(seed)
+    query_rows = rng.choice(len(normalized), size=min(num_queries, len(normalized)), replace=False)
+    start = time.perf_counter()
+    exact, _ = top_k_similar(normalized, query_rows, k)
+    elapsed = time.perf_counter() - start
+    full_bytes = np.asarray(embeddings).nbytes
+
+    report = [{
+        "method": "float32",
+        "bytes": normalized.nbytes,
+        "compression": full_bytes / normalized.nbytes,
+        f"recall@{k}": 1.0,
+        "queries_per_s": len(query_rows) / elapsed,
+    }]
+    for method in methods:
+        index = quantize_embeddings(embeddings, method, **(kwargs if method == "pq" else {}))
+        start = time.perf_counter()
+        approx, _ = index.search(normalized[query_rows], k, query_rows=query_rows)
+        elapsed = time.perf_counter() - start
+        report.append({
+            "method": method,
+            "bytes": index.nbytes,
+            "compression": full_bytes / index.nbytes,
+            f"recall@{k}": recall_at_k(exact, approx),
+            "queries_per_s": len(query_rows) / elapsed,
+        })
+    return report
+
+
+if __name__ == "__main__":
+    from experiments.citation_graph_local_run import load_embeddings
+
+    parser = argparse.ArgumentParser(description="Report memory and recall@k of quantized embeddings.")
+    parser.add_argument("embeddings_dir", help="Directory written by save_embeddings.")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--num-queries", type=int, default=1000)
+    parser.add_argument("--num-subspaces", type=int, default=8)
+    args = parser.parse_args()
+
+    _, embeddings, _ = load_embeddings(args.embeddings_dir)
+    for row in evaluate_quantization(embeddings, k=args.k, num_queries=args.num_queries,
+                                     num_subspaces=args.num_subspaces):
+        print(f"{row['method']:8s} {row['bytes'] / 2 ** 20:8.2f} MB  {row['compression']:5.1f}x  "
+              f"recall@{args.k} {row[f'recall@{args.k}']:.3f}  {row['queries_per_s']:.0f} queries/s")
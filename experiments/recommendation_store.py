@@ -0,0 +1,199 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from experiments.similarity_search import format_recommendation
+
+"""
+Binary container for top-k recommendation results.
+
+A recommendation store is a directory with
+- queries.i32: int32 row of every query node in the ID table,
+- indices.i32: int32 (n, k) rows of the recommended nodes, -1 where fewer than k were found,
+- similarities.f32: float32 (n, k) cosine similarities,
+- node_ids.txt: the ID table, one node per line,
+- meta.json: k and the number of query rows written, updated after every chunk.
+
+The matrices are raw little-endian arrays, so a writer can append chunks as they are
+computed and a reader memory-maps them without parsing. A chunk counts once meta.json
+records it; bytes of an interrupted chunk are truncated when the store is appended to.
+The "Node ==> Rec1:sim1, ..." text format is an on-demand export:
+    python -m experiments.recommendation_store experiments/results/baseline_top10 baseline_top10.txt
+"""
+
+META_FILE = "meta.json"
+QUERIES_FILE = "queries.i32"
+INDICES_FILE = "indices.i32"
+SIMILARITIES_FILE = "similarities.f32"
+NODE_IDS_FILE = "node_ids.txt"
+
+
+def is_recommendation_store(path):
+    return os.path.isfile(os.path.join(path, META_FILE))
+
+
+class RecommendationWriter:
+    """
+    Append top-k results to a recommendation store in chunks.
+
+    Parameters:
+    - directory (str): Store directory.
+    - node_list (list): ID table; query rows and recommended indices refer to it.
+    - k (int): Recommendations per query.
+    - append (bool): Continue an existing store instead of replacing it (default: False).
+      The ID table and k must match the existing store.
+
+    Use as a context manager, or call close() to close the files.
+    """
+
+    def __init__(self, directory, node_list, k, append=False):
+        self.directory = directory
+        self.k = k
+        os.makedirs(directory, exist_ok=True)
+        self.count = 0
+        node_ids = [str(node) for node in node_list]
+        if append and is_recommendation_store(directory):
+            with open(os.path.join(directory, META_FILE)) as f:
+                meta = json.load(f)
+            with open(os.path.join(directory, NODE_IDS_FILE), encoding='utf-8') as f:
+                stored_ids = [line.rstrip("\n") for line in f]
+            if meta["k"] != k:
+                raise ValueError(f"Cannot append k={k} results to {directory}, which holds k={meta['k']}")
+            if stored_ids != node_ids:
+                raise ValueError(f"Cannot append to {directory}: its ID table differs from node_list")
+            self.count = meta["count"]
+            # Drop the bytes of a chunk that was written but not recorded in meta.json
+            for name, row_bytes in ((QUERIES_FILE, 4), (INDICES_FILE, 4 * k), (SIMILARITIES_FILE, 4 * k)):
+                os.truncate(os.path.join(directory, name), self.count * row_bytes)
+            mode = "ab"
+        else:
+            with open(os.path.join(directory, NODE_IDS_FILE), 'w', encoding='utf-8') as f:
+                f.writelines(f"{node}\n" for node in node_ids)
+            mode = "wb"
+        self.num_nodes = len(node_list)
+        self.files = [open(os.path.join(directory, name), mode)
+                      for name in (QUERIES_FILE, INDICES_FILE, SIMILARITIES_FILE)]
+        self._write_meta()
+
+    def write(self, query_rows, indices, similarities):
+        """
+        Append one chunk: query_rows (n,), indices (n, k) and similarities (n, k).
+        """
+        query_rows, indices = np.asarray(query_rows), np.asarray(indices)
+        if indices.shape != (len(query_rows), self.k):
+            raise ValueError(f"Expected indices of shape ({len(query_rows)}, {self.k}), got {indices.shape}")
+        for f, array, dtype in zip(self.files, (query_rows, indices, similarities), ("<i4", "<i4", "<f4")):
+            f.write(np.ascontiguousarray(array, dtype=dtype).tobytes())
+            f.flush()
+        self.count += len(query_rows)
+        self._write_meta()
+
+    def _write_meta(self):
+        # Write to a temporary file and rename, so readers never see a partial meta.json
+        path = os.path.join(self.directory, META_FILE)
+        with open(path + ".tmp", 'w') as f:
+            json.dump({"k": self.k, "count": self.count, "num_nodes": self.num_nodes}, f)
+        os.replace(path + ".tmp", path)
+
+    def close(self):
+        for f in self.files:
+            f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class RecommendationStore:
+    """
+    Memory-mapped view of a recommendation store.
+    """
+
+    def __init__(self, directory, node_ids, queries, indices, similarities):
+        self.directory = directory
+        self.node_ids = node_ids
+        self.queries = queries
+        self.indices = indices
+        self.similarities = similarities
+
+    @classmethod
+    def load(cls, directory):
+        with open(os.path.join(directory, META_FILE)) as f:
+            meta = json.load(f)
+        with open(os.path.join(directory, NODE_IDS_FILE), encoding='utf-8') as f:
+            node_ids = [line.rstrip("\n") for line in f]
+        count, k = meta["count"], meta["k"]
+
+        def view(name, dtype, shape):
+            if count == 0:
+                return np.empty(shape, dtype=dtype)
+            return np.memmap(os.path.join(directory, name), dtype=dtype, mode="r", shape=shape)
+
+        return cls(directory, node_ids, view(QUERIES_FILE, "<i4", (count,)),
+                   view(INDICES_FILE, "<i4", (count, k)), view(SIMILARITIES_FILE, "<f4", (count, k)))
+
+    def __len__(self):
+        return len(self.queries)
+
+    @property
+    def k(self):
+        return self.indices.shape[1]
+
+    def recommendations(self, i):
+        """
+        Query node and its [(recommended node, similarity), ...] for row i.
+        """
+        filled = self.indices[i] >= 0
+        recs = [(self.node_ids[idx], float(sim))
+                for idx, sim in zip(self.indices[i][filled], self.similarities[i][filled])]
+        return self.node_ids[self.queries[i]], recs
+
+    def export_text(self, output_file):
+        """
+        Write the store in the text format of run_citation_recommender.
+        """
+        with open(output_file, 'w', encoding='utf-8') as out:
+            for i in range(len(self)):
+                node, recs = self.recommendations(i)
+                out.write(format_recommendation(node, [rec for rec, _ in recs], [sim for _, sim in recs]))
+        return len(self)
+
+
+def save_recommendations(directory, node_list, query_rows, indices, similarities):
+    """
+    Write a complete recommendation store in one chunk.
+    """
+    with RecommendationWriter(directory, node_list, np.asarray(indices).shape[1]) as writer:
+        writer.write(query_rows, indices, similarities)
+
+
+def write_results(output_file, node_list, query_rows, indices, scores, output_format="text"):
+    """
+    Write top-k results of any engine as a text recommendation file or, with output_format
+    "binary", as a recommendation store directory. Entries with index -1 are left out.
+    """
+    if output_format == "binary":
+        save_recommendations(output_file, node_list, query_rows, indices, scores)
+        return
+    if output_format != "text":
+        raise ValueError(f"Unknown output format {output_format!r}; expected 'text' or 'binary'")
+    with open(output_file, 'w', encoding='utf-8') as out:
+        for row, rec_rows, rec_scores in zip(query_rows, np.asarray(indices), np.asarray(scores)):
+            filled = rec_rows >= 0
+            out.write(format_recommendation(node_list[row], [node_list[i] for i in rec_rows[filled]],
+                                            rec_scores[filled]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export a recommendation store to the text format.")
+    parser.add_argument("store_dir")
+    parser.add_argument("output_file")
+    args = parser.parse_args()
+
+    written = RecommendationStore.load(args.store_dir).export_text(args.output_file)
+    print(f"Recommendations for {written} nodes exported to {args.output_file}")
@@ -0,0 +1,120 @@
+import numpy as np
+
+"""
+Popularity-penalized re-ranking of retrieved candidates.
+
+Retrieval returns the top-M most similar papers of every query; re-ranking then picks the
+final top-k from those candidates with a score that penalizes highly cited papers:
+
+    score = similarity - penalty * log(1 + in_degree) / log(1 + max in_degree)
+
+The popularity term is scaled to [0, 1], so penalty is expressed in units of cosine
+similarity. Optionally, a Maximal Marginal Relevance (MMR) step trades the score off against
+the similarity to the candidates already picked:
+
+    mmr = (1 - diversity) * score - diversity * max similarity to the selected candidates
+
+Everything is computed for a whole batch of queries at once with NumPy, so the debiasing
+strength can be tuned on fixed candidates without retraining or re-retrieving.
+"""
+
+
+def popularity_penalty_scores(candidate_indices, candidate_similarities, in_degree, penalty):
+    """
+    Penalize candidate similarities by the log in-degree of the candidates.
+
+    Parameters:
+    - candidate_indices (np.ndarray): (n, M) candidate rows, -1 for empty slots.
+    - candidate_similarities (np.ndarray): (n, M) cosine similarities of the candidates.
+    - in_degree (np.ndarray): In-degree (citation count) of every row.
+    - penalty (float): Strength of the popularity penalty.
+
+    Returns:
+    - scores (np.ndarray): (n, M) penalized scores, -inf for empty slots.
+    """
+    log_degree = np.log1p(np.asarray(in_degree, dtype=np.float64))
+    scale = log_degree.max() if len(log_degree) and log_degree.max() > 0 else 1.0
+    popularity = log_degree[np.maximum(candidate_indices, 0)] / scale
+    scores = candidate_similarities - penalty * popularity
+    return np.where(candidate_indices >= 0, scores, -np.inf)
+
+
+def mmr_select(scores, candidate_vectors, k, diversity):
+    """
+    Greedily pick k candidates per query by Maximal Marginal Relevance.
+
+    Parameters:
+    - scores (np.ndarray): (n, M) relevance scores, -inf for unusable candidates.
+    - candidate_vectors (np.ndarray): (n, M, d) normalized candidate embeddings.
+    - k (int): Number of candidates to pick.
+    - diversity (float): Weight of the redundancy term, between 0 and 1.
+
+    Returns:
+    - picks (np.ndarray): (n, k) positions into the candidate axis, in pick order; -1 for the
+      steps at which no usable candidate was left.
+    """
+    n, m = scores.shape
+    k = min(k, m)
+    pairwise = np.einsum("nid,njd->nij", candidate_vectors, candidate_vectors)
+    redundancy = np.zeros((n, m))
+    available = np.isfinite(scores)
+    picks = np.empty((n, k), dtype=np.int64)
+    rows = np.arange(n)
+    for step in range(k):
+        mmr = (1 - diversity) * scores - diversity * redundancy
+        mmr[~available] = -np.inf
+        choice = np.argmax(mmr, axis=1)
+        picks[:, step] = np.where(available.any(axis=1), choice, -1)
+        available[rows, choice] = False
+        redundancy = np.maximum(redundancy, pairwise[rows, choice])
+    return picks
+
+
+def rerank(candidate_indices, candidate_similarities, in_degree, k=10, penalty=0.0, diversity=0.0,
+           normalized=None, block_size=1024):
+    """
+    Re-rank retrieved candidates by popularity-penalized similarity and optional MMR diversity.
+
+    Parameters:
+    - candidate_indices (np.ndarray): (n, M) candidate rows from top_k_similar, -1 for empty slots.
+    - candidate_similarities (np.ndarray): (n, M) their cosine similarities.
+    - in_degree (np.ndarray): In-degree of every row.
+    - k (int): Number of recommendations to keep (default: 10).
+    - penalty (float): Popularity penalty strength (default: 0.0, no penalty).
+    - diversity (float): MMR redundancy weight in [0, 1] (default: 0.0, no diversification).
+    - normalized (np.ndarray): Row-normalized embeddings, required when diversity > 0.
+    - block_size (int): Queries diversified at once, bounding the (block_size, M, M) similarity
+      and (block_size, M, d) candidate arrays (default: 1024).
+
+    Returns:
+    - indices (np.ndarray): (n, k) re-ranked rows, -1 for empty slots.
+    - similarities (np.ndarray): (n, k) cosine similarities of the re-ranked rows.
+    """
+    scores = popularity_penalty_scores(candidate_indices, candidate_similarities, in_degree, penalty)
+    k = min(k, scores.shape[1])
+    if diversity > 0:
+        if normalized is None:
+            raise ValueError("normalized embeddings are required for diversity re-ranking")
+        picks = np.empty((scores.shape[0], k), dtype=np.int64)
+        for start in range(0, scores.shape[0], block_size):
+            stop = start + block_size
+            vectors = normalized[np.maximum(candidate_indices[start:stop], 0)]
+            picks[start:stop] = mmr_select(scores[start:stop], vectors, k, diversity)
+    else:
+        picks = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+
+    unpicked = picks < 0
+    picks = np.maximum(picks, 0)
+    indices = np.take_along_axis(candidate_indices, picks, axis=1)
+    similarities = np.take_along_axis(candidate_similarities, picks, axis=1)
+    empty = unpicked | ~np.isfinite(np.take_along_axis(scores, picks, axis=1))
+    indices[empty] = -1
+    return indices, similarities
+
+
+def in_degree_array(G, node_list):
+    """
+    In-degree of every node of node_list in the graph G (0 for nodes not in G).
+    """
+    in_degree = G.in_degree()
+    return np.array([in_degree[node] if node in G else 0 for node in node_list], dtype=np.int64)
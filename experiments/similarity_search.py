@@ -0,0 +1,176 @@
+import numpy as np
+
+"""
+Blocked cosine top-k search over an embedding matrix.
+
+Embeddings are L2-normalized once, so cosine similarity becomes a plain matrix product.
+Queries are processed in blocks: each block is multiplied against the whole matrix and the
+k best columns of every row are selected with argpartition, keeping memory at
+block_size x N instead of N x N.
+
+top_k_similar_streamed additionally splits the embedding matrix into row blocks and merges a
+running top-k across them, so a memory-mapped matrix larger than RAM is searched with a
+working set of block_size x db_block scores.
+
+Candidates can be filtered inside the block before selection: the query itself, the papers
+it already cites (a sparse N x N mask, usually the citation graph) and papers published after
+it (a per-row year array). Masked scores are set to -inf, so the selection still returns k
+eligible candidates whenever k exist.
+"""
+
+UNKNOWN_YEAR = -1
+
+
+def normalize_embeddings(embeddings, dtype=np.float32):
+    """
+    Return the row-wise L2-normalized embedding matrix. Zero rows stay zero.
+    """
+    embeddings = np.asarray(embeddings, dtype=dtype)
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return embeddings / norms
+
+
+def top_k_rows(scores, k):
+    """
+    Return the column indices and values of the k largest entries of every row, best first.
+    """
+    k = min(k, scores.shape[1])
+    if k < scores.shape[1]:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1), np.take_along_axis(candidate_scores, order, axis=1)
+
+
+def merge_top_k(best_indices, best_scores, block_scores, start, k):
+    """
+    Merge the scores of the database rows start, start + 1, ... into a running top-k.
+
+    Returns:
+    - best_indices (np.ndarray): (n, k) database rows of the merged top-k, best first.
+    - best_scores (np.ndarray): Their scores.
+    """
+    merged_scores = np.concatenate([best_scores, block_scores], axis=1)
+    merged_indices = np.concatenate(
+        [best_indices, np.broadcast_to(np.arange(start, start + block_scores.shape[1]), block_scores.shape)], axis=1)
+    positions, best_scores = top_k_rows(merged_scores, k)
+    return np.take_along_axis(merged_indices, positions, axis=1), best_scores
+
+
+def top_k_similar(normalized, query_indices, k=10, block_size=1024, exclude_self=True,
+                  exclude_mask=None, years=None):
+    """
+    Find the k most cosine-similar rows for each query row.
+
+    Parameters:
+    - normalized (np.ndarray): Row-normalized embedding matrix (N x d).
+    - query_indices (array-like): Row indices of the query nodes.
+    - k (int): Number of neighbors per query (default: 10).
+    - block_size (int): Number of queries multiplied at once (default: 1024).
+    - exclude_self (bool): Whether a query may be returned as its own neighbor (default: True).
+    - exclude_mask (scipy.sparse matrix): N x N matrix whose nonzero (i, j) entries exclude
+      row j from the results of query i, e.g. the citation graph (default: None).
+    - years (np.ndarray): Publication year of every row, UNKNOWN_YEAR if unknown. When given,
+      rows published after the query are excluded (default: None).
+
+    Returns:
+    - indices (np.ndarray): (len(query_indices), k) neighbor row indices, most similar first.
+      Slots that could not be filled because fewer than k rows are eligible hold -1.
+    - similarities (np.ndarray): Matching cosine similarities (-inf for unfilled slots).
+    """
+    query_indices = np.asarray(query_indices, dtype=np.int64)
+    if exclude_mask is not None:
+        # scipy is only needed for masks, so plain lookups import NumPy alone
+        import scipy.sparse as sp
+        exclude_mask = sp.csr_matrix(exclude_mask)
+    k = min(k, normalized.shape[0] - (1 if exclude_self else 0))
+    indices = np.empty((len(query_indices), k), dtype=np.int64)
+    similarities = np.empty((len(query_indices), k), dtype=normalized.dtype)
+    for start in range(0, len(query_indices), block_size):
+        block = query_indices[start:start + block_size]
+        rows = np.arange(len(block))
+        scores = normalized[block] @ normalized.T
+        if exclude_self:
+            scores[rows, block] = -np.inf
+        if exclude_mask is not None:
+            excluded = exclude_mask[block]
+            scores[np.repeat(rows, np.diff(excluded.indptr)), excluded.indices] = -np.inf
+        if years is not None:
+            query_years = years[block][:, None]
+            future = (years[None, :] > query_years) & (query_years != UNKNOWN_YEAR)
+            scores[future] = -np.inf
+        block_indices, block_similarities = top_k_rows(scores, k)
+        block_indices[np.isneginf(block_similarities)] = -1
+        indices[start:start + len(block)] = block_indices
+        similarities[start:start + len(block)] = block_similarities
+    return indices, similarities
+
+
+def top_k_similar_streamed(normalized, query_indices, k=10, block_size=64, db_block=65536, exclude_self=True):
+    """
+    top_k_similar for a (memory-mapped) embedding matrix that need not fit in memory.
+
+    The matrix is read db_block rows at a time for every block of block_size queries, and
+    each query keeps a running top-k, so memory stays at block_size x (db_block + k) scores
+    plus one matrix block regardless of N. Results match top_k_similar without filters.
+    """
+    query_indices = np.asarray(query_indices, dtype=np.int64)
+    num_rows = normalized.shape[0]
+    k = min(k, num_rows - (1 if exclude_self else 0))
+    indices = np.empty((len(query_indices), k), dtype=np.int64)
+    similarities = np.empty((len(query_indices), k), dtype=normalized.dtype)
+    for q_start in range(0, len(query_indices), block_size):
+        block = query_indices[q_start:q_start + block_size]
+        queries = np.asarray(normalized[block])
+        best_indices = np.empty((len(block), 0), dtype=np.int64)
+        best_scores = np.empty((len(block), 0), dtype=normalized.dtype)
+        for start in range(0, num_rows, db_block):
+            stop = min(start + db_block, num_rows)
+            scores = queries @ np.asarray(normalized[start:stop]).T
+            if exclude_self:
+                inside = (block >= start) & (block < stop)
+                scores[np.flatnonzero(inside), block[inside] - start] = -np.inf
+            best_indices, best_scores = merge_top_k(best_indices, best_scores, scores, start, k)
+        best_indices[np.isneginf(best_scores)] = -1
+        indices[q_start:q_start + len(block)] = best_indices
+        similarities[q_start:q_start + len(block)] = best_scores
+    return indices, similarities
+
+
+def build_citation_mask(G, node_to_idx):
+    """
+    Build the sparse N x N matrix with a 1 at (citing, cited) for every edge of G whose
+    endpoints both have an embedding row.
+    """
+    import scipy.sparse as sp
+
+    rows, cols = [], []
+    for src, dst in G.edges():
+        if src in node_to_idx and dst in node_to_idx:
+            rows.append(node_to_idx[src])
+            cols.append(node_to_idx[dst])
+    n = len(node_to_idx)
+    return sp.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(n, n))
+
+
+def build_year_array(node_list, id_to_year):
+    """
+    Build the int16 publication year of every row from a paper ID -> year (str or int) mapping.
+    """
+    years = np.full(len(node_list), UNKNOWN_YEAR, dtype=np.int16)
+    for idx, node in enumerate(node_list):
+        year = id_to_year.get(node)
+        if year not in (None, ""):
+            years[idx] = int(year)
+    return years
+
+
+def format_recommendation(node, rec_nodes, similarities):
+    """
+    Format one line of the recommendation file: Node ==> Rec1:sim1, Rec2:sim2, ...
+    """
+    rec_str = ", ".join([f"{rec_node}:{similarity:.4f}" for rec_node, similarity in zip(rec_nodes, similarities)])
+    return f"{node} ==> {rec_str}\n"
@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import tempfile
+
+import numpy as np
+import scipy.sparse as sp
+
+from experiments.csr_graph import CSRGraph, build_csr_files, load_csr
+from experiments.similarity_search import UNKNOWN_YEAR
+
+"""
+Temporal snapshot index of the citation graph.
+
+The index is a CSR graph (see csr_graph.py) whose rows are ordered by publication year, so
+the citations made by papers published up to year Y are exactly the first indptr[r_Y] edges,
+where r_Y is the number of papers published up to Y. A snapshot "as of Y" is therefore a
+prefix of the arrays: csr_view(Y) wraps the prefix without copying, and snapshot(Y) returns a
+CSRGraph over the papers published up to Y, copying only to drop citations of papers
+published later. Papers without a known year are placed after all others and never appear
+in a snapshot.
+
+Cumulative in-degrees are maintained incrementally: iter_in_degree adds the citations of one
+year at a time to a running count, so hub growth over all years costs one pass over the edges.
+
+Build once from the repository root:
+    python -m experiments.temporal_index data/2014/networks/paper_citation_network.txt \
+        weight_reaccessment_of_edges/paper_ids.txt data/temporal_index
+"""
+
+NODE_YEARS_FILE = "node_years.npy"
+
+
+class TemporalCitationIndex:
+    """
+    A year-ordered CSRGraph plus the publication year of every row.
+    """
+
+    def __init__(self, graph, node_years):
+        self.graph = graph
+        self.node_years = node_years
+        known = node_years[node_years != UNKNOWN_YEAR]
+        self.years = np.unique(known)
+        self.num_known = len(known)
+
+    @classmethod
+    def load(cls, directory, mmap_mode="r"):
+        return cls(load_csr(directory, mmap_mode), np.load(os.path.join(directory, NODE_YEARS_FILE),
+                                                           mmap_mode=mmap_mode))
+
+    @property
+    def node_ids(self):
+        return self.graph.node_ids
+
+    def num_papers(self, year):
+        """
+        Number of papers published up to and including year, i.e. the rows of its snapshot.
+        """
+        return int(np.searchsorted(self.node_years[:self.num_known], year, side="right"))
+
+    def num_citations(self, year):
+        """
+        Number of citations made by papers published up to and including year.
+        """
+        return int(self.graph.indptr[self.num_papers(year)])
+
+    def csr_view(self, year):
+        """
+        Citations made up to year as a num_papers(year) x N scipy CSR matrix sharing the index arrays.
+        Columns still range over all papers, including cited papers published later.
+        """
+        rows = self.num_papers(year)
+        edges = int(self.graph.indptr[rows])
+        data = self.graph.weights[:edges] if self.graph.weights is not None else np.ones(edges, dtype=np.float32)
+        return sp.csr_matrix((data, self.graph.indices[:edges], self.graph.indptr[:rows + 1]),
+                             shape=(rows, self.graph.num_nodes), copy=False)
+
+    def snapshot(self, year):
+        """
+        The citation graph as of year: papers published up to year and the citations between them.
+
+        The arrays are prefixes of the index when no paper cites a later one; otherwise those
+        citations are filtered out in O(citations up to year).
+        """
+        rows = self.num_papers(year)
+        indptr = self.graph.indptr[:rows + 1]
+        edges = int(indptr[-1])
+        indices = self.graph.indices[:edges]
+        weights = self.graph.weights[:edges] if self.graph.weights is not None else None
+        cumweights = self.graph.cumweights[:edges] if self.graph.cumweights is not None else None
+        later = indices >= rows
+        if later.any():
+            keep = ~later
+            edge_rows = np.repeat(np.arange(rows), np.diff(indptr))
+            indptr = np.concatenate([[0], np.cumsum(np.bincount(edge_rows[keep], minlength=rows))])
+            indices = indices[keep]
+            if weights is not None:
+                weights = weights[keep]
+                cumweights = np.cumsum(weights, dtype=np.float64)
+        return CSRGraph(indptr, indices, self.graph.node_ids[:rows], weights, cumweights)
+
+    def in_degree_as_of(self, year):
+        """
+        Citations received by every paper from papers published up to year (length N).
+        """
+        return np.bincount(self.graph.indices[:self.num_citations(year)], minlength=self.graph.num_nodes)
+
+    def iter_in_degree(self, start_year=None, end_year=None):
+        """
+        Yield (year, in_degree) for every year with publications, updating one running array.
+        The yielded array is reused between years; copy it to keep a year's counts.
+        """
+        in_degree = np.zeros(self.graph.num_nodes, dtype=np.int64)
+        done = 0
+        for year in self.years:
+            if end_year is not None and year > end_year:
+                break
+            edges = self.num_citations(year)
+            in_degree += np.bincount(self.graph.indices[done:edges], minlength=self.graph.num_nodes)
+            done = edges
+            if start_year is None or year >= start_year:
+                yield int(year), in_degree
+
+
+def build_temporal_index(input_file, output_dir, id_to_year=None, paper_ids_file=None, metadata_dir=None,
+                         weighted=False):
+    """
+    Build a TemporalCitationIndex from a citation network file.
+
+    Publication years come from id_to_year ({paper ID: year}), a metadata store (metadata_dir)
+    or the tab-separated paper_ids_file.
+    """
+    from experiments.similarity_search import build_year_array
+
+    with tempfile.TemporaryDirectory() as csr_dir:
+        graph = build_csr_files(input_file, csr_dir, weighted=weighted)
+        node_ids = graph.node_ids
+        if id_to_year is not None:
+            years = build_year_array(node_ids, id_to_year)
+        elif metadata_dir is not None:
+            from data_preparation.metadata_store import PaperMetadata
+            years = PaperMetadata.load(metadata_dir).years_of(node_ids).astype(np.int16)
+        elif paper_ids_file is not None:
+            from weight_reaccessment_of_edges.adjust_edge_weight import generate_year_dictionary
+            years = build_year_array(node_ids, generate_year_dictionary(paper_ids_file))
+        else:
+            raise ValueError("build_temporal_index requires id_to_year, metadata_dir or paper_ids_file")
+
+        # New row order: known years ascending, unknown last, ties in original order
+        sort_key = np.where(years == UNKNOWN_YEAR, np.iinfo(np.int16).max, years)
+        order = np.argsort(sort_key, kind="stable")
+        new_row = np.empty_like(order)
+        new_row[order] = np.arange(len(order))
+
+        src = new_row[np.repeat(np.arange(graph.num_nodes), graph.out_degree())]
+        dst = new_row[np.asarray(graph.indices)]
+        edge_order = np.lexsort((dst, src))
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(src, minlength=graph.num_nodes))])
+        weights = np.asarray(graph.weights)[edge_order] if weighted else None
+
+        os.makedirs(output_dir, exist_ok=True)
+        np.save(os.path.join(output_dir, "indptr.npy"), indptr.astype(np.int64))
+        np.save(os.path.join(output_dir, "indices.npy"), dst[edge_order].astype(np.int32))
+        if weighted:
+            np.save(os.path.join(output_dir, "weights.npy"), weights.astype(np.float32))
+            np.save(os.path.join(output_dir, "cumweights.npy"), np.cumsum(weights, dtype=np.float64))
+        np.save(os.path.join(output_dir, NODE_YEARS_FILE), years[order])
+        with open(os.path.join(output_dir, "node_ids.txt"), 'w', encoding='utf-8') as f:
+            for row in order:
+                f.write(f"{node_ids[row]}\n")
+        with open(os.path.join(output_dir, "meta.json"), 'w', encoding='utf-8') as f:
+            json.dump({"num_nodes": graph.num_nodes, "num_edges": graph.num_edges, "weighted": weighted,
+                       "temporal": True}, f)
+    return TemporalCitationIndex.load(output_dir)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a year-ordered snapshot index of a citation network.")
+    parser.add_argument("input_file")
+    parser.add_argument("paper_ids_file", help="Tab-separated 'id, title, year' publication file.")
+    parser.add_argument("output_dir")
+    parser.add_argument("--weighted", action="store_true")
+    args = parser.parse_args()
+
+    index = build_temporal_index(args.input_file, args.output_dir, paper_ids_file=args.paper_ids_file,
+                                 weighted=args.weighted)
+    print(f"Indexed {index.graph.num_edges} citations between {index.graph.num_nodes} papers "
+          f"({index.years[0]}-{index.years[-1]}) in {args.output_dir}")
+    for year, in_degree in index.iter_in_degree():
+        print(f"{year}: {index.num_papers(year)} papers, {index.num_citations(year)} citations, "
+              f"max in-degree {in_degree.max()}")
@@ -0,0 +1,174 @@
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+"""
+Stage-level tracing for the recommender pipeline.
+
+A Tracer opens one span per pipeline stage. Each span records its duration, the process RSS
+at entry and exit, the tracemalloc peak reached inside the span and any counters the stage
+reports (edges parsed, walks generated, ...). Finished spans are appended to a JSON-lines
+trace file, and every top-level profiled span can additionally be dumped as a cProfile file.
+
+Usage:
+    tracer = Tracer("experiments/results/trace.jsonl", profile_dir="experiments/results/profiles")
+    with tracer.span("load") as span:
+        ...
+        span.count("edges_parsed", n)
+
+When tracing is not wanted, NULL_TRACER hands out a shared no-op span, so an instrumented
+stage only pays for one method call and one context manager.
+"""
+
+
+def current_rss_mb():
+    """
+    Return the resident set size of this process in MB.
+    Falls back to the peak RSS on platforms without /proc.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, IndexError):
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and in KB elsewhere
+        return max_rss / 2 ** 20 if sys.platform == "darwin" else max_rss / 2 ** 10
+
+
+class Span:
+    """
+    A single timed stage. Counters are accumulated with count() and written with the span.
+    """
+
+    def __init__(self, name, parent=None):
+        self.name = name
+        self.parent = parent
+        self.counters = {}
+        self.peak_bytes = 0
+        self.profile = None
+
+    def count(self, counter, value=1):
+        self.counters[counter] = self.counters.get(counter, 0) + value
+
+
+class _NullSpan:
+
+    def count(self, counter, value=1):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    """
+    Tracer that records nothing.
+    """
+    enabled = False
+
+    def span(self, name):
+        return _NULL_SPAN
+
+
+NULL_TRACER = NullTracer()
+
+
+class Tracer:
+    """
+    Records spans to a JSON-lines file.
+
+    Parameters:
+    - trace_file (str or Path): JSON-lines file the spans are appended to.
+    - profile_dir (str or Path): If given, every outermost span is profiled with cProfile and
+      dumped to <profile_dir>/<span name>.prof.
+    - trace_memory (bool): Track the tracemalloc peak of every span (default: True). Tracing
+      Python allocations slows allocation-heavy stages down noticeably.
+    """
+    enabled = True
+
+    def __init__(self, trace_file, profile_dir=None, trace_memory=True):
+        self.trace_file = Path(trace_file)
+        self.trace_file.parent.mkdir(parents=True, exist_ok=True)
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        if self.profile_dir:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+        self.trace_memory = trace_memory
+        self._stack = []
+
+    @contextmanager
+    def span(self, name):
+        parent = self._stack[-1] if self._stack else None
+        span = Span(name, parent.name if parent else None)
+
+        started_tracemalloc = False
+        traced_at_start = 0
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                started_tracemalloc = True
+            elif parent is not None:
+                # Keep the parent's peak so far before the peak is reset for this span
+                parent.peak_bytes = max(parent.peak_bytes, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            traced_at_start = tracemalloc.get_traced_memory()[0]
+
+        if self.profile_dir and not any(s.profile for s in self._stack):
+            span.profile = cProfile.Profile()
+
+        self._stack.append(span)
+        rss_start = current_rss_mb()
+        start_time = time.time()
+        start = time.perf_counter()
+        if span.profile:
+            span.profile.enable()
+        try:
+            yield span
+        finally:
+            if span.profile:
+                span.profile.disable()
+            duration = time.perf_counter() - start
+            self._stack.pop()
+
+            if self.trace_memory:
+                span.peak_bytes = max(span.peak_bytes, tracemalloc.get_traced_memory()[1])
+                if parent is not None:
+                    parent.peak_bytes = max(parent.peak_bytes, span.peak_bytes)
+                if started_tracemalloc:
+                    tracemalloc.stop()
+
+            record = {
+                "span": name,
+                "parent": span.parent,
+                "start": start_time,
+                "duration_s": duration,
+                "rss_start_mb": rss_start,
+                "rss_end_mb": current_rss_mb(),
+                # Peak of traced allocations above what was already allocated at span entry
+                "tracemalloc_peak_mb": (span.peak_bytes - traced_at_start) / 2 ** 20 if self.trace_memory else None,
+                "counters": span.counters,
+            }
+            with open(self.trace_file, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+            if span.profile:
+                span.profile.dump_stats(self.profile_dir / f"{name}.prof")
+
+
+def load_trace(trace_file):
+    """
+    Read every span record of a JSON-lines trace file.
+    """
+    with open(trace_file, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
@@ -1,19 +1,165 @@
-from data_preparation import data_download
-from data_visualization import data_preview
-from experiments import citation_graph_local_run
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+"""
+Command line entry point of the paper recommendation system.
+
+    python main.py                          # run every stale pipeline stage
+    python main.py download                 # download and extract the AAN release
+    python main.py preview | reweight       # draw the preview plots / write the weighted network
+    python main.py embed [--weighted]       # train and save node2vec embeddings
+    python main.py recommend [--weighted]   # write the recommendation file of the sampled papers
+    python main.py recommend --nodes C02-1122 P14-1069   # print top-k papers from saved embeddings
+    python main.py evaluate FILE [FILE ...] # similarity spread of recommendation files or stores
+    python main.py pipeline --status        # cached DAG runner (--only, --from, --force, --jobs)
+    python main.py importtime recommend --nodes C02-1122  # where a command spends its import time
+
+Stage commands go through the cached pipeline runner, so they skip work that is up to date
+unless --force is given. Heavy libraries (matplotlib, pandas, networkx, node2vec, gensim,
+scikit-learn) are only imported inside the commands that use them: recommend --nodes and
+evaluate need NumPy alone.
+"""
+
+COMMANDS = ("download", "preview", "reweight", "embed", "recommend", "evaluate", "pipeline", "importtime")
+
+
+def run_stages(stages, force=False, jobs=2):
+    from pipeline.runner import PipelineRunner
+    from pipeline.stages import build_stages
+
+    PipelineRunner(build_stages(), max_workers=jobs).run(only=stages, force=force)
+
+
+def pipeline_command(args):
+    from pipeline.runner import PipelineRunner
+    from pipeline.stages import build_stages
+
+    runner = PipelineRunner(build_stages(), max_workers=args.jobs)
+    if args.status:
+        for name, dependencies, stale in runner.status():
+            state = "stale" if stale else "up to date"
+            print(f"{name:20s} {state:12s} <- {', '.join(dependencies) or '-'}")
+    else:
+        runner.run(only=args.only, start=args.start, force=args.force)
+
+
+def recommend_command(args):
+    from pipeline import stages
+
+    if not args.nodes:
+        run_stages(["recommend_weighted" if args.weighted else "recommend"], args.force, args.jobs)
+        return
+
+    from experiments.citation_graph_local_run import load_embeddings
+    from experiments.similarity_search import normalize_embeddings, top_k_similar, format_recommendation
+
+    embeddings_dir = args.embeddings or (stages.WEIGHTED_EMBEDDINGS if args.weighted else stages.BASELINE_EMBEDDINGS)
+    node_list, embeddings, node_to_idx = load_embeddings(embeddings_dir)
+    unknown = [node for node in args.nodes if node not in node_to_idx]
+    if unknown:
+        print(f"No embedding for: {', '.join(unknown)}")
+    query_nodes = [node for node in args.nodes if node in node_to_idx]
+    indices, similarities = top_k_similar(normalize_embeddings(embeddings), [node_to_idx[n] for n in query_nodes],
+                                          args.top_k)
+    for node, rec_rows, sims in zip(query_nodes, indices, similarities):
+        filled = rec_rows >= 0
+        print(format_recommendation(node, [node_list[i] for i in rec_rows[filled]], sims[filled]), end="")
+
+
+def evaluate_command(args):
+    from model_evaluation.evaluation import calculate_similarity_difference
+
+    for path in args.files:
+        average_diff, max_diff, min_diff = calculate_similarity_difference(path)
+        print(f"{path}: Minimum Similarity Difference: {min_diff:.4f}, "
+              f"Average Similarity Difference: {average_diff:.4f}, Maximum Similarity Difference: {max_diff:.4f}")
+
+
+def parse_importtime(stderr):
+    """
+    Parse `python -X importtime` output into (module, self_us, cumulative_us, depth) tuples.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        match = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)", line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            entries.append((module, int(self_us), int(cumulative_us), len(indent) // 2))
+    return entries
+
+
+def importtime_command(args):
+    """
+    Run a command under -X importtime and summarize the slowest top-level imports.
+    """
+    command = [sys.executable, "-X", "importtime", os.path.abspath(__file__)] + (args.command or ["--help"])
+    result = subprocess.run(command, capture_output=True, text=True)
+    entries = parse_importtime(result.stderr)
+    top_level = sorted((e for e in entries if e[3] == 0), key=lambda e: e[2], reverse=True)
+    total = sum(e[2] for e in top_level)
+    print(f"Command: {' '.join(args.command or ['--help'])}")
+    print(f"Total import time: {total / 1e6:.3f} s over {len(entries)} modules")
+    for module, _, cumulative_us, _ in top_level[:args.top]:
+        print(f"{cumulative_us / 1e6:8.3f} s  {module}")
+    if result.returncode != 0:
+        print(f"Command exited with status {result.returncode}:\n{result.stderr.splitlines()[-1] if result.stderr else ''}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Anti-preferential-attachment paper recommendation system.")
+    subparsers = parser.add_subparsers(dest="command")
+
+    def stage_parser(name, help_text):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--force", action="store_true", help="Rerun even if the outputs are up to date.")
+        sub.add_argument("--jobs", type=int, default=2, help="Maximum number of stages running concurrently.")
+        return sub
+
+    stage_parser("download", "Download and extract the AAN 2014 release.").set_defaults(
+        func=lambda args: run_stages(["download", "extract"], args.force, args.jobs))
+    stage_parser("preview", "Draw the degree distribution previews.").set_defaults(
+        func=lambda args: run_stages(["preview"], args.force, args.jobs))
+    stage_parser("reweight", "Write the reweighted citation network.").set_defaults(
+        func=lambda args: run_stages(["reweight"], args.force, args.jobs))
+
+    embed = stage_parser("embed", "Train and save node2vec embeddings.")
+    embed.add_argument("--weighted", action="store_true", help="Embed the reweighted network.")
+    embed.set_defaults(func=lambda args: run_stages(["embed_weighted" if args.weighted else "embed"],
+                                                    args.force, args.jobs))
+
+    recommend = stage_parser("recommend", "Write the recommendation file, or print recommendations for --nodes.")
+    recommend.add_argument("--weighted", action="store_true", help="Use the weighted embeddings.")
+    recommend.add_argument("--nodes", nargs="+", metavar="PAPER", help="Print recommendations for these papers.")
+    recommend.add_argument("--embeddings", help="Embedding directory written by save_embeddings.")
+    recommend.add_argument("--top-k", type=int, default=10)
+    recommend.set_defaults(func=recommend_command)
+
+    evaluate = subparsers.add_parser("evaluate", help="Similarity spread of recommendation files or stores.")
+    evaluate.add_argument("files", nargs="+")
+    evaluate.set_defaults(func=evaluate_command)
+
+    pipeline = subparsers.add_parser("pipeline", help="Run the cached pipeline.")
+    pipeline.add_argument("--only", nargs="+", metavar="STAGE", help="Run only these stages.")
+    pipeline.add_argument("--from", dest="start", metavar="STAGE", help="Run this stage and everything downstream.")
+    pipeline.add_argument("--force", action="store_true", help="Rerun the selected stages even if up to date.")
+    pipeline.add_argument("--jobs", type=int, default=2, help="Maximum number of stages running concurrently.")
+    pipeline.add_argument("--status", action="store_true", help="Print the stage graph and exit.")
+    pipeline.set_defaults(func=pipeline_command)
+
+    importtime = subparsers.add_parser("importtime", help="Summarize the import time of a command.")
+    importtime.add_argument("--top", type=int, default=15, help="Number of top-level imports to list.")
+    importtime.add_argument("command", nargs=argparse.REMAINDER, help="Command and arguments to measure.")
+    importtime.set_defaults(func=importtime_command)
+    return parser
+
 
 if __name__ == "__main__":
-    
-    # Download and extract the raw data
-    data_download.download_and_extract()
-
-    # Draw Preview graphs
-    data_preview.draw_all_graphs()
-    
-    # Print the max and min citation counts
-    data_preview.max_and_min_in_degree_citation()
-    data_preview.max_and_min_out_degree_citation()
-
-    # Experiments with random samples citation network 
-    # paper recommendation
-    citation_graph_local_run.run_citation_recommender()
\ No newline at end of file
+    argv = sys.argv[1:]
+    # Without a subcommand, main.py runs the pipeline as before (e.g. python main.py --only preview)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ("-h", "--help")):
+        argv = ["pipeline"] + argv
+    args = build_parser().parse_args(argv)
+    args.func(args)
@@ -1,17 +1,40 @@
+import os
 import re
 
+import numpy as np
+
 """
 Function to calculate the average similarity difference.
 
 This function computes the difference between the maximum and minimum cosine similarities.
 
 The main function compute the different between baseline model and improved model.
+Results can be text recommendation files or binary recommendation stores
+(experiments/recommendation_store.py), which are read without parsing.
 
 @Author: Kristy He
 """
 
 
+def store_similarity_differences(store_dir):
+    """
+    Max - min similarity of every query in a recommendation store, from its memory-mapped arrays.
+    """
+    from experiments.recommendation_store import RecommendationStore
+
+    store = RecommendationStore.load(store_dir)
+    filled = store.indices >= 0
+    has_recommendations = filled.any(axis=1)
+    similarities = np.asarray(store.similarities, dtype=np.float64)
+    max_similarity = np.where(filled, similarities, -np.inf).max(axis=1)
+    min_similarity = np.where(filled, similarities, np.inf).min(axis=1)
+    return (max_similarity - min_similarity)[has_recommendations].tolist()
+
+
 def calculate_similarity_difference(file_path):
+    if os.path.isdir(file_path):
+        return summarize_differences(store_similarity_differences(file_path))
+
     with open(file_path, 'r') as file:
         lines = file.readlines()
 
@@ -21,6 +44,9 @@ def calculate_similarity_difference(file_path):
     for line in lines:
         similarities = similarity_pattern.findall(line)
         similarities = [float(sim) for sim in similarities]
+        # Queries without recommendations have no similarity spread, as in store_similarity_differences
+        if not similarities:
+            continue
 
         min_similarity = min(similarities)
         max_similarity = max(similarities)
@@ -28,7 +54,16 @@ def calculate_similarity_difference(file_path):
         similarity_difference = max_similarity - min_similarity
         similarity_differences.append(similarity_difference)
 
-    average_difference = sum(similarity_differences) / len(similarity_differences) if similarity_differences else 0
+    return summarize_differences(similarity_differences)
+
+
+def summarize_differences(similarity_differences):
+    """
+    Average, maximum and minimum of the similarity differences; all 0 if there are none.
+    """
+    if not similarity_differences:
+        return 0, 0, 0
+    average_difference = sum(similarity_differences) / len(similarity_differences)
     return average_difference, max(similarity_differences), min(similarity_differences)
 
 
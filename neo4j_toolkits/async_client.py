@@ -0,0 +1,200 @@
+import asyncio
+
+"""
+Asynchronous Neo4j access with bounded concurrency.
+
+AsyncNeo4jClient wraps an async driver (neo4j.AsyncGraphDatabase, or the in-process
+LocalGraphDriver from local_driver.py) and runs each query in its own session, at most
+max_concurrency at a time. Independent queries are issued together with asyncio.gather, so
+their network round trips overlap:
+- fetch_graph_data_async runs the node and relationship queries concurrently,
+- export_edges_async streams the relationships of a single query to disk in fetch_size batches,
+- write_communities_async sends community numbers as concurrent UNWIND batches instead of one
+  statement per author,
+- fetch_neighbors_async looks up the collaborators of many authors in concurrent UNWIND batches,
+- write_node_properties_async sets arbitrary properties in concurrent UNWIND batches.
+
+The functions without the _async suffix are a synchronous facade for existing callers.
+"""
+
+NODES_QUERY = "MATCH (n:Author) RETURN id(n) AS id, n.name AS name"
+RELATIONSHIPS_QUERY = "MATCH (a:Author)-[r:COLLABORATED]->(b:Author) RETURN id(a) AS source, id(b) AS target"
+EDGES_QUERY = "MATCH (a)-[r]->(b) RETURN a.name AS source, b.name AS target"
+WRITE_COMMUNITY_QUERY = """
+    UNWIND $rows AS row
+    MATCH (n {name: row.name})
+    SET n.community = row.community
+"""
+NEIGHBORS_QUERY = """
+    UNWIND $names AS name
+    MATCH (a:Author {name: name})-[:COLLABORATED]-(b:Author)
+    RETURN name, b.name AS neighbor
+"""
+WRITE_PROPERTIES_QUERY = """
+    UNWIND $rows AS row
+    MATCH (n {name: row.name})
+    SET n += row.properties
+"""
+
+
+class AsyncNeo4jClient:
+    """
+    Run Cypher queries on an async driver with at most max_concurrency sessions in flight.
+
+    Parameters:
+    - driver: neo4j.AsyncDriver or any object with the same session()/run()/data() interface, whose
+      results can also be iterated with async for.
+    - database (str): Database name (default: "neo4j").
+    - max_concurrency (int): Maximum number of concurrent sessions (default: 8).
+    """
+
+    def __init__(self, driver, database="neo4j", max_concurrency=8):
+        self.driver = driver
+        self.database = database
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(self, cypher_query, parameters=None):
+        """
+        Execute one query and return its records as dicts.
+        """
+        async with self.semaphore:
+            async with self.driver.session(database=self.database) as session:
+                result = await session.run(cypher_query, parameters or {})
+                return await result.data()
+
+    async def stream(self, cypher_query, parameters=None, fetch_size=10000):
+        """
+        Yield the records of one query as dicts while the server sends them fetch_size at a time.
+        """
+        async with self.semaphore:
+            async with self.driver.session(database=self.database, fetch_size=fetch_size) as session:
+                result = await session.run(cypher_query, parameters or {})
+                async for record in result:
+                    yield dict(record)
+
+    async def run_many(self, statements):
+        """
+        Execute (query, parameters) pairs concurrently; results are returned in input order.
+        """
+        return await asyncio.gather(*(self.run(query, parameters) for query, parameters in statements))
+
+    async def write_batches(self, cypher_query, rows, batch_size=1000):
+        """
+        Send rows as concurrent $rows batches of an UNWIND query.
+        """
+        batches = [rows[start:start + batch_size] for start in range(0, len(rows), batch_size)]
+        await self.run_many([(cypher_query, {"rows": batch}) for batch in batches])
+        return len(batches)
+
+    async def close(self):
+        await self.driver.close()
+
+
+async def fetch_graph_data_async(client):
+    """
+    Fetch Author nodes and COLLABORATED relationships with both queries in flight at once.
+    """
+    nodes, relationships = await client.run_many([(NODES_QUERY, None), (RELATIONSHIPS_QUERY, None)])
+    nodes_data = [(record["id"], {"name": record["name"]}) for record in nodes]
+    edges_data = [(record["source"], record["target"]) for record in relationships]
+    return nodes_data, edges_data
+
+
+async def export_edges_async(client, output_file, fetch_size=10000):
+    """
+    Write every relationship as a "source, target" line of author names.
+
+    The relationships come from one scan, streamed fetch_size records at a time, so the export
+    stays linear in the number of relationships and holds only one batch in memory.
+
+    Returns:
+    - num_edges (int): Number of relationships written.
+    """
+    num_edges = 0
+    with open(output_file, "w") as f:
+        async for record in client.stream(EDGES_QUERY, fetch_size=fetch_size):
+            f.write(f"{record['source']}, {record['target']}\n")
+            num_edges += 1
+    print(f"Exported {num_edges} relationships to {output_file}.")
+    return num_edges
+
+
+async def write_communities_async(client, partition, batch_size=1000):
+    """
+    Set the community property of every author in partition ({name: community_number}).
+    """
+    rows = [{"name": name, "community": community} for name, community in partition.items()]
+    num_batches = await client.write_batches(WRITE_COMMUNITY_QUERY, rows, batch_size)
+    print(f"Wrote {len(rows)} community numbers in {num_batches} batches.")
+    return len(rows)
+
+
+async def fetch_neighbors_async(client, names, batch_size=1000):
+    """
+    Collaborators of every author in names, as {name: [neighbor names]}; unknown authors map to [].
+    """
+    # Repeated names would be looked up in several batches and collect their neighbors twice
+    names = list(dict.fromkeys(names))
+    statements = [(NEIGHBORS_QUERY, {"names": names[start:start + batch_size]})
+                  for start in range(0, len(names), batch_size)]
+    neighbors = {name: [] for name in names}
+    for page in await client.run_many(statements):
+        for record in page:
+            neighbors[record["name"]].append(record["neighbor"])
+    return neighbors
+
+
+async def write_node_properties_async(client, properties, batch_size=1000):
+    """
+    Set the properties of every author in properties ({name: {property: value}}).
+    """
+    rows = [{"name": name, "properties": values} for name, values in properties.items()]
+    num_batches = await client.write_batches(WRITE_PROPERTIES_QUERY, rows, batch_size)
+    print(f"Wrote properties of {len(rows)} authors in {num_batches} batches.")
+    return len(rows)
+
+
+async def _with_client(func, driver, max_concurrency, *args, **kwargs):
+    if driver is None:
+        from db_connection import get_async_driver
+        driver = get_async_driver()
+    client = AsyncNeo4jClient(driver, max_concurrency=max_concurrency)
+    try:
+        return await func(client, *args, **kwargs)
+    finally:
+        await client.close()
+
+
+def fetch_graph_data(driver=None, max_concurrency=8):
+    """
+    Synchronous facade of fetch_graph_data_async. Uses the .env connection if driver is None.
+    """
+    return asyncio.run(_with_client(fetch_graph_data_async, driver, max_concurrency))
+
+
+def export_edges(output_file, driver=None, max_concurrency=8, fetch_size=10000):
+    """
+    Synchronous facade of export_edges_async.
+    """
+    return asyncio.run(_with_client(export_edges_async, driver, max_concurrency, output_file, fetch_size))
+
+
+def write_communities(partition, driver=None, max_concurrency=8, batch_size=1000):
+    """
+    Synchronous facade of write_communities_async.
+    """
+    return asyncio.run(_with_client(write_communities_async, driver, max_concurrency, partition, batch_size))
+
+
+def fetch_neighbors(names, driver=None, max_concurrency=8, batch_size=1000):
+    """
+    Synchronous facade of fetch_neighbors_async.
+    """
+    return asyncio.run(_with_client(fetch_neighbors_async, driver, max_concurrency, names, batch_size))
+
+
+def write_node_properties(properties, driver=None, max_concurrency=8, batch_size=1000):
+    """
+    Synchronous facade of write_node_properties_async.
+    """
+    return asyncio.run(_with_client(write_node_properties_async, driver, max_concurrency, properties, batch_size))
@@ -4,11 +4,12 @@ import tarfile
 from neo4j import GraphDatabase
 from collections import defaultdict
 import networkx as nx
-from py2neo import Graph
 import community.community_louvain as community_louvain
 import matplotlib.pyplot as plt
 from dotenv import load_dotenv
 import os
+from async_client import fetch_graph_data, write_communities
+from community_layout import community_layout, render_community_layout
 
 # Load environment variables from .env file located one parent directory above
 dotenv_path = Path(__file__).resolve().parent.parent / ".env"
@@ -19,23 +20,27 @@ uri = os.getenv("NEO4J_URI")
 username = os.getenv("NEO4J_USERNAME")
 password = os.getenv("NEO4J_PASSWORD")
 
+def fetch_collaborations(by_name=True):
+    """
+    Fetch the collaboration edges through async_client, as (source, target) author names,
+    or node ids if by_name is False. With GRAPH_STORE_PATH set they come from the SQLite store.
+    """
+    nodes_data, edges_data = fetch_graph_data()
+    if not by_name:
+        return edges_data
+    names = {node_id: properties["name"] for node_id, properties in nodes_data}
+    return [(names[source], names[target]) for source, target in edges_data]
+
 def community_detection():
-    # Connect to the Neo4j graph database
-    neo4j_graph = Graph(uri, auth=("neo4j", password))
     output_file = "community_results.txt"  # Specify the output file for results
 
-    # Query the graph to get node relationships (edges)
-    query = """
-    MATCH (a)-[r]->(b)
-    RETURN id(a) AS source_id, id(b) AS target_id
-    """
-    results = neo4j_graph.run(query)  # Execute the query and fetch the results
+    # Fetch the node relationships (edges)
+    edges = fetch_collaborations(by_name=False)
 
     # Create a NetworkX graph to represent the nodes and relationships
     G = nx.Graph()
-    for record in results:
-        # Add an edge to the graph using node IDs as source and target
-        G.add_edge(record["source_id"], record["target_id"])
+    # Add an edge to the graph using node IDs as source and target
+    G.add_edges_from(edges)
 
     # Perform community detection using the Louvain method
     partition = community_louvain.best_partition(G)
@@ -55,21 +60,19 @@ def community_detection():
     print(f"Number of communities: {num_communities}")  # Print the number of communities detected
     print(f"Average community size: {avg_size:.2f}")  # Print the average size of the communities
 
-def filered_community_adjustment_visulization():
-
-    neo4j_graph = Graph(uri, auth=("neo4j", password))
-
-    # Query nodes and relationships
-    query = """
-        MATCH (a)-[r]->(b)
-        RETURN a.name AS source, b.name AS target
+def filered_community_adjustment_visulization(layout_mode="spring", output_file=None, workers=None):
+    """
+    Draw the communities with more than 100 members.
+    layout_mode "spring" runs nx.spring_layout on all their members; "scalable" lays out every
+    community separately in parallel and renders a raster image (see community_layout.py),
+    written to output_file if given.
     """
-    results = neo4j_graph.run(query)
+    if layout_mode not in ("spring", "scalable"):
+        raise ValueError(f"Unknown layout mode {layout_mode!r}; expected 'spring' or 'scalable'")
 
-    # Create NetworkX graph
+    # Fetch relationships by author name and create NetworkX graph
     G = nx.Graph()
-    for record in results:
-        G.add_edge(record["source"], record["target"])
+    G.add_edges_from(fetch_collaborations())
 
     # Louvain community detection
     partition = community_louvain.best_partition(G)
@@ -79,6 +82,11 @@ def filered_community_adjustment_visulization():
     for node, community in partition.items():
         communities[community].append(node)
 
+    if layout_mode == "scalable":
+        nodes, positions, labels, edges = community_layout(G, partition, min_size=100, workers=workers)
+        render_community_layout(positions, labels, edges, output_file=output_file)
+        return
+
     # Filter communities with more than 100 members
     filtered_communities = {c: nodes for c, nodes in communities.items() if len(nodes) > 100}
 
@@ -105,20 +113,9 @@ def filered_community_adjustment_visulization():
     plt.show()
 
 def update_with_community_number():
-    neo4j_graph = Graph(uri, auth=("neo4j", password))
-
-    # Query the graph for nodes and relationships
-    query = """
-        MATCH (a)-[r]->(b)
-        RETURN a.name AS source, b.name AS target
-    """
-    results = neo4j_graph.run(query)
-
-    # Create a NetworkX graph from Neo4j data
+    # Create a NetworkX graph from the relationships, fetched by author name
     G = nx.Graph()
-
-    for record in results:
-        G.add_edge(record["source"], record["target"])
+    G.add_edges_from(fetch_collaborations())
 
     # Perform community detection using Louvain
     partition = community_louvain.best_partition(G)
@@ -143,13 +140,8 @@ def update_with_community_number():
 
     print(f"Author-community data has been saved to {output_file}.")
 
-    # Now, update Neo4j with community information
-    for node, community in partition.items():
-        # Assuming you have nodes identified by `name`, and each node needs a `community` property
-        neo4j_graph.run("""
-            MATCH (n {name: $node_name})
-            SET n.community = $community_number
-            """, node_name=node, community_number=community)
+    # Now, update Neo4j with community information, sent as concurrent batches of authors
+    write_communities(partition)
 
     print("Community numbers have been updated in Neo4j.")
 
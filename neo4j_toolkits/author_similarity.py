@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# The scripts in this directory run from it; make the repository packages importable
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+from experiments.similarity_search import top_k_rows
+
+"""
+Top-k author similarity without a dense N x N similarity matrix.
+
+Only the L2-normalized embedding matrix and a dict from node ID to row are kept, so memory
+stays linear in the number of authors. Similarities are computed lazily for a single query,
+in blocks for a batch of queries, or once for every author into an N x k neighbor table.
+The k best of every block are selected by top_k_rows, the kernel of the paper similarity search.
+"""
+
+
+class AuthorSimilarityIndex:
+    """
+    Cosine top-k search over author embeddings.
+
+    Parameters:
+    - embeddings (dict): node ID -> embedding vector, e.g. from generate_node2vec_embeddings.
+    """
+
+    def __init__(self, embeddings):
+        self.node_ids = list(embeddings.keys())
+        self.node_to_idx = {node: idx for idx, node in enumerate(self.node_ids)}
+        matrix = np.array(list(embeddings.values()), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        self.matrix = matrix / norms
+        self.neighbor_table = None
+
+    def _clamp(self, top_k):
+        """
+        Number of neighbors that exist for top_k requested ones: at most N - 1.
+        """
+        return max(0, min(top_k, len(self.node_ids) - 1))
+
+    def _top_k(self, rows, top_k):
+        """
+        Indices and similarities of the top_k neighbors of a block of rows, excluding the rows themselves.
+        """
+        scores = self.matrix[rows] @ self.matrix.T
+        scores[np.arange(len(rows)), rows] = -np.inf
+        return top_k_rows(scores, self._clamp(top_k))
+
+    def build_top_k_table(self, top_k=5, block_size=2048):
+        """
+        Precompute the top_k neighbors of every author, block_size queries at a time.
+        Memory peaks at block_size x N similarities plus the N x top_k table.
+        """
+        n = len(self.node_ids)
+        top_k = self._clamp(top_k)
+        indices = np.empty((n, top_k), dtype=np.int64)
+        similarities = np.empty((n, top_k), dtype=np.float32)
+        for start in range(0, n, block_size):
+            rows = np.arange(start, min(start + block_size, n))
+            indices[rows], similarities[rows] = self._top_k(rows, top_k)
+        self.neighbor_table = (indices, similarities)
+        return self.neighbor_table
+
+    def recommend_batch(self, node_ids, top_k=5, block_size=2048):
+        """
+        Recommend the top-k similar authors for many authors at once.
+        Returns one list of (node ID, similarity) per query.
+        """
+        rows = np.array([self.node_to_idx[str(node_id)] for node_id in node_ids], dtype=np.int64)
+        top_k = self._clamp(top_k)
+        results = []
+        for start in range(0, len(rows), block_size):
+            block = rows[start:start + block_size]
+            if self.neighbor_table is not None and self.neighbor_table[0].shape[1] >= top_k:
+                indices = self.neighbor_table[0][block, :top_k]
+                similarities = self.neighbor_table[1][block, :top_k]
+            else:
+                indices, similarities = self._top_k(block, top_k)
+            results.extend([(self.node_ids[i], s) for i, s in zip(row_indices, row_sims)]
+                           for row_indices, row_sims in zip(indices, similarities))
+        return results
+
+    def recommend(self, node_id, top_k=5):
+        """
+        Recommend the top-k similar authors of a single author.
+        """
+        return self.recommend_batch([node_id], top_k)[0]
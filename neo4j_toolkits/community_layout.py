@@ -0,0 +1,257 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+"""
+Scalable layout and rendering of large community graphs.
+
+nx.spring_layout computes all pairwise repulsions, O(n^2) per iteration, which does not finish
+on the full collaboration graph. Here the layout is split in two levels:
+
+1. a coarse layout places one disk per community, with an area proportional to its size,
+   from the graph of communities (edge weights = number of collaborations between them);
+2. every community is laid out on its own, in parallel worker processes, and scaled into its disk.
+
+Both levels use force_layout, a Fruchterman-Reingold layout over numpy arrays whose repulsion
+is approximated on a grid: nodes are binned into grid_size x grid_size cells, cells repel each
+other through their centroids and node counts, and nodes repel the other nodes of their own
+cell through the cell centroid. An iteration costs O(n + m + cells^2) instead of O(n^2).
+
+render_community_layout rasterizes the result into a single image (node density colored by
+community, edge density in gray) instead of creating one matplotlib artist per node and edge,
+so drawing hundreds of thousands of authors takes seconds.
+"""
+
+
+def force_layout(num_nodes, edges, weights=None, iterations=50, grid_size=32, seed=42):
+    """
+    Force-directed layout with grid-approximated repulsion.
+
+    Parameters:
+    - num_nodes (int): Number of nodes.
+    - edges (np.ndarray): (m, 2) node index pairs.
+    - weights (np.ndarray): Attraction weight of every edge (default: 1).
+    - iterations (int): Number of iterations (default: 50).
+    - grid_size (int): Maximum cells per axis of the repulsion grid; small graphs use about
+      one cell per 4 nodes (default: 32).
+    - seed (int): Seed of the initial positions (default: 42).
+
+    Returns:
+    - positions (np.ndarray): (num_nodes, 2) positions inside the unit disk.
+    """
+    if num_nodes <= 1:
+        return np.zeros((num_nodes, 2))
+    rng = np.random.default_rng(seed)
+    positions = rng.uniform(-1, 1, size=(num_nodes, 2))
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    weights = np.ones(len(edges)) if weights is None else np.asarray(weights, dtype=np.float64)
+    grid_size = int(min(grid_size, max(2, np.sqrt(num_nodes / 4))))
+    k = 2 / np.sqrt(num_nodes)
+    temperature = 0.2
+
+    for iteration in range(iterations):
+        displacement = np.zeros_like(positions)
+
+        # Repulsion between grid cells, applied at the cells' centroids
+        low = positions.min(axis=0)
+        span = np.maximum(positions.max(axis=0) - low, 1e-9)
+        cells = np.minimum(((positions - low) / span * grid_size).astype(np.int64), grid_size - 1)
+        cell_ids = cells[:, 0] * grid_size + cells[:, 1]
+        occupied, node_cell, counts = np.unique(cell_ids, return_inverse=True, return_counts=True)
+        centroids = np.stack([np.bincount(node_cell, positions[:, d]) for d in range(2)], axis=1) / counts[:, None]
+        delta = centroids[:, None, :] - centroids[None, :, :]
+        distance2 = np.maximum((delta ** 2).sum(axis=2), 1e-9)
+        cell_force = (delta * (k * k * counts[None, :] / distance2)[:, :, None]).sum(axis=1)
+        displacement += cell_force[node_cell]
+
+        # Repulsion from the other nodes of the same cell
+        offset = positions - centroids[node_cell]
+        offset_distance2 = np.maximum((offset ** 2).sum(axis=1), (0.01 * k) ** 2)
+        displacement += offset * (k * k * (counts[node_cell] - 1) / offset_distance2)[:, None]
+
+        # Attraction along the edges, d^2 / k
+        if len(edges):
+            delta = positions[edges[:, 0]] - positions[edges[:, 1]]
+            pull = delta * (np.sqrt((delta ** 2).sum(axis=1)) * weights / k)[:, None]
+            for d in range(2):
+                displacement[:, d] -= np.bincount(edges[:, 0], pull[:, d], minlength=num_nodes)
+                displacement[:, d] += np.bincount(edges[:, 1], pull[:, d], minlength=num_nodes)
+
+        length = np.maximum(np.sqrt((displacement ** 2).sum(axis=1)), 1e-9)
+        step = temperature * (1 - iteration / iterations)
+        positions += displacement * (np.minimum(length, step) / length)[:, None]
+
+    positions -= positions.mean(axis=0)
+    radius = np.sqrt((positions ** 2).sum(axis=1)).max()
+    return positions / radius if radius > 0 else positions
+
+
+def _community_task(args):
+    num_nodes, edges, iterations, grid_size, seed = args
+    return force_layout(num_nodes, edges, iterations=iterations, grid_size=grid_size, seed=seed)
+
+
+def separate_disks(centers, radii, iterations=100, padding=0.05):
+    """
+    Push apart disks that overlap, keeping the coarse arrangement. O(C^2) per iteration.
+    """
+    centers = centers.copy()
+    for _ in range(iterations):
+        delta = centers[:, None, :] - centers[None, :, :]
+        distance = np.maximum(np.sqrt((delta ** 2).sum(axis=2)), 1e-9)
+        overlap = (radii[:, None] + radii[None, :]) * (1 + padding) - distance
+        np.fill_diagonal(overlap, 0)
+        overlap = np.maximum(overlap, 0)
+        if not overlap.any():
+            break
+        centers += (delta / distance[:, :, None] * overlap[:, :, None] / 2).sum(axis=1)
+    return centers
+
+
+def layout_communities(edges, labels, iterations=50, grid_size=32, workers=None, seed=42):
+    """
+    Two-level layout of a graph whose nodes are grouped into communities.
+
+    Parameters:
+    - edges (np.ndarray): (m, 2) node index pairs.
+    - labels (np.ndarray): Community label of every node.
+    - iterations (int): force_layout iterations of every level (default: 50).
+    - grid_size (int): Cells per axis of the repulsion grid (default: 32).
+    - workers (int): Worker processes for the community layouts; 1 runs them in this process
+      (default: None, one per CPU).
+    - seed (int): Seed of the layouts (default: 42).
+
+    Returns:
+    - positions (np.ndarray): (n, 2) node positions.
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    community_ids, labels = np.unique(np.asarray(labels), return_inverse=True)
+    num_communities = len(community_ids)
+    sizes = np.bincount(labels, minlength=num_communities)
+
+    # Coarse layout: one node per community, edges weighted by the collaborations between them
+    between = labels[edges[:, 0]] != labels[edges[:, 1]]
+    pairs = np.sort(np.stack([labels[edges[between, 0]], labels[edges[between, 1]]], axis=1), axis=1)
+    pairs, counts = np.unique(pairs, axis=0, return_counts=True)
+    centers = force_layout(num_communities, pairs, np.log1p(counts), iterations, grid_size, seed)
+    radii = np.sqrt(sizes / sizes.sum()) / 2
+    centers = separate_disks(centers, radii)
+
+    # Local layouts, largest communities first so the workers stay busy
+    order = np.argsort(labels, kind="stable")
+    starts = np.concatenate([[0], np.cumsum(sizes)])
+    local_index = np.empty(len(labels), dtype=np.int64)
+    local_index[order] = np.arange(len(labels)) - starts[labels[order]]
+    inside = edges[~between]
+    inside_labels = labels[inside[:, 0]]
+    inside_order = np.argsort(inside_labels, kind="stable")
+    inside, inside_labels = inside[inside_order], inside_labels[inside_order]
+    edge_starts = np.searchsorted(inside_labels, np.arange(num_communities + 1))
+    tasks = [(int(sizes[c]), local_index[inside[edge_starts[c]:edge_starts[c + 1]]], iterations, grid_size, seed + c)
+             for c in range(num_communities)]
+    by_size = np.argsort(-sizes, kind="stable")
+    if workers == 1:
+        local_layouts = [_community_task(tasks[c]) for c in by_size]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            local_layouts = list(pool.map(_community_task, [tasks[c] for c in by_size]))
+
+    positions = np.empty((len(labels), 2))
+    for c, local in zip(by_size, local_layouts):
+        members = order[starts[c]:starts[c + 1]]
+        positions[members] = centers[c] + radii[c] * local
+    return positions
+
+
+def community_layout(G, partition, min_size=100, **kwargs):
+    """
+    Layout of the members of the communities with more than min_size members of a networkx graph.
+    kwargs are passed to layout_communities.
+
+    Returns:
+    - nodes (list): The laid-out nodes.
+    - positions (np.ndarray): (len(nodes), 2) node positions.
+    - labels (np.ndarray): Community of every node.
+    - edges (np.ndarray): (m, 2) index pairs of the edges between the laid-out nodes.
+    """
+    sizes = {}
+    for community in partition.values():
+        sizes[community] = sizes.get(community, 0) + 1
+    nodes = [node for node in G.nodes() if sizes.get(partition.get(node), 0) > min_size]
+    node_to_idx = {node: idx for idx, node in enumerate(nodes)}
+    edges = np.array([(node_to_idx[u], node_to_idx[v]) for u, v in G.edges() if u in node_to_idx and v in node_to_idx],
+                     dtype=np.int64).reshape(-1, 2)
+    labels = np.array([partition[node] for node in nodes])
+    return nodes, layout_communities(edges, labels, **kwargs), labels, edges
+
+
+def _accumulate(image, pixels, values, resolution):
+    flat = pixels[:, 1] * resolution + pixels[:, 0]
+    image += np.bincount(flat, values, minlength=resolution * resolution).reshape(resolution, resolution)
+
+
+def render_community_layout(positions, labels, edges=None, output_file=None, resolution=2048, max_edges=500_000,
+                            cmap="tab20", seed=42):
+    """
+    Draw a layout as one raster image: node density colored by community over gray edge density.
+
+    Parameters:
+    - positions (np.ndarray): (n, 2) node positions.
+    - labels (np.ndarray): Community of every node.
+    - edges (np.ndarray): (m, 2) node index pairs; at most max_edges of them are drawn (default: None).
+    - output_file (str): Image file to write; shows the figure if None (default: None).
+    - resolution (int): Pixels per side (default: 2048).
+    - max_edges (int): Maximum number of edges drawn, sampled uniformly (default: 500,000).
+    - cmap (str): Matplotlib colormap of the communities (default: "tab20").
+    """
+    import matplotlib.pyplot as plt
+
+    low = positions.min(axis=0)
+    span = np.maximum(positions.max(axis=0) - low, 1e-9).max()
+
+    def to_pixels(points):
+        return np.clip(((points - low) / span * (resolution - 1)).astype(np.int64), 0, resolution - 1)
+
+    image = np.ones((resolution, resolution, 3))
+    if edges is not None and len(edges):
+        edges = np.asarray(edges)
+        if len(edges) > max_edges:
+            edges = edges[np.random.default_rng(seed).choice(len(edges), max_edges, replace=False)]
+        start, end = positions[edges[:, 0]], positions[edges[:, 1]]
+        # Sample every edge at about one point per pixel of its length, at most 64
+        samples = np.clip(np.ceil(np.sqrt(((end - start) ** 2).sum(axis=1)) / span * resolution), 2, 64).astype(np.int64)
+        edge_of_point = np.repeat(np.arange(len(edges)), samples)
+        fraction = (np.arange(len(edge_of_point)) - np.repeat(np.cumsum(samples) - samples, samples)) \
+            / np.repeat(samples - 1, samples)
+        points = start[edge_of_point] + (end - start)[edge_of_point] * fraction[:, None]
+        edge_density = np.zeros((resolution, resolution))
+        _accumulate(edge_density, to_pixels(points), np.ones(len(points)), resolution)
+        shade = np.log1p(edge_density) / max(np.log1p(edge_density.max()), 1e-9)
+        image -= 0.6 * shade[:, :, None]
+
+    community_ids, label_index = np.unique(np.asarray(labels), return_inverse=True)
+    colors = plt.get_cmap(cmap)(np.arange(len(community_ids)) % plt.get_cmap(cmap).N)[:, :3]
+    pixels = to_pixels(positions)
+    node_density = np.zeros((resolution, resolution))
+    _accumulate(node_density, pixels, np.ones(len(positions)), resolution)
+    color_sum = np.zeros((resolution, resolution, 3))
+    for d in range(3):
+        channel = np.zeros((resolution, resolution))
+        _accumulate(channel, pixels, colors[label_index, d], resolution)
+        color_sum[:, :, d] = channel
+    has_nodes = node_density > 0
+    alpha = np.zeros((resolution, resolution))
+    alpha[has_nodes] = 0.5 + 0.5 * np.log1p(node_density[has_nodes]) / np.log1p(node_density.max())
+    mean_color = np.zeros_like(color_sum)
+    mean_color[has_nodes] = color_sum[has_nodes] / node_density[has_nodes][:, None]
+    image = image * (1 - alpha[:, :, None]) + mean_color * alpha[:, :, None]
+
+    fig, ax = plt.subplots(figsize=(10, 10))
+    ax.imshow(image, origin="lower", interpolation="nearest")
+    ax.set_axis_off()
+    if output_file:
+        fig.savefig(output_file, dpi=resolution / 10, bbox_inches="tight")
+        plt.close(fig)
+    else:
+        plt.show()
@@ -1,5 +1,5 @@
 import os
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -11,6 +11,8 @@ load_dotenv(dotenv_path)
 uri = os.getenv("NEO4J_URI")
 username = os.getenv("NEO4J_USERNAME")
 password = os.getenv("NEO4J_PASSWORD")
+# Path of a SQLite author store (see sqlite_store.py) to use instead of the Neo4j server
+graph_store_path = os.getenv("GRAPH_STORE_PATH")
 
 def get_db_driver():
     """
@@ -23,6 +25,21 @@ def get_db_driver():
         print(f"Error connecting to the database: {e}")
         raise
 
+def get_async_driver():
+    """
+    Initialize and return the asynchronous Neo4j database driver.
+    With GRAPH_STORE_PATH set, return a driver for that SQLite store instead.
+    """
+    if graph_store_path:
+        from sqlite_store import SqliteGraphDriver
+        return SqliteGraphDriver(graph_store_path)
+    try:
+        driver = AsyncGraphDatabase.driver(uri, auth=(username, password))
+        return driver
+    except Exception as e:
+        print(f"Error connecting to the database: {e}")
+        raise
+
 def close_driver(driver):
     """
     Close the Neo4j database driver.
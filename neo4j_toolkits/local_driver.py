@@ -0,0 +1,107 @@
+import asyncio
+
+from async_client import (EDGES_QUERY, NEIGHBORS_QUERY, NODES_QUERY, RELATIONSHIPS_QUERY, WRITE_COMMUNITY_QUERY,
+                          WRITE_PROPERTIES_QUERY)
+
+"""
+In-process stand-in for the neo4j async driver.
+
+LocalGraphDriver holds an author graph in memory and answers the queries issued by
+async_client.py through the same driver.session() / session.run() / result.data() interface
+(results can also be iterated with async for), optionally sleeping `latency` seconds per query
+to mimic a network round trip. It records the peak number of queries in flight, so the effect
+of the client's concurrency can be checked without a Neo4j server:
+
+    driver = LocalGraphDriver(names, edges, latency=0.05)
+    nodes_data, edges_data = fetch_graph_data(driver=driver)
+"""
+
+
+class LocalGraphDriver:
+    """
+    Parameters:
+    - names (list): Author names; node i gets id i.
+    - edges (list): (source_index, target_index) COLLABORATED relationships.
+    - latency (float): Seconds each query waits before answering (default: 0).
+    """
+
+    def __init__(self, names, edges, latency=0.0):
+        self.names = list(names)
+        self.edges = list(edges)
+        self.latency = latency
+        self.properties = {name: {} for name in self.names}
+        self.queries = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def session(self, database="neo4j", fetch_size=None):
+        return _LocalSession(self)
+
+    async def close(self):
+        pass
+
+    def _records(self, query, parameters):
+        if query == NODES_QUERY:
+            return [{"id": i, "name": name} for i, name in enumerate(self.names)]
+        if query == RELATIONSHIPS_QUERY:
+            return [{"source": source, "target": target} for source, target in self.edges]
+        if query == EDGES_QUERY:
+            return ({"source": self.names[source], "target": self.names[target]} for source, target in self.edges)
+        if query == WRITE_COMMUNITY_QUERY:
+            for row in parameters["rows"]:
+                if row["name"] in self.properties:
+                    self.properties[row["name"]]["community"] = row["community"]
+            return []
+        if query == NEIGHBORS_QUERY:
+            name_to_id = {name: i for i, name in enumerate(self.names)}
+            wanted = {name_to_id[name]: name for name in parameters["names"] if name in name_to_id}
+            records = []
+            for source, target in self.edges:
+                if source in wanted:
+                    records.append({"name": wanted[source], "neighbor": self.names[target]})
+                if target in wanted:
+                    records.append({"name": wanted[target], "neighbor": self.names[source]})
+            return records
+        if query == WRITE_PROPERTIES_QUERY:
+            for row in parameters["rows"]:
+                if row["name"] in self.properties:
+                    self.properties[row["name"]].update(row["properties"])
+            return []
+        raise ValueError(f"LocalGraphDriver does not support query: {query.strip()}")
+
+
+class _LocalSession:
+
+    def __init__(self, driver):
+        self.driver = driver
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def run(self, query, parameters=None):
+        driver = self.driver
+        driver.queries += 1
+        driver.in_flight += 1
+        driver.max_in_flight = max(driver.max_in_flight, driver.in_flight)
+        try:
+            if driver.latency:
+                await asyncio.sleep(driver.latency)
+            return _LocalResult(driver._records(query, parameters or {}))
+        finally:
+            driver.in_flight -= 1
+
+
+class _LocalResult:
+
+    def __init__(self, records):
+        self.records = records
+
+    async def data(self):
+        return list(self.records)
+
+    async def __aiter__(self):
+        for record in self.records:
+            yield record
@@ -1,8 +1,8 @@
 from db_connection import get_db_driver, close_driver
+from author_similarity import AuthorSimilarityIndex
+from async_client import fetch_graph_data as fetch_graph_data_concurrently
 import networkx as nx
 from node2vec import Node2Vec
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
 
 def run_query(cypher_query, parameters=None):
     """
@@ -19,21 +19,13 @@ def run_query(cypher_query, parameters=None):
     finally:
         close_driver(driver)
 
-def fetch_graph_data():
+def fetch_graph_data(driver=None):
     """
     Fetch nodes and relationships from Neo4j.
+    The node and relationship queries run concurrently on the async driver; pass
+    driver=SqliteGraphStore(path).driver() to read a local store instead.
     """
-    # Fetch nodes
-    nodes_query = "MATCH (n:Author) RETURN id(n) AS id, n.name AS name"
-    nodes = run_query(nodes_query)
-    nodes_data = [(record["id"], {"name": record["name"]}) for record in nodes]
-
-    # Fetch relationships
-    rels_query = "MATCH (a:Author)-[r:COLLABORATED]->(b:Author) RETURN id(a) AS source, id(b) AS target"
-    relationships = run_query(rels_query)
-    edges_data = [(record["source"], record["target"]) for record in relationships]
-
-    return nodes_data, edges_data
+    return fetch_graph_data_concurrently(driver)
 
 def create_networkx_graph(nodes_data, edges_data):
     """
@@ -55,24 +47,16 @@ def generate_node2vec_embeddings(graph, dimensions=4, walk_length=10, num_walks=
 
 def compute_cosine_similarity(embeddings):
     """
-    Compute cosine similarity between all nodes using their embeddings.
+    Build a top-k cosine similarity search over the node embeddings.
+    Only the normalized embeddings are kept; similarities are computed per query.
     """
-    # Convert embeddings dictionary to a matrix
-    embedding_matrix = np.array(list(embeddings.values()))
-    node_ids = list(embeddings.keys())
-
-    # Compute cosine similarity
-    similarity_matrix = cosine_similarity(embedding_matrix)
+    index = AuthorSimilarityIndex(embeddings)
 
     def recommend_similar_nodes(node_id, top_k=5):
         """
         Recommend top-k similar nodes for a given node based on cosine similarity.
         """
-        node_index = node_ids.index(str(node_id))
-        similarities = similarity_matrix[node_index]
-        similar_indices = similarities.argsort()[-(top_k + 1):-1][::-1]
-        similar_nodes = [(node_ids[i], similarities[i]) for i in similar_indices]
-        return similar_nodes
+        return index.recommend(node_id, top_k)
 
     return recommend_similar_nodes
 
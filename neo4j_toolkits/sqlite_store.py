@@ -0,0 +1,238 @@
+import argparse
+import itertools
+import json
+import sqlite3
+import time
+
+from async_client import (EDGES_QUERY, NEIGHBORS_QUERY, NODES_QUERY, RELATIONSHIPS_QUERY, WRITE_COMMUNITY_QUERY,
+                          WRITE_PROPERTIES_QUERY)
+from local_driver import LocalGraphDriver
+
+"""
+Embedded SQLite store of the author collaboration graph.
+
+SqliteGraphStore keeps the Author nodes and COLLABORATED relationships in two tables, with an
+index on the author names and on both ends of every relationship, so neighbor lookups are
+index scans in the same process instead of network round trips. Author properties
+(e.g. community) are stored as a JSON object per author and updated in batches.
+
+SqliteGraphDriver answers the queries of async_client.py from a store, so fetch_graph_data,
+export_edges, write_communities, fetch_neighbors and write_node_properties run offline
+unchanged. Setting GRAPH_STORE_PATH in .env makes db_connection.get_async_driver return it
+instead of a Neo4j driver.
+
+Build a store from the AAN paper-author file, from the neo4j_toolkits directory:
+    python sqlite_store.py ../weight_reaccessment_of_edges/paper_author_affiliations.txt ../data/authors.db
+"""
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS authors (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE,
+        properties TEXT NOT NULL DEFAULT '{}'
+    );
+    CREATE TABLE IF NOT EXISTS collaborations (
+        id INTEGER PRIMARY KEY,
+        source INTEGER NOT NULL,
+        target INTEGER NOT NULL,
+        weight REAL NOT NULL DEFAULT 1
+    );
+"""
+INDEXES = """
+    CREATE INDEX IF NOT EXISTS collaborations_source ON collaborations (source);
+    CREATE INDEX IF NOT EXISTS collaborations_target ON collaborations (target);
+"""
+NEIGHBORS_SQL = """
+    SELECT a.name, b.name FROM authors a
+    JOIN collaborations c ON c.source = a.id JOIN authors b ON b.id = c.target
+    WHERE a.name IN ({placeholders})
+    UNION ALL
+    SELECT a.name, b.name FROM authors a
+    JOIN collaborations c ON c.target = a.id JOIN authors b ON b.id = c.source
+    WHERE a.name IN ({placeholders})
+"""
+
+
+def read_collaborations(paper_author_file):
+    """
+    Co-authorship network of the tab-separated "paper id, author id, affiliation id" file.
+
+    Returns:
+    - names (list): Author IDs in order of first appearance.
+    - edges (list): (source_index, target_index) pairs of authors sharing a paper, once per pair.
+    - weights (list): Number of papers every pair shares.
+    """
+    paper_authors = {}
+    author_index = {}
+    with open(paper_author_file, "r") as file:
+        for index, line in enumerate(file):
+            if index == 0 or not line.strip():
+                continue
+            paper_id, author_id, _ = line.strip().split("\t")
+            row = author_index.setdefault(author_id, len(author_index))
+            authors = paper_authors.setdefault(paper_id, [])
+            # An author listed twice on a paper (several affiliations) still counts once
+            if row not in authors:
+                authors.append(row)
+    counts = {}
+    for authors in paper_authors.values():
+        for pair in itertools.combinations(sorted(authors), 2):
+            counts[pair] = counts.get(pair, 0) + 1
+    return list(author_index), list(counts), list(counts.values())
+
+
+class SqliteGraphStore:
+    """
+    Author collaboration graph in a SQLite database file (":memory:" for a temporary store).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def bulk_load(self, names, edges, weights=None):
+        """
+        Replace the graph with the given authors and (source_index, target_index) collaborations.
+        The relationship indexes are built after the insert, which is faster than maintaining them.
+        """
+        weights = weights if weights is not None else itertools.repeat(1.0)
+        with self.connection:
+            self.connection.execute("DROP INDEX IF EXISTS collaborations_source")
+            self.connection.execute("DROP INDEX IF EXISTS collaborations_target")
+            self.connection.execute("DELETE FROM collaborations")
+            self.connection.execute("DELETE FROM authors")
+            self.connection.executemany("INSERT INTO authors (id, name) VALUES (?, ?)", enumerate(names))
+            self.connection.executemany("INSERT INTO collaborations (id, source, target, weight) VALUES (?, ?, ?, ?)",
+                                        ((i, int(s), int(t), float(w)) for i, ((s, t), w) in enumerate(zip(edges, weights))))
+            self.connection.executescript(INDEXES)
+        self.connection.execute("ANALYZE")
+        return len(names), len(edges)
+
+    def load_paper_authors(self, paper_author_file):
+        """
+        Bulk load the co-authorship network of the AAN paper-author file.
+        """
+        return self.bulk_load(*read_collaborations(paper_author_file))
+
+    def load_edge_file(self, edge_file):
+        """
+        Bulk load "source, target" lines of author names, the format written by export_edges.
+        """
+        name_index, edges = {}, []
+        with open(edge_file, "r") as f:
+            for line in f:
+                if line.strip():
+                    source, target = line.strip().split(", ")
+                    edges.append((name_index.setdefault(source, len(name_index)),
+                                  name_index.setdefault(target, len(name_index))))
+        return self.bulk_load(list(name_index), edges)
+
+    def nodes(self):
+        return self.connection.execute("SELECT id, name FROM authors ORDER BY id").fetchall()
+
+    def relationships(self):
+        return self.connection.execute("SELECT source, target FROM collaborations ORDER BY id").fetchall()
+
+    def named_relationships(self):
+        """
+        Cursor over the (source name, target name) of every relationship, in id order.
+        """
+        return self.connection.execute(
+            "SELECT a.name, b.name FROM collaborations c "
+            "JOIN authors a ON a.id = c.source JOIN authors b ON b.id = c.target ORDER BY c.id")
+
+    def neighbors(self, names, batch_size=500):
+        """
+        Collaborators of every author in names, as {name: [neighbor names]}; unknown authors map to [].
+        One indexed query is issued per batch of names.
+        """
+        names = list(names)
+        neighbors = {name: [] for name in names}
+        for start in range(0, len(names), batch_size):
+            batch = names[start:start + batch_size]
+            query = NEIGHBORS_SQL.format(placeholders=", ".join("?" * len(batch)))
+            for name, neighbor in self.connection.execute(query, batch + batch):
+                neighbors[name].append(neighbor)
+        return neighbors
+
+    def write_node_properties(self, properties):
+        """
+        Merge {property: value} into the properties of every author in properties ({name: {...}}).
+        """
+        with self.connection:
+            self.connection.executemany("UPDATE authors SET properties = json_patch(properties, ?) WHERE name = ?",
+                                        ((json.dumps(values), name) for name, values in properties.items()))
+        return len(properties)
+
+    def node_properties(self, names):
+        """
+        Properties of every known author in names, as {name: {property: value}}.
+        """
+        names = list(names)
+        properties = {}
+        for start in range(0, len(names), 500):
+            batch = names[start:start + 500]
+            rows = self.connection.execute(
+                f"SELECT name, properties FROM authors WHERE name IN ({', '.join('?' * len(batch))})", batch)
+            properties.update((name, json.loads(values)) for name, values in rows)
+        return properties
+
+    def driver(self, latency=0.0):
+        return SqliteGraphDriver(self, latency)
+
+
+class SqliteGraphDriver(LocalGraphDriver):
+    """
+    Async driver stand-in answering the async_client.py queries from a SqliteGraphStore.
+    Closing the driver leaves the store open, so one store can serve several facade calls.
+    """
+
+    def __init__(self, store, latency=0.0):
+        self.store = store if isinstance(store, SqliteGraphStore) else SqliteGraphStore(store)
+        self.latency = latency
+        self.queries = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _records(self, query, parameters):
+        store = self.store
+        if query == NODES_QUERY:
+            return [{"id": i, "name": name} for i, name in store.nodes()]
+        if query == RELATIONSHIPS_QUERY:
+            return [{"source": source, "target": target} for source, target in store.relationships()]
+        if query == EDGES_QUERY:
+            return ({"source": source, "target": target} for source, target in store.named_relationships())
+        if query == NEIGHBORS_QUERY:
+            return [{"name": name, "neighbor": neighbor}
+                    for name, neighbors in store.neighbors(parameters["names"]).items() for neighbor in neighbors]
+        if query == WRITE_COMMUNITY_QUERY:
+            store.write_node_properties({row["name"]: {"community": row["community"]} for row in parameters["rows"]})
+            return []
+        if query == WRITE_PROPERTIES_QUERY:
+            store.write_node_properties({row["name"]: row["properties"] for row in parameters["rows"]})
+            return []
+        raise ValueError(f"SqliteGraphDriver does not support query: {query.strip()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a SQLite author collaboration store.")
+    parser.add_argument("input_file", help="AAN paper-author file, or a 'source, target' file with --edge-file.")
+    parser.add_argument("database")
+    parser.add_argument("--edge-file", action="store_true", help="The input is an export_edges file.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = SqliteGraphStore(args.database)
+    if args.edge_file:
+        num_nodes, num_edges = store.load_edge_file(args.input_file)
+    else:
+        num_nodes, num_edges = store.load_paper_authors(args.input_file)
+    store.close()
+    print(f"Stored {num_nodes} authors and {num_edges} collaborations in {args.database} "
+          f"({time.perf_counter() - start:.1f}s)")
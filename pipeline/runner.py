@@ -0,0 +1,247 @@
+import hashlib
+import json
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+
+"""
+A small artifact-cached DAG runner.
+
+Every stage declares the files it reads and the files it writes. Before a stage runs, the
+runner hashes its inputs, its parameters and the stage version; if that fingerprint matches
+the one stored in the cache manifest and all outputs still exist, the stage is skipped.
+Stages whose dependencies are satisfied run concurrently in a thread pool.
+"""
+
+DEFAULT_MANIFEST = ".pipeline_cache/manifest.json"
+
+
+class Stage:
+    """
+    A pipeline stage.
+
+    Parameters:
+    - name (str): Unique stage name.
+    - func (callable): Called with no arguments to produce the outputs.
+    - inputs (list): Files or directories the stage reads.
+    - outputs (list): Files or directories the stage writes.
+    - params (dict): Parameters that should invalidate the cache when changed.
+    - version (str): Bump to invalidate the cache after changing the stage's code.
+    - always_run (bool): Whether to run the stage even when it is up to date.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), params=None, version="1", always_run=False):
+        self.name = name
+        self.func = func
+        self.inputs = [Path(p) for p in inputs]
+        self.outputs = [Path(p) for p in outputs]
+        self.params = params or {}
+        self.version = version
+        self.always_run = always_run
+
+
+def file_digest(path, file_cache):
+    """
+    Return the SHA-256 of a file's content.
+    Digests are memoized by (size, mtime) in file_cache so large unchanged inputs,
+    such as the 1 GB archive, are hashed only once.
+    """
+    stat = path.stat()
+    key = str(path)
+    cached = file_cache.get(key)
+    if cached and cached["size"] == stat.st_size and cached["mtime_ns"] == stat.st_mtime_ns:
+        return cached["sha256"]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    file_cache[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest.hexdigest()}
+    return digest.hexdigest()
+
+
+def hash_path(path, digest, file_cache):
+    """
+    Feed the content of a file, or of every file below a directory, into a hash digest.
+    """
+    if path.is_dir():
+        for child in sorted(p for p in path.rglob("*") if p.is_file()):
+            digest.update(str(child.relative_to(path)).encode())
+            digest.update(file_digest(child, file_cache).encode())
+    else:
+        digest.update(file_digest(path, file_cache).encode())
+
+
+def stage_fingerprint(stage, file_cache):
+    """
+    Hash a stage's version, parameters and input contents.
+    """
+    digest = hashlib.sha256()
+    digest.update(stage.name.encode())
+    digest.update(stage.version.encode())
+    digest.update(json.dumps(stage.params, sort_keys=True, default=str).encode())
+    for path in stage.inputs:
+        digest.update(str(path).encode())
+        if path.exists():
+            hash_path(path, digest, file_cache)
+        else:
+            digest.update(b"<missing>")
+    return digest.hexdigest()
+
+
+def build_dependencies(stages):
+    """
+    Derive stage dependencies from the files they produce and consume.
+    A stage depends on every stage that writes one of its inputs (or a directory containing it).
+    """
+    producers = {}
+    for stage in stages:
+        for output in stage.outputs:
+            if output in producers:
+                raise ValueError(f"{output} is produced by both {producers[output]} and {stage.name}")
+            producers[output] = stage.name
+
+    dependencies = {}
+    for stage in stages:
+        deps = set()
+        for path in stage.inputs:
+            for output, producer in producers.items():
+                if producer != stage.name and (path == output or output in path.parents):
+                    deps.add(producer)
+        dependencies[stage.name] = deps
+    return dependencies
+
+
+def topological_order(stages, dependencies):
+    order = []
+    visiting, done = set(), set()
+    by_name = {stage.name: stage for stage in stages}
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Cycle detected at stage {name}")
+        visiting.add(name)
+        for dep in sorted(dependencies[name]):
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+        order.append(by_name[name])
+
+    for stage in stages:
+        visit(stage.name)
+    return order
+
+
+def select_stages(order, dependencies, only=None, start=None):
+    """
+    Pick the stages to consider.
+
+    Parameters:
+    - only (list): Run just these stages.
+    - start (str): Run this stage and every stage downstream of it.
+    """
+    names = [stage.name for stage in order]
+    for name in (only or []) + ([start] if start else []):
+        if name not in names:
+            raise ValueError(f"Unknown stage {name}; available stages: {', '.join(names)}")
+    if only:
+        return {name for name in names if name in only}
+    if start:
+        selected = {start}
+        for stage in order:
+            if dependencies[stage.name] & selected:
+                selected.add(stage.name)
+        return selected
+    return set(names)
+
+
+class PipelineRunner:
+    """
+    Runs a set of stages in dependency order, skipping stages whose cached fingerprint is current.
+
+    Parameters:
+    - stages (list): The Stage objects of the pipeline.
+    - manifest_file (str or Path): JSON file storing the fingerprint of every completed stage
+      and the memoized digests of the files hashed so far.
+    - max_workers (int): Maximum number of stages running at the same time.
+    """
+
+    def __init__(self, stages, manifest_file=DEFAULT_MANIFEST, max_workers=4):
+        self.stages = list(stages)
+        self.dependencies = build_dependencies(self.stages)
+        self.order = topological_order(self.stages, self.dependencies)
+        self.manifest_file = Path(manifest_file)
+        self.max_workers = max_workers
+        manifest = json.loads(self.manifest_file.read_text()) if self.manifest_file.exists() else {}
+        self.fingerprints = manifest.get("stages", {})
+        self.file_cache = manifest.get("files", {})
+
+    def is_stale(self, stage):
+        if stage.always_run:
+            return True
+        if any(not output.exists() for output in stage.outputs):
+            return True
+        return self.fingerprints.get(stage.name) != stage_fingerprint(stage, self.file_cache)
+
+    def _save_manifest(self):
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        manifest = {"stages": self.fingerprints, "files": self.file_cache}
+        self.manifest_file.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+
+    def run(self, only=None, start=None, force=False):
+        """
+        Run the selected stages.
+
+        Parameters:
+        - only (list): Run just these stages.
+        - start (str): Run this stage and everything downstream of it.
+        - force (bool): Rerun selected stages even if they are up to date.
+
+        Returns:
+        - ran (list): Names of the stages that were executed.
+        """
+        selected = select_stages(self.order, self.dependencies, only, start)
+        pending = [stage for stage in self.order if stage.name in selected]
+        finished = {stage.name for stage in self.order if stage.name not in selected}
+        ran = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            running = {}
+            while pending or running:
+                ready = [s for s in pending if self.dependencies[s.name] <= finished]
+                for stage in ready:
+                    pending.remove(stage)
+                    # Staleness is decided once all upstream stages have written their outputs
+                    if not force and not self.is_stale(stage):
+                        print(f"[pipeline] {stage.name}: up to date, skipping")
+                        finished.add(stage.name)
+                        continue
+                    print(f"[pipeline] {stage.name}: running")
+                    running[pool.submit(stage.func)] = stage
+
+                if not running:
+                    if not ready:
+                        blocked = ", ".join(stage.name for stage in pending)
+                        raise RuntimeError(f"Stages {blocked} cannot be scheduled")
+                    # Skipped stages may have unblocked others
+                    continue
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    future.result()
+                    missing = [str(output) for output in stage.outputs if not output.exists()]
+                    if missing:
+                        raise RuntimeError(f"Stage {stage.name} did not produce {', '.join(missing)}")
+                    self.fingerprints[stage.name] = stage_fingerprint(stage, self.file_cache)
+                    self._save_manifest()
+                    finished.add(stage.name)
+                    ran.append(stage.name)
+                    print(f"[pipeline] {stage.name}: done")
+        return ran
+
+    def status(self):
+        """
+        Return (stage name, dependencies, stale) for every stage in execution order.
+        """
+        return [(stage.name, sorted(self.dependencies[stage.name]), self.is_stale(stage)) for stage in self.order]
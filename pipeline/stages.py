@@ -0,0 +1,140 @@
+import os
+
+"""
+The stages of the paper recommendation pipeline.
+
+    download -> extract -> preview
+                        -> reweight -> embed_weighted -> recommend_weighted
+                        -> embed    -> recommend ---------^
+
+Heavy modules are imported inside the stage functions so that listing or skipping
+stages does not pay for importing the plotting and embedding stacks.
+"""
+
+AAN_DOWNLOAD_LINK = "https://clair.eecs.umich.edu/aan/downloads/aandec2014.tar.gz"
+DATA_DIR = "data"
+ARCHIVE = f"{DATA_DIR}/aandec2014.tar.gz"
+RELEASE_DIR = f"{DATA_DIR}/2014"
+CITATION_NETWORK = f"{RELEASE_DIR}/networks/paper_citation_network.txt"
+IN_DEGREE_FILE = f"{RELEASE_DIR}/paper_incites.txt"
+OUT_DEGREE_FILE = f"{RELEASE_DIR}/paper_outcites.txt"
+PREVIEW_DIR = "visualization/preview"
+
+PAPER_IDS = "weight_reaccessment_of_edges/paper_ids.txt"
+PAPER_AUTHORS = "weight_reaccessment_of_edges/paper_author_affiliations.txt"
+AUTHOR_COMMUNITIES = "weight_reaccessment_of_edges/community_results.txt"
+WEIGHTED_NETWORK = "experiments/weighted_paper_citation_network.txt"
+
+BASELINE_EMBEDDINGS = "experiments/embeddings/baseline"
+WEIGHTED_EMBEDDINGS = "experiments/embeddings/weighted"
+BASELINE_RECOMMENDATIONS = "experiments/results/baseline_top10_with_similarity.txt"
+WEIGHTED_RECOMMENDATIONS = "experiments/results/weighted_top10_with_similarity.txt"
+
+EMBEDDING_PARAMS = {
+    "embedding_dim": 64,
+    "walk_length": 10,
+    "num_walks": 100,
+    "p": 0.1,
+    "q": 2,
+    "workers": 4,
+}
+NUM_SAMPLES = 1000
+SEED = 42
+TIME_DECAY_THRESHOLD = 0.43
+# Set to keep the IN_EDGE_BUDGET highest-weight in-edges per paper instead of thresholding
+IN_EDGE_BUDGET = None
+
+# Sharded walks are seeded per shard, so baseline and weighted embeddings are reproducible
+# for any number of workers and the embedding stages can run concurrently
+WALK_BACKEND = "sharded"
+
+
+def download():
+    from data_preparation import data_download
+    data_download.download_file(AAN_DOWNLOAD_LINK, DATA_DIR)
+
+
+def extract():
+    from data_preparation import data_download
+    data_download.untar_file(ARCHIVE, DATA_DIR)
+
+
+def preview():
+    from data_visualization import data_preview
+    data_preview.draw_all_graphs()
+    data_preview.max_and_min_in_degree_citation()
+    data_preview.max_and_min_out_degree_citation()
+
+
+def reweight():
+    import numpy as np
+    from weight_reaccessment_of_edges import adjust_edge_weight
+    adjust_edge_weight.load_weighting_data(PAPER_IDS, PAPER_AUTHORS, AUTHOR_COMMUNITIES)
+    if IN_EDGE_BUDGET is not None:
+        adjust_edge_weight.generate_sparsified_network(CITATION_NETWORK, WEIGHTED_NETWORK, IN_EDGE_BUDGET, plot=False)
+        return
+    median_count = np.median(list(adjust_edge_weight.year_distribution.values()))
+    threshold = TIME_DECAY_THRESHOLD * 1 / (1 + np.log(median_count + 1))
+    adjust_edge_weight.generate_new_network(CITATION_NETWORK, WEIGHTED_NETWORK, threshold, plot=False)
+
+
+def _embed(G, output_dir, seed, weighted):
+    from experiments import citation_graph_local_run as run
+    from experiments.tracing import NULL_TRACER
+    model = run.train_embeddings(G, seed=seed, tracer=NULL_TRACER, walk_backend=WALK_BACKEND, weighted=weighted,
+                                 **EMBEDDING_PARAMS)
+    node_list, embeddings, _ = run.extract_embeddings(model)
+    run.save_embeddings(output_dir, node_list, embeddings, model)
+
+
+def embed():
+    from experiments import citation_graph_local_run as run
+    _embed(run.load_citation_graph(CITATION_NETWORK), BASELINE_EMBEDDINGS, SEED, weighted=False)
+
+
+def embed_weighted():
+    from experiments import citation_graph_local_run as run
+    _embed(run.load_weighted_citation_graph(WEIGHTED_NETWORK), WEIGHTED_EMBEDDINGS, SEED, weighted=True)
+
+
+def recommend():
+    from experiments import citation_graph_local_run as run
+    G = run.load_citation_graph(CITATION_NETWORK)
+    sampled_nodes = run.sample_nodes(G, NUM_SAMPLES, SEED)
+    node_list, embeddings, node_to_idx = run.load_embeddings(BASELINE_EMBEDDINGS)
+    os.makedirs(os.path.dirname(BASELINE_RECOMMENDATIONS), exist_ok=True)
+    run.write_recommendations(BASELINE_RECOMMENDATIONS, sampled_nodes, node_list, embeddings, node_to_idx)
+
+
+def recommend_weighted():
+    from experiments import citation_graph_local_run as run
+    sampled_nodes = run.load_sampled_nodes(BASELINE_RECOMMENDATIONS)
+    node_list, embeddings, node_to_idx = run.load_embeddings(WEIGHTED_EMBEDDINGS)
+    os.makedirs(os.path.dirname(WEIGHTED_RECOMMENDATIONS), exist_ok=True)
+    run.write_recommendations(WEIGHTED_RECOMMENDATIONS, sampled_nodes, node_list, embeddings, node_to_idx)
+
+
+def build_stages():
+    """
+    Return the Stage objects of the full pipeline.
+    """
+    from pipeline.runner import Stage
+    return [
+        Stage("download", download, outputs=[ARCHIVE], params={"url": AAN_DOWNLOAD_LINK}),
+        Stage("extract", extract, inputs=[ARCHIVE], outputs=[RELEASE_DIR]),
+        Stage("preview", preview, inputs=[IN_DEGREE_FILE, OUT_DEGREE_FILE], outputs=[PREVIEW_DIR]),
+        Stage("reweight", reweight,
+              inputs=[CITATION_NETWORK, PAPER_IDS, PAPER_AUTHORS, AUTHOR_COMMUNITIES],
+              outputs=[WEIGHTED_NETWORK],
+              params={"threshold": TIME_DECAY_THRESHOLD} if IN_EDGE_BUDGET is None
+              else {"in_edge_budget": IN_EDGE_BUDGET}),
+        Stage("embed", embed, inputs=[CITATION_NETWORK], outputs=[BASELINE_EMBEDDINGS],
+              params={**EMBEDDING_PARAMS, "seed": SEED, "walk_backend": WALK_BACKEND}),
+        Stage("embed_weighted", embed_weighted, inputs=[WEIGHTED_NETWORK], outputs=[WEIGHTED_EMBEDDINGS],
+              params={**EMBEDDING_PARAMS, "seed": SEED, "walk_backend": WALK_BACKEND}),
+        Stage("recommend", recommend, inputs=[CITATION_NETWORK, BASELINE_EMBEDDINGS],
+              outputs=[BASELINE_RECOMMENDATIONS], params={"num_samples": NUM_SAMPLES, "seed": SEED}),
+        Stage("recommend_weighted", recommend_weighted,
+              inputs=[BASELINE_RECOMMENDATIONS, WEIGHTED_EMBEDDINGS],
+              outputs=[WEIGHTED_RECOMMENDATIONS]),
+    ]
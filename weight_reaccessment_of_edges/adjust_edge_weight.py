@@ -1,7 +1,7 @@
+import heapq
 from collections import defaultdict
 from collections import Counter
 import numpy as np
-import matplotlib.pyplot as plt
 
 """
 This file works on re-assessment of edges in the network.
@@ -71,6 +71,43 @@ def generate_community_dic(file):
         return communities
 
 
+def load_weighting_data(paper_ids, paper_author, community_file):
+
+    """
+    Load the publication years, authors and author communities used by calculate_weight.
+    :param paper_ids: The path of file that contains publication info.
+    :param paper_author: The path of file that contains author information.
+    :param community_file: The path of file that contains community information of authors.
+    :return: None
+    """
+
+    global id_to_year, year_distribution, paper_author_dic, community_dic
+    id_to_year = generate_year_dictionary(paper_ids)
+    year_distribution = Counter(id_to_year.values())
+    paper_author_dic = generate_paper_author_dic(paper_author)
+    community_dic = generate_community_dic(community_file)
+
+
+def load_weighting_data_from_store(metadata_dir):
+
+    """
+    Use a metadata store (see data_preparation/metadata_store.py) instead of the text files.
+    The dictionaries are built in bulk from the store's arrays, so nothing has to be parsed
+    and calculate_weight keeps its plain dict lookups.
+    :param metadata_dir: The directory of the metadata store.
+    :return: None
+    """
+
+    from data_preparation.metadata_store import PaperMetadata
+
+    global id_to_year, year_distribution, paper_author_dic, community_dic
+    store = PaperMetadata.load(metadata_dir)
+    id_to_year = store.year_dict()
+    year_distribution = Counter({str(year): count for year, count in store.year_counts().items()})
+    paper_author_dic = store.paper_author_dict()
+    community_dic = store.community_dict()
+
+
 def calculate_weight(citing, cited):
 
     """
@@ -92,6 +129,26 @@ def calculate_weight(citing, cited):
     return w
 
 
+def reference_weight(citing, cited):
+
+    """
+    Calculate the weight of a reference relative to the other references of the citing paper.
+    This is calculate_weight without the annual publication normalization, which only depends
+    on the citing paper, so it also works for new papers whose year is not in year_distribution.
+    A cited paper without a known year gets the weight of the center year.
+    :param citing: The paper ID of paper that citing other article.
+    :param cited: The paper ID of paper that being cited.
+    :return: The value of weight.
+    """
+
+    cited_year = id_to_year.get(cited)
+    w = time_decay_function(int(cited_year)) if cited_year else time_decay_function(2002)
+    if citing in paper_author_dic and cited in paper_author_dic:
+        if community_boost(paper_author_dic.get(citing), paper_author_dic.get(cited)):
+            w = w * 1.5
+    return w
+
+
 def time_decay_function(t, k=0.1, t_0=2002):
     """
     Calculate the weight by time decay function.
@@ -178,6 +235,7 @@ def plot_max_degree(dic):
     :param dic: The dictionary that contains the threshold and its corresponding maximum degree.
     :return: None
     """
+    import matplotlib.pyplot as plt
 
     plt.figure(figsize=(10, 6))
     plt.plot(dic.keys(), dic.values())
@@ -187,7 +245,7 @@ def plot_max_degree(dic):
     plt.show()
 
 
-def generate_new_network(in_file, out_file, threshold):
+def generate_new_network(in_file, out_file, threshold, plot=True):
 
     """
     Generate the new network by using the optimal threshold.
@@ -196,6 +254,7 @@ def generate_new_network(in_file, out_file, threshold):
     :param in_file: The original paper citation network file.
     :param out_file: The new paper citation network file path.
     :param threshold: The optimal threshold.
+    :param plot: Whether to draw the CCDF comparison plot.
     :return: None
     """
 
@@ -228,12 +287,84 @@ def generate_new_network(in_file, out_file, threshold):
     new_degree_dic = {key: len(paper_weight_dic[key]) for key in paper_weight_dic}
     old_degrees = list(old_degree_dic.values())
     new_degrees = list(new_degree_dic.values())
-    old_x, old_ccdf = compute_ccdf(old_degrees)
-    new_x, new_ccdf = compute_ccdf(new_degrees)
-    plot_ccdf_comparison(old_x, old_ccdf, new_x, new_ccdf)
+    if plot:
+        old_x, old_ccdf = compute_ccdf(old_degrees)
+        new_x, new_ccdf = compute_ccdf(new_degrees)
+        plot_ccdf_comparison(old_x, old_ccdf, new_x, new_ccdf)
     print(f"The percentage of removed edge is {remove_edge_num / total_edge}")
 
 
+def in_edge_budget(in_degree, k, degree_exponent=None):
+
+    """
+    The number of in-edges a cited paper keeps in generate_sparsified_network.
+    :param in_degree: The original in-degree of the cited paper.
+    :param k: The fixed budget, or the minimum budget with degree_exponent.
+    :param degree_exponent: If given, the budget grows as in_degree ** degree_exponent.
+    :return: The budget.
+    """
+
+    if degree_exponent is None:
+        return k
+    return max(k, int(np.ceil(in_degree ** degree_exponent)))
+
+
+def generate_sparsified_network(in_file, out_file, k=10, degree_exponent=None, plot=True):
+
+    """
+    Generate the new network by keeping the k highest-weight in-edges of every cited paper,
+    instead of removing all edges below one global threshold.
+    Every cited paper keeps at least one in-edge, so no weights have to be restored afterwards,
+    and hubs are capped at k in-edges. Ties keep the edge that comes first in in_file.
+    With degree_exponent, a paper cited d times keeps max(k, ceil(d ** degree_exponent)) in-edges,
+    which needs one extra pass over in_file to count the in-degrees.
+
+    :param in_file: The original paper citation network file.
+    :param out_file: The new paper citation network file path, in the format of generate_new_network.
+    :param k: The number of in-edges kept per cited paper, at least 1.
+    :param degree_exponent: The exponent of the degree-dependent budget, or None for a fixed k.
+    :param plot: Whether to draw the CCDF comparison plot.
+    :return: None
+    """
+
+    if k < 1:
+        raise ValueError(f"k must be at least 1 so that every cited paper keeps an in-edge, got {k}")
+
+    in_degree = Counter()
+    if degree_exponent is not None:
+        with open(in_file, "r") as infile:
+            for line in infile:
+                in_degree[line.strip().split(" ==> ")[1]] += 1
+
+    # One bounded min-heap of (weight, -line number, line) per cited paper
+    heaps = {}
+    total_edge = 0
+    with open(in_file, "r") as infile:
+        for index, line in enumerate(infile):
+            total_edge = total_edge + 1
+            line = line.strip()
+            citing_id, cited_id = line.split(" ==> ")
+            weight = calculate_weight(citing_id, cited_id)
+            if degree_exponent is None:
+                in_degree[cited_id] += 1
+            heap = heaps.setdefault(cited_id, [])
+            entry = (weight, -index, line)
+            if len(heap) < in_edge_budget(in_degree[cited_id], k, degree_exponent):
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+
+    kept = sorted((-neg_index, line, weight) for heap in heaps.values() for weight, neg_index, line in heap)
+    with open(out_file, 'w') as outfile:
+        for _, line, weight in kept:
+            outfile.write(f"{line} {weight}\n")
+    if plot:
+        old_x, old_ccdf = compute_ccdf(list(in_degree.values()))
+        new_x, new_ccdf = compute_ccdf([len(heap) for heap in heaps.values()])
+        plot_ccdf_comparison(old_x, old_ccdf, new_x, new_ccdf)
+    print(f"The percentage of removed edge is {1 - len(kept) / total_edge}")
+
+
 def compute_ccdf(degrees):
 
     """
@@ -264,6 +395,7 @@ def plot_ccdf_comparison(x1, ccdf1, x2, ccdf2):
     :param ccdf2: A list of CCDF values of new network.
     :return: None
     """
+    import matplotlib.pyplot as plt
 
     plt.figure(figsize=(10, 6))
     plt.loglog(x1, ccdf1, marker='o', label="Original Network")
@@ -277,16 +409,9 @@ def plot_ccdf_comparison(x1, ccdf1, x2, ccdf2):
 
 if __name__ == "__main__":
     paper_ids = "paper_ids.txt"
-    id_to_year = generate_year_dictionary(paper_ids)
-
-    years = list(id_to_year.values())
-    year_distribution = Counter(years)
-
     paper_author = "paper_author_affiliations.txt"
-    paper_author_dic = generate_paper_author_dic(paper_author)
-
     community_file = "community_results.txt"
-    community_dic = generate_community_dic(community_file)
+    load_weighting_data(paper_ids, paper_author, community_file)
 
     citation_file = "paper_citation_network.txt"
     output_file = "weighted_paper_citation_network.txt"
@@ -295,20 +420,3 @@ if __name__ == "__main__":
 
     final_threshold = 0.43 * 1 / (1 + np.log(np.median(list(year_distribution.values())) + 1))
     generate_new_network(citation_file, output_file, final_threshold)
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
@@ -1,5 +1,4 @@
 from collections import Counter
-import matplotlib.pyplot as plt
 
 """
 This file mainly works on analyzing the publication year of articles.
@@ -24,7 +23,15 @@ def generate_year_dictionary(file):
     return year_dic
 
 
+def load_year_dictionary_from_store(metadata_dir):
+    # paper ID -> year string view over the metadata store (data_preparation/metadata_store.py)
+    from data_preparation.metadata_store import PaperMetadata
+    return PaperMetadata.load(metadata_dir).year_mapping()
+
+
 def analyze_year_distribution(dictionary):
+    import matplotlib.pyplot as plt
+
     years = list(dictionary.values())
     year_distribution = Counter(years)
     sorted_year_distribution = dict(sorted(year_distribution.items()))
@@ -40,6 +47,8 @@ def analyze_year_distribution(dictionary):
 
 
 def top_citation_paper(file):
+    import matplotlib.pyplot as plt
+
     article_dict = {}
     with open(file, 'r') as file:
         for line in file: